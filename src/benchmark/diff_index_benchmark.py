@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""인라인 코멘트 position 계산 벤치마크.
+
+finding마다 diff position을 구하는 두 방식을 stub GitHub 위에서 비교합니다.
+  - legacy: 이전 post_review처럼 코멘트마다 PR 파일 목록을 다시 받아 해당 patch를 처음부터 파싱
+  - index:  추출 단계에서 받은 patch로 DiffPositionIndex를 한 번 만들고 finding마다 dict/bisect 조회
+
+    cd src && python -m benchmark.diff_index_benchmark --pr xlarge-mixed --findings 200
+    cd src && python -m benchmark.diff_index_benchmark --synthetic-lines 20000 --findings 2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+from loguru import logger
+
+from benchmark.pipeline_benchmark import CORPUS_DIR, load_corpus
+from benchmark.stubs import StubGitHub
+from diff_parser import DiffPositionIndex
+
+
+def legacy_line_to_position(patch: str) -> Dict[int, int]:
+    """이전 방식: 코멘트 하나를 위해 patch 전체를 파싱합니다."""
+    mapping = {}
+    position = 0
+    new_line = None
+    for line in patch.split("\n"):
+        if line.startswith("@@"):
+            if new_line is not None:
+                position += 1
+            new_line = int(line.split("+")[1].split(",")[0].split(" ")[0])
+            continue
+        if new_line is None:
+            continue
+        position += 1
+        if line.startswith("-") or line.startswith("\\"):
+            continue
+        mapping[new_line] = position
+        new_line += 1
+    return mapping
+
+
+def synthetic_pr(lines: int, files: int = 20, hunk_size: int = 40) -> Dict[str, Any]:
+    """hunk가 많은 큰 PR을 만듭니다 (추가 3 : 문맥 1 : 삭제 1)."""
+    per_file = max(1, lines // files)
+    pr_files = []
+    for i in range(files):
+        body = []
+        new_line = 1
+        while len(body) < per_file:
+            body.append(f"@@ -{new_line},{hunk_size} +{new_line},{hunk_size} @@ class Synthetic{i}")
+            for j in range(hunk_size):
+                kind = j % 5
+                body.append(("-" if kind == 4 else " " if kind == 3 else "+") + f"line {new_line}")
+            new_line += hunk_size * 2
+        patch = "\n".join(body)
+        pr_files.append({"filename": f"src/synthetic/File{i}.py", "status": "modified",
+                         "additions": per_file, "deletions": 0, "changes": per_file, "patch": patch})
+    return {"name": "synthetic", "repo": "bench/synthetic", "number": 1, "title": "synthetic", "body": "",
+            "base_sha": "0" * 40, "head_sha": "1" * 40, "files": pr_files}
+
+
+def sample_findings(pr: Dict[str, Any], count: int, seed: int = 7) -> List[Tuple[str, int]]:
+    """diff 안의 줄과 1~5줄 벗어난 줄을 섞어 (파일, 줄 번호)를 뽑습니다."""
+    rng = random.Random(seed)
+    targets = []
+    patched = [file for file in pr["files"] if file.get("patch")]
+    for _ in range(count):
+        file = rng.choice(patched)
+        lines = sorted(legacy_line_to_position(file["patch"]))
+        line = rng.choice(lines) + (rng.randint(1, 5) if rng.random() < 0.3 else 0)
+        targets.append((file["filename"], line))
+    return targets
+
+
+def run_legacy(pr: Dict[str, Any], findings: List[Tuple[str, int]]) -> Tuple[float, int]:
+    from github import Github
+
+    client = Github(base_url=os.environ["GITHUB_API_URL"])
+    started = time.perf_counter()
+    resolved = 0
+    for path, line in findings:
+        pull = client.get_repo(pr["repo"]).get_pull(pr["number"])
+        patch = next((file.patch for file in pull.get_files() if file.filename == path), None)
+        if patch and line in legacy_line_to_position(patch):
+            resolved += 1
+    return time.perf_counter() - started, resolved
+
+
+def run_index(patches: Dict[str, str], findings: List[Tuple[str, int]]) -> Tuple[float, float, int]:
+    started = time.perf_counter()
+    index = DiffPositionIndex.from_patches(patches)
+    built = time.perf_counter()
+    resolved = sum(1 for path, line in findings if index.anchor(path, line) is not None)
+    return built - started, time.perf_counter() - built, resolved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff position index benchmark")
+    parser.add_argument("--corpus-dir", default=CORPUS_DIR)
+    parser.add_argument("--pr", default="xlarge-mixed", help="Corpus entry name")
+    parser.add_argument("--synthetic-lines", type=int, default=0, help="Use a synthetic PR with this many diff lines")
+    parser.add_argument("--findings", type=int, default=200)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="INFO" if args.verbose else "WARNING")
+
+    if args.synthetic_lines:
+        pr = synthetic_pr(args.synthetic_lines)
+    else:
+        corpus = load_corpus(args.corpus_dir, [args.pr])
+        if not corpus:
+            raise SystemExit(f"No corpus entry named {args.pr} in {args.corpus_dir}")
+        pr = corpus[0]
+
+    findings = sample_findings(pr, args.findings)
+    patches = {file["filename"]: file["patch"] for file in pr["files"] if file.get("patch")}
+    diff_lines = sum(patch.count("\n") + 1 for patch in patches.values())
+    print(f"{pr['name']}: {len(patches)} files, {diff_lines} diff lines, {len(findings)} findings")
+
+    github = StubGitHub([pr]).start()
+    os.environ["GITHUB_API_URL"] = github.url
+    os.environ.pop("GITHUB_TOKEN", None)
+    try:
+        legacy_seconds, legacy_resolved = run_legacy(pr, findings)
+        requests = sum(github.reset_counts().values())
+    finally:
+        github.stop()
+
+    build_seconds, lookup_seconds, resolved = run_index(patches, findings)
+    print(f"legacy  total={legacy_seconds:8.3f}s  GitHub requests={requests:<5} exact matches={legacy_resolved}")
+    print(f"index   build={build_seconds * 1000:8.2f}ms lookups={lookup_seconds * 1000:.2f}ms  "
+          f"GitHub requests=0     anchored (±3 lines)={resolved}")
+
+
+if __name__ == "__main__":
+    main()
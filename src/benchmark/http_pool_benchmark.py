@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Ollama 요청당 HTTP 오버헤드 마이크로 벤치마크.
+
+매 요청마다 새 커넥션을 여는 방식(requests.get)과 keep-alive 커넥션 풀(create_http_session)을
+같은 엔드포인트(/api/tags)에 대해 비교합니다.
+
+    cd src && python -m benchmark.http_pool_benchmark --api-url http://localhost:11434 --requests 50
+"""
+import argparse
+import statistics
+import time
+
+import requests
+
+from http_client import create_http_session
+
+
+def _measure(get, url: str, count: int) -> list:
+    latencies = []
+    for _ in range(count):
+        started_at = time.perf_counter()
+        response = get(url, timeout=10)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - started_at) * 1000)
+    return latencies
+
+
+def _summary(name: str, latencies: list) -> str:
+    ordered = sorted(latencies)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    return (f"{name:<10} mean={statistics.mean(latencies):7.2f}ms "
+            f"p50={statistics.median(latencies):7.2f}ms p95={p95:7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP connection pool micro-benchmark")
+    parser.add_argument("--api-url", default="http://localhost:11434", help="Ollama API URL")
+    parser.add_argument("--requests", type=int, default=50, help="Number of requests per mode")
+    args = parser.parse_args()
+
+    url = f"{args.api_url}/api/tags"
+
+    fresh = _measure(requests.get, url, args.requests)
+
+    session = create_http_session(pool_connections=1, pool_maxsize=1)
+    try:
+        pooled = _measure(session.get, url, args.requests)
+    finally:
+        session.close()
+
+    print(_summary("fresh", fresh))
+    print(_summary("pooled", pooled))
+    print(f"per-request saving: {statistics.mean(fresh) - statistics.mean(pooled):.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""리뷰 1건당 로깅 오버헤드 벤치마크.
+
+리뷰 한 건이 남기는 payload 로그(pr_data, 파일별 프롬프트/응답, 컨벤션 가이드, 리뷰 결과, 리포트)를 같은 순서로 재현하여
+  - legacy:  payload 전체를 f-string으로 남기고 stderr/파일 sink에 동기 기록 (이전 동작)
+  - bounded: log_config.payload()로 길이+해시만 남기고 sink는 백그라운드 큐로 기록
+두 모드에서 호출 스레드가 로깅에 쓴 시간을 비교합니다. stderr는 /dev/null로 보냅니다.
+
+    cd src && python -m benchmark.logging_benchmark --pr-kb 2048 --files 40 --reviews 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from loguru import logger
+
+import log_config
+from log_config import payload
+
+
+def _build_payloads(pr_kb: int, files: int):
+    line = "+    let value = try! JSONDecoder().decode(Item.self, from: data!)  // padding\n"
+    file_chars = pr_kb * 1024 // files
+    file_texts = [f"=== File: App/File{i}.swift ===\n" + line * max(1, file_chars // len(line)) for i in range(files)]
+    pr_data = "PR Title: bench\n" + "".join(file_texts)
+    prompts = [f"<instructions>...</instructions>\n<diff>{text}</diff>" for text in file_texts]
+    responses = ['{"response": "### 🟨 Medium\\n- 강제 언래핑을 피하세요.\\n", "done": true}' * 20] * files
+    report = "# 🔍 코드 리뷰 결과\n\n" + "\n".join(f"## 📄 `App/File{i}.swift`\n\n- 강제 언래핑" for i in range(files))
+    return pr_data, prompts, responses, report
+
+
+def _review_logging(pr_data, prompts, responses, report, bounded: bool) -> float:
+    """리뷰 한 건의 payload 로그 호출에 걸린 시간(초)을 반환합니다."""
+    wrap = (lambda text, label: payload(text, label)) if bounded else (lambda text, label: text)
+    started_at = time.perf_counter()
+    logger.info(f"[DEBUG] pr_data: {wrap(pr_data, 'pr_data')}")
+    for prompt, response in zip(prompts, responses):
+        logger.info(f"요청 프롬프트: {wrap(prompt, 'prompt')}")
+        logger.info(f"ollama API response: {wrap(response, 'response')}")
+    logger.debug(f"[DEBUG] review_results: {wrap(report, 'review_results')}")
+    logger.info(f"[DEBUG] review_results: {wrap(report, 'review_results')}")
+    logger.info(f"[DEBUG] final_report: {wrap(report, 'report')}")
+    logger.debug(f"[DEBUG] 리포트 내용: {wrap(report, 'report')}")
+    return time.perf_counter() - started_at
+
+
+def _run(mode: str, args, payloads, log_dir: str) -> dict:
+    log_file = os.path.join(log_dir, f"{mode}.log")
+    spool = os.path.join(log_dir, "payload_spool.log") if mode == "bounded+spool" else None
+    if mode == "legacy":
+        logger.remove()
+        logger.add(sys.stderr)
+        logger.add(log_file, rotation="1 day", retention="7 days")
+    else:
+        log_config.setup_logging(log_file=log_file, enqueue=True, payload_limit=args.payload_limit,
+                                 payload_spool=spool)
+
+    caller = [_review_logging(*payloads, bounded=mode != "legacy") for _ in range(args.reviews)]
+    drain_started_at = time.perf_counter()
+    log_config.shutdown_logging()
+    drain = time.perf_counter() - drain_started_at
+    return {
+        "caller_ms": statistics.mean(caller) * 1000,
+        "drain_ms": drain * 1000 / args.reviews,
+        "log_mb": os.path.getsize(log_file) / 1024 / 1024 / args.reviews,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-review logging overhead benchmark")
+    parser.add_argument("--pr-kb", type=int, default=2048, help="PR diff size in KB")
+    parser.add_argument("--files", type=int, default=40, help="Number of files (one prompt/response each)")
+    parser.add_argument("--reviews", type=int, default=5, help="Reviews per mode")
+    parser.add_argument("--payload-limit", type=int, default=log_config.DEFAULT_PAYLOAD_LIMIT)
+    args = parser.parse_args()
+
+    payloads = _build_payloads(args.pr_kb, args.files)
+    stderr = sys.stderr
+    with tempfile.TemporaryDirectory() as log_dir, open(os.devnull, "w") as devnull:
+        sys.stderr = devnull
+        try:
+            results = {mode: _run(mode, args, payloads, log_dir) for mode in ("legacy", "bounded", "bounded+spool")}
+        finally:
+            sys.stderr = stderr
+
+    print(f"PR {args.pr_kb} KB, {args.files} files, {args.reviews} reviews per mode")
+    for mode, result in results.items():
+        print(f"{mode:<14} caller={result['caller_ms']:8.2f} ms/review  "
+              f"queue drain={result['drain_ms']:8.2f} ms/review  log file={result['log_mb']:6.2f} MB/review")
+
+
+if __name__ == "__main__":
+    main()
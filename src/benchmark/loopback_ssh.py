@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""`ssh -N -L local:host:remote ... user@host`를 흉내 내는 로컬 포트 포워더.
+
+SSHTunnel(ssh_command=[sys.executable, "benchmark/loopback_ssh.py"])로 지정하면 sshd 없이
+터널 시작/준비 확인/재연결 경로를 실행할 수 있습니다. -o, -p 등 다른 옵션은 무시하고,
+--handshake 초(또는 LOOPBACK_SSH_HANDSHAKE 환경 변수)만큼 기다린 뒤 포트를 엽니다.
+ControlMaster(-M, -O) 동작은 흉내 내지 않으므로 실제 sshd로 확인해야 합니다.
+"""
+import os
+import socket
+import sys
+import threading
+import time
+
+
+def _parse_forward(argv):
+    handshake = float(os.getenv("LOOPBACK_SSH_HANDSHAKE", "0"))
+    forward = None
+    args = iter(argv)
+    for arg in args:
+        if arg == "-L":
+            forward = next(args)
+        elif arg == "--handshake":
+            handshake = float(next(args))
+        elif arg in ("-o", "-p", "-S", "-O"):
+            next(args)
+    if forward is None:
+        raise SystemExit("loopback_ssh: -L local:host:remote is required")
+    local_port, remote_host, remote_port = forward.split(":")
+    return int(local_port), remote_host, int(remote_port), handshake
+
+
+def _pipe(source: socket.socket, target: socket.socket) -> None:
+    try:
+        while True:
+            data = source.recv(65536)
+            if not data:
+                break
+            target.sendall(data)
+    except OSError:
+        pass
+    finally:
+        for sock in (source, target):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def _serve(client: socket.socket, remote_host: str, remote_port: int) -> None:
+    try:
+        upstream = socket.create_connection((remote_host, remote_port))
+    except OSError:
+        client.close()
+        return
+    threading.Thread(target=_pipe, args=(client, upstream), daemon=True).start()
+    _pipe(upstream, client)
+    client.close()
+    upstream.close()
+
+
+def main():
+    local_port, remote_host, remote_port, handshake = _parse_forward(sys.argv[1:])
+    time.sleep(handshake)
+
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        server.bind(("127.0.0.1", local_port))
+    except OSError as e:
+        # ExitOnForwardFailure=yes와 같이 포워딩 실패 시 바로 종료합니다.
+        print(f"bind [127.0.0.1]:{local_port}: {e}", file=sys.stderr)
+        raise SystemExit(255)
+    server.listen(64)
+    while True:
+        client, _ = server.accept()
+        threading.Thread(target=_serve, args=(client, remote_host, remote_port), daemon=True).start()
+
+
+if __name__ == "__main__":
+    main()
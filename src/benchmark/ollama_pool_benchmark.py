@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""여러 Ollama 엔드포인트 부하 분산 벤치마크 (로컬 stub 서버 사용).
+
+생성 지연이 서로 다른 stub Ollama 서버 여러 개를 띄우고, 같은 generate 요청 묶음을
+단일 엔드포인트와 엔드포인트 풀로 각각 보내 전체 소요 시간과 엔드포인트별 분산 결과를 비교합니다.
+stub 하나는 요청 모델을 갖고 있지 않고(라우팅 제외 확인), 다른 하나는 항상 500을 반환합니다(eject 확인).
+
+    cd src && python -m benchmark.ollama_pool_benchmark --requests 24 --concurrency 6
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from codellama_reviewer import DEFAULT_MODEL, CodeLlamaReviewer
+
+
+def _start_stub(latency: float, models, fail: bool = False) -> ThreadingHTTPServer:
+    # GPU 하나짜리 Ollama(OLLAMA_NUM_PARALLEL=1)처럼 생성 요청을 한 번에 하나씩 처리합니다.
+    generate_lock = threading.Lock()
+
+    class StubOllama(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, payload) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._send_json(200, {"models": [{"name": name, "size": 0} for name in models]})
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if fail:
+                self._send_json(500, {"error": "stub failure"})
+                return
+            with generate_lock:
+                time.sleep(latency)
+            self._send_json(200, {"response": "NO ISSUE", "done": True,
+                                  "eval_count": 100, "eval_duration": int(latency * 1e9)})
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllama)
+    server.disable_nagle_algorithm = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _run(api_url: str, requests_count: int, concurrency: int):
+    reviewer = CodeLlamaReviewer(api_url=api_url, max_workers=concurrency, health_check_interval=0)
+
+    def generate(index):
+        try:
+            return reviewer._generate(f"prompt {index}", DEFAULT_MODEL)
+        except Exception:
+            return None
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(generate, range(requests_count)))
+    elapsed = time.perf_counter() - started_at
+    stats = reviewer.endpoint_pool.stats()
+    reviewer.close()
+    return elapsed, sum(result is None for result in results), stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ollama endpoint pool benchmark with local stub servers")
+    parser.add_argument("--requests", type=int, default=24, help="Number of generate requests")
+    parser.add_argument("--concurrency", type=int, default=6, help="Concurrent requests")
+    parser.add_argument("--latency", type=float, default=0.2, help="Base stub generation latency (seconds)")
+    args = parser.parse_args()
+
+    stubs = [
+        _start_stub(args.latency, [DEFAULT_MODEL]),
+        _start_stub(args.latency * 1.5, [DEFAULT_MODEL]),
+        _start_stub(args.latency, ["other-model:latest"]),
+        _start_stub(args.latency, [DEFAULT_MODEL], fail=True),
+    ]
+    urls = [f"http://127.0.0.1:{stub.server_port}" for stub in stubs]
+
+    single_elapsed, single_failed, _ = _run(urls[0], args.requests, args.concurrency)
+    pool_elapsed, pool_failed, pool_stats = _run(",".join(urls), args.requests, args.concurrency)
+
+    print(f"single endpoint: {single_elapsed:.2f}s ({single_failed} failed)")
+    print(f"endpoint pool  : {pool_elapsed:.2f}s ({pool_failed} failed)")
+    for url, stats in pool_stats.items():
+        print(f"  {url}: {stats}")
+
+    for stub in stubs:
+        stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
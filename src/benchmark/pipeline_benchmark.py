@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""오프라인 end-to-end 파이프라인 벤치마크.
+
+기록된 PR 코퍼스(benchmark/corpus/*.json)를 stub GitHub API로, stub Ollama를 LLM으로 띄운 뒤
+PRExtractor -> CodeLlamaReviewer.review_code -> ReviewFormatter -> GitHubCommenter를 그대로 실행하여
+단계별 p50/p95 지연, 외부 요청 수, 최대 메모리를 측정하고 JSON으로 저장합니다.
+
+    cd src && python -m benchmark.pipeline_benchmark --runs 5
+    cd src && python -m benchmark.pipeline_benchmark --parallel --extract-source diff --baseline old.json
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from loguru import logger
+
+from benchmark.stubs import StubGitHub, StubOllama
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+STAGES = ["extract", "review", "format", "post", "total"]
+
+
+def load_corpus(corpus_dir: str, names: List[str] = None) -> List[Dict[str, Any]]:
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            pr = json.load(f)
+        if not names or pr["name"] in names:
+            corpus.append(pr)
+    return corpus
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+
+    def percentile(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    return {
+        "n": len(ordered),
+        "mean": round(statistics.mean(ordered), 4),
+        "p50": round(percentile(50), 4),
+        "p95": round(percentile(95), 4),
+        "max": round(ordered[-1], 4),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def run_once(pr: Dict[str, Any], reviewer, args) -> Dict[str, float]:
+    # GITHUB_API_URL을 stub으로 설정한 뒤 import해야 합니다.
+    from github_commenter import GitHubCommenter
+    from pr_extractor import PRExtractor
+    from review_formatter import ReviewFormatter
+
+    timings = {}
+    started_at = time.perf_counter()
+
+    stage_started_at = time.perf_counter()
+    extractor = PRExtractor(pr["repo"], pr["number"])
+    pr_data = extractor.extract_pr_data(
+        fetch_missing_patches=False,
+        source=args.extract_source,
+        base_sha=pr["base_sha"],
+        head_sha=pr["head_sha"]
+    )
+    timings["extract"] = time.perf_counter() - stage_started_at
+
+    stage_started_at = time.perf_counter()
+    review_results = reviewer.review_code(pr_data, parallel=args.parallel)
+    timings["review"] = time.perf_counter() - stage_started_at
+
+    stage_started_at = time.perf_counter()
+    report = ReviewFormatter().create_unified_report(review_results)
+    timings["format"] = time.perf_counter() - stage_started_at
+
+    stage_started_at = time.perf_counter()
+    GitHubCommenter(pr["repo"], pr["number"]).post_unified_report(report)
+    timings["post"] = time.perf_counter() - stage_started_at
+
+    timings["total"] = time.perf_counter() - started_at
+    return timings
+
+
+def compare(result: Dict[str, Any], baseline_path: str) -> None:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nbaseline {baseline['meta']['commit']} -> {result['meta']['commit']}")
+    for stage in STAGES:
+        before = baseline["stages"].get(stage, {}).get("p50")
+        after = result["stages"][stage]["p50"]
+        if before:
+            print(f"  {stage:<8} p50 {before:.4f}s -> {after:.4f}s ({(after - before) / before * 100:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end review pipeline benchmark")
+    parser.add_argument("--corpus-dir", default=CORPUS_DIR, help="Directory of recorded PR payloads")
+    parser.add_argument("--pr", action="append", default=None, help="Corpus entry name to run (repeatable)")
+    parser.add_argument("--runs", type=int, default=3, help="Measured runs per PR")
+    parser.add_argument("--warmup-runs", type=int, default=1, help="Unmeasured runs per PR")
+    parser.add_argument("--parallel", action="store_true", help="Review files concurrently")
+    parser.add_argument("--max-workers", type=int, default=3, help="Concurrent review requests")
+    parser.add_argument("--stream", action="store_true", help="Use streaming generation")
+    parser.add_argument("--structured-output", action="store_true", help="Request JSON findings and render Markdown")
+    parser.add_argument("--extract-source", choices=["api", "diff"], default="api", help="PR extraction method")
+    parser.add_argument("--ollama-latency", type=float, default=0.05, help="Stub prompt-processing latency (seconds)")
+    parser.add_argument("--ollama-tps", type=float, default=400.0, help="Stub generation tokens/sec")
+    parser.add_argument("--ollama-output-tokens", type=int, default=40, help="Stub generated tokens per request")
+    parser.add_argument("--ollama-parallel", type=int, default=1, help="Stub concurrent generation slots")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Track Python heap peak with tracemalloc (adds overhead to timings)")
+    parser.add_argument("--output", default=None, help="Result JSON path (default: benchmark_results/pipeline_<commit>_<time>.json)")
+    parser.add_argument("--baseline", default=None, help="Previous result JSON to compare p50 against")
+    parser.add_argument("--verbose", action="store_true", help="Show pipeline INFO logs")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="INFO" if args.verbose else "WARNING")
+
+    corpus = load_corpus(args.corpus_dir, args.pr)
+    if not corpus:
+        raise SystemExit(f"No corpus entries found in {args.corpus_dir}")
+
+    github = StubGitHub(corpus).start()
+    ollama = StubOllama(
+        latency=args.ollama_latency,
+        tokens_per_second=args.ollama_tps,
+        output_tokens=args.ollama_output_tokens,
+        parallel=args.ollama_parallel
+    ).start()
+    os.environ["GITHUB_API_URL"] = github.url
+    os.environ.pop("GITHUB_TOKEN", None)
+
+    from codellama_reviewer import CodeLlamaReviewer
+
+    if args.trace_memory:
+        tracemalloc.start()
+
+    # 응답 캐시 없이 매번 생성하도록 하고, 리뷰어는 실제 실행과 같이 한 번만 생성합니다.
+    reviewer = CodeLlamaReviewer(
+        api_url=ollama.url,
+        max_workers=args.max_workers,
+        stream=args.stream,
+        rule_index_backend="numpy",
+        structured_output=args.structured_output
+    )
+    github.reset_counts()
+    ollama.reset_counts()
+
+    per_pr = {}
+    all_timings = {stage: [] for stage in STAGES}
+    github_requests: Dict[str, int] = {}
+    ollama_requests: Dict[str, int] = {}
+    try:
+        for pr in corpus:
+            for _ in range(args.warmup_runs):
+                run_once(pr, reviewer, args)
+                github.reset_comments()
+            github.reset_counts()
+            ollama.reset_counts()
+
+            timings = {stage: [] for stage in STAGES}
+            for _ in range(args.runs):
+                for stage, value in run_once(pr, reviewer, args).items():
+                    timings[stage].append(value)
+                github.reset_comments()
+
+            pr_github = github.reset_counts()
+            pr_ollama = ollama.reset_counts()
+            for counts, total in ((pr_github, github_requests), (pr_ollama, ollama_requests)):
+                for key, count in counts.items():
+                    total[key] = total.get(key, 0) + count
+
+            per_pr[pr["name"]] = {
+                "files": len(pr["files"]),
+                "patch_chars": sum(len(file.get("patch", "")) for file in pr["files"]),
+                "stages": {stage: summarize(values) for stage, values in timings.items()},
+                "requests_per_run": {
+                    "github": round(sum(pr_github.values()) / args.runs, 2),
+                    "ollama_generate": round(pr_ollama.get("POST /api/generate", 0) / args.runs, 2),
+                },
+            }
+            for stage, values in timings.items():
+                all_timings[stage].extend(values)
+            print(f"{pr['name']:<16} files={len(pr['files']):<3} "
+                  + " ".join(f"{stage}={summarize(values)['p50']:.3f}s" for stage, values in timings.items()))
+    finally:
+        reviewer.close()
+        github.stop()
+        ollama.stop()
+
+    memory = {"max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+    if args.trace_memory:
+        memory["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+        tracemalloc.stop()
+
+    commit = git_commit()
+    result = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "baseline", "verbose")},
+        },
+        "stages": {stage: summarize(values) for stage, values in all_timings.items()},
+        "per_pr": per_pr,
+        "requests": {"github": github_requests, "ollama": ollama_requests},
+        "memory": memory,
+    }
+
+    output = args.output or os.path.join(
+        "benchmark_results", f"pipeline_{commit}_{datetime.now().strftime('%Y%m%d%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    print("\n" + " ".join(f"{stage}: p50={s['p50']:.3f}s p95={s['p95']:.3f}s" for stage, s in result["stages"].items()))
+    print(f"requests: github={sum(github_requests.values())} ollama={sum(ollama_requests.values())}, memory: {memory}")
+    print(f"saved: {output}")
+
+    if args.baseline:
+        compare(result, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""프롬프트 배치별 prompt_eval 비용 벤치마크.
+
+PR 하나를 파일 단위 유닛으로 나눠 순서대로(max_workers=1) 리뷰하면서 요청마다 Ollama가 보고한
+prompt_eval_count / prompt_eval_duration을 모읍니다.
+  - diff-first:            기존 템플릿 (diff가 맨 앞이라 요청 간 공통 prefix가 없음)
+  - prefix-stable:         고정 지침 블록이 앞에 오므로 슬롯 KV cache가 지침 부분을 재사용
+  - prefix-stable+context: 이전 응답의 context를 이어 붙이고 지침 없이 diff만 전송
+
+기본은 llama.cpp 슬롯 prompt cache를 흉내 내는 stub Ollama(--prompt-eval-tps)로 실행합니다.
+실제 서버에서 측정하려면 --api-url을 주세요 (모드마다 같은 서버를 쓰므로 첫 요청도 캐시 영향을 받을 수 있음).
+
+    cd src && python -m benchmark.prompt_cache_benchmark --pr medium-java
+    cd src && python -m benchmark.prompt_cache_benchmark --api-url http://localhost:11434 --pr large-swift
+"""
+import argparse
+import os
+import statistics
+import sys
+from typing import Any, Dict, List
+
+from loguru import logger
+
+from benchmark.pipeline_benchmark import CORPUS_DIR, load_corpus
+from benchmark.stubs import StubGitHub, StubOllama
+
+MODES = {
+    "diff-first": {"prompt_layout": "diff-first", "reuse_context": False},
+    "prefix-stable": {"prompt_layout": "prefix-stable", "reuse_context": False},
+    "prefix-stable+context": {"prompt_layout": "prefix-stable", "reuse_context": True},
+}
+
+
+def run_mode(pr_data: str, api_url: str, options: Dict[str, Any], args) -> List[Dict[str, Any]]:
+    from codellama_reviewer import CodeLlamaReviewer
+
+    reviewer = CodeLlamaReviewer(
+        api_url=api_url,
+        max_workers=1,
+        rule_index_backend="numpy",
+        generation_options={"num_ctx": args.num_ctx, "num_predict": args.num_predict},
+        **options
+    )
+    try:
+        reviewer.review_code(pr_data, parallel=True)
+        return list(reviewer.generation_metrics)
+    finally:
+        reviewer.close()
+
+
+def describe(metrics: List[Dict[str, Any]]) -> str:
+    counts = [m.get("prompt_eval_count") or 0 for m in metrics]
+    seconds = [(m.get("prompt_eval_duration") or 0) / 1e9 for m in metrics]
+    rest = seconds[1:] or [0.0]
+    return (f"requests={len(metrics):<3} prompt tokens={sum(counts):<7} prompt_eval total={sum(seconds):7.3f}s "
+            f"first={seconds[0]:.3f}s rest mean={statistics.mean(rest):.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt layout / context reuse prompt_eval benchmark")
+    parser.add_argument("--corpus-dir", default=CORPUS_DIR)
+    parser.add_argument("--pr", default="medium-java", help="Corpus entry name")
+    parser.add_argument("--api-url", default=None, help="Real Ollama URL (default: prefix-caching stub)")
+    parser.add_argument("--prompt-eval-tps", type=float, default=2000.0, help="Stub prompt evaluation tokens/sec")
+    parser.add_argument("--num-ctx", type=int, default=32768)
+    parser.add_argument("--num-predict", type=int, default=1024)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="INFO" if args.verbose else "WARNING")
+
+    corpus = load_corpus(args.corpus_dir, [args.pr])
+    if not corpus:
+        raise SystemExit(f"No corpus entry named {args.pr} in {args.corpus_dir}")
+    pr = corpus[0]
+
+    github = StubGitHub(corpus).start()
+    os.environ["GITHUB_API_URL"] = github.url
+    os.environ.pop("GITHUB_TOKEN", None)
+    try:
+        from pr_extractor import PRExtractor
+        pr_data = PRExtractor(pr["repo"], pr["number"]).extract_pr_data(
+            fetch_missing_patches=False, base_sha=pr["base_sha"], head_sha=pr["head_sha"]
+        )
+    finally:
+        github.stop()
+
+    print(f"{pr['name']}: {len(pr['files'])} files, {len(pr_data)} chars")
+    for mode, options in MODES.items():
+        ollama = None
+        api_url = args.api_url
+        if api_url is None:
+            # 모드마다 새 stub을 띄워 빈 캐시에서 시작합니다.
+            ollama = StubOllama(latency=0.0, output_tokens=40, tokens_per_second=4000,
+                                prompt_eval_tps=args.prompt_eval_tps).start()
+            api_url = ollama.url
+        try:
+            metrics = run_mode(pr_data, api_url, options, args)
+        finally:
+            if ollama:
+                ollama.stop()
+        print(f"{mode:<22} {describe(metrics)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""실제 PR을 벤치마크 코퍼스(benchmark/corpus/<name>.json)로 기록합니다.
+
+GitHub API에서 PR 메타데이터와 파일 목록(patch 포함)을 받아 StubGitHub가 응답할 수 있는 형식으로 저장합니다.
+
+    cd src && GITHUB_TOKEN=... python -m benchmark.record_corpus --repo owner/repo --pr-number 123 --name my-pr
+"""
+import argparse
+import json
+import os
+
+from github import Github
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+
+def record(repo: str, pr_number: int, name: str) -> dict:
+    github = Github(os.getenv("GITHUB_TOKEN"), base_url=os.getenv("GITHUB_API_URL", "https://api.github.com"))
+    pull = github.get_repo(repo).get_pull(pr_number)
+    files = []
+    for file in pull.get_files():
+        entry = {
+            "filename": file.filename,
+            "status": file.status,
+            "additions": file.additions,
+            "deletions": file.deletions,
+            "changes": file.changes,
+        }
+        if file.patch:
+            entry["patch"] = file.patch
+        if file.previous_filename:
+            entry["previous_filename"] = file.previous_filename
+        files.append(entry)
+
+    return {
+        "name": name,
+        # 코퍼스는 stub 저장소 이름으로 통일합니다.
+        "repo": "bench/service",
+        "number": pr_number,
+        "title": pull.title,
+        "body": pull.body or "",
+        "base_sha": pull.base.sha,
+        "head_sha": pull.head.sha,
+        "files": files,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record a GitHub PR into the benchmark corpus")
+    parser.add_argument("--repo", required=True, help="Repository (owner/repo)")
+    parser.add_argument("--pr-number", type=int, required=True, help="PR number")
+    parser.add_argument("--name", required=True, help="Corpus entry name")
+    args = parser.parse_args()
+
+    data = record(args.repo, args.pr_number, args.name)
+    path = os.path.join(CORPUS_DIR, f"{args.name}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    print(f"{path}: {len(data['files'])} files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""규칙 인덱스 백엔드(ChromaDB vs NumPy) 열기 시간과 쿼리 지연 비교.
+
+ChromaDB 컬렉션의 임베딩을 그대로 NumPy 인덱스로 옮긴 뒤, 같은 쿼리 벡터로 두 백엔드를 측정합니다.
+
+    cd src && python -m benchmark.rule_index_benchmark --chroma-db-path ../chroma_db --collection java_style_rules
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+
+def _open_chroma(path: str, collection_name: str):
+    import chromadb
+    client = chromadb.PersistentClient(path=path, settings=chromadb.Settings(anonymized_telemetry=False))
+    return client.get_collection(collection_name)
+
+
+def _open_numpy(path: str, collection_name: str):
+    from rule_index import NumpyRuleIndex
+    return NumpyRuleIndex(path).get_collection(collection_name)
+
+
+def _timed(fn, *args):
+    started_at = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - started_at) * 1000
+
+
+def _query_latency(collection, queries: np.ndarray, batch: int, repeat: int) -> float:
+    latencies = []
+    for _ in range(repeat):
+        for start in range(0, len(queries), batch):
+            _, elapsed = _timed(
+                lambda q: collection.query(query_embeddings=q.tolist(), n_results=10,
+                                           include=["documents", "metadatas", "distances"]),
+                queries[start:start + batch]
+            )
+            latencies.append(elapsed)
+    return statistics.median(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rule index backend benchmark")
+    parser.add_argument("--chroma-db-path", default="../chroma_db", help="ChromaDB persistent directory")
+    parser.add_argument("--collection", default="java_style_rules", help="Collection to benchmark")
+    parser.add_argument("--queries", type=int, default=32, help="Number of random query vectors")
+    parser.add_argument("--repeat", type=int, default=5, help="Query repetitions")
+    args = parser.parse_args()
+
+    chroma_collection, chroma_open_ms = _timed(_open_chroma, args.chroma_db_path, args.collection)
+    snapshot = chroma_collection.get(include=["embeddings", "documents", "metadatas"])
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        from rule_index import NumpyRuleIndex
+        NumpyRuleIndex(index_dir).get_or_create_collection(args.collection).upsert(
+            ids=snapshot["ids"],
+            embeddings=snapshot["embeddings"],
+            documents=snapshot["documents"],
+            metadatas=snapshot["metadatas"]
+        )
+        numpy_collection, numpy_open_ms = _timed(_open_numpy, index_dir, args.collection)
+
+        dimension = len(snapshot["embeddings"][0])
+        queries = np.random.default_rng(0).standard_normal((args.queries, dimension)).astype(np.float32)
+
+        print(f"rules={len(snapshot['ids'])} dim={dimension}")
+        print(f"open    chroma={chroma_open_ms:8.2f}ms numpy={numpy_open_ms:8.2f}ms")
+        for batch in (1, args.queries):
+            chroma_ms = _query_latency(chroma_collection, queries, batch, args.repeat)
+            numpy_ms = _query_latency(numpy_collection, queries, batch, args.repeat)
+            print(f"query batch={batch:<3} chroma={chroma_ms:8.3f}ms numpy={numpy_ms:8.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
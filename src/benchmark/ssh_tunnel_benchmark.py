@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""SSH 터널 준비 시간과 재연결 벤치마크.
+
+기본은 sshd 없이 benchmark/loopback_ssh.py 포워더를 ssh 대신 실행하여 stub Ollama로 포워딩합니다.
+  - legacy: 이전 방식처럼 1초 간격으로 포트를 확인 (포워더 시작 후 첫 확인까지 최소 1초)
+  - managed: SSHTunnel의 지수 backoff 준비 확인
+  - reconnect: 리뷰 도중 터널 프로세스를 종료한 뒤 CodeLlamaReviewer._generate가 재연결하고 성공하는지 확인
+
+    cd src && python -m benchmark.ssh_tunnel_benchmark --handshake 0.3 --runs 5
+
+--ssh-host/--ssh-user를 주면 실제 ssh로 원격(또는 로컬 sshd)의 Ollama 포트에 연결합니다.
+--control-path를 함께 주면 첫 실행(master 생성)과 이후 실행(master 재사용)의 준비 시간을 비교합니다.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from loguru import logger
+
+from benchmark.stubs import StubOllama
+from ssh_tunnel import SSHTunnel, find_available_port, is_port_open
+
+LOOPBACK_SSH = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "loopback_ssh.py")]
+
+
+def legacy_ready_seconds(remote_port: int, handshake: float) -> float:
+    """이전 _setup_ssh_tunnel의 1초 polling 루프로 준비될 때까지 걸린 시간."""
+    local_port = find_available_port()
+    started_at = time.perf_counter()
+    process = subprocess.Popen(LOOPBACK_SSH + ["--handshake", str(handshake), "-N", "-L",
+                                               f"{local_port}:127.0.0.1:{remote_port}", "bench@localhost"])
+    try:
+        for _ in range(30):
+            if is_port_open(local_port, timeout=5):
+                return time.perf_counter() - started_at
+            time.sleep(1)
+        raise Exception("legacy tunnel did not become ready")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def managed_ready_seconds(tunnel: SSHTunnel) -> float:
+    started_at = time.perf_counter()
+    tunnel.start()
+    elapsed = time.perf_counter() - started_at
+    tunnel.stop()
+    return elapsed
+
+
+def reconnect_check(tunnel: SSHTunnel, ollama_url: str) -> float:
+    """터널을 끊은 뒤 리뷰 요청이 재연결 후 성공하는 데 걸린 시간."""
+    from codellama_reviewer import CodeLlamaReviewer, DEFAULT_MODEL
+
+    reviewer = CodeLlamaReviewer(api_url=ollama_url, rule_index_backend="numpy", connect=False)
+    reviewer.ssh_tunnel = tunnel
+    reviewer.api_url = tunnel.start()
+    reviewer.endpoint_pool = reviewer._create_endpoint_pool([reviewer.api_url])
+    try:
+        reviewer._generate("warm-up", DEFAULT_MODEL)
+        tunnel.process.kill()
+        tunnel.process.wait()
+
+        started_at = time.perf_counter()
+        response = reviewer._generate("after drop", DEFAULT_MODEL)
+        elapsed = time.perf_counter() - started_at
+        if not response or tunnel.reconnects != 1:
+            raise Exception(f"reconnect failed (reconnects={tunnel.reconnects})")
+        return elapsed
+    finally:
+        reviewer.close()
+
+
+def describe(values):
+    return f"mean={statistics.mean(values):.3f}s min={min(values):.3f}s max={max(values):.3f}s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SSH tunnel readiness and reconnect benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--handshake", type=float, default=0.3, help="Simulated SSH handshake (loopback mode)")
+    parser.add_argument("--ssh-host", default=None, help="Use real ssh to this host instead of the loopback forwarder")
+    parser.add_argument("--ssh-user", default=os.getenv("USER", "root"))
+    parser.add_argument("--ssh-port", default="22")
+    parser.add_argument("--remote-port", type=int, default=11434, help="Ollama port on the SSH host")
+    parser.add_argument("--control-path", default=None, help="ControlMaster socket path to reuse between runs")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="INFO" if args.verbose else "WARNING")
+
+    if args.ssh_host:
+        tunnel = SSHTunnel(args.ssh_host, args.ssh_user, port=args.ssh_port, remote_port=args.remote_port,
+                           control_path=args.control_path)
+        timings = [managed_ready_seconds(tunnel) for _ in range(args.runs)]
+        print(f"ssh {args.ssh_user}@{args.ssh_host} first={timings[0]:.3f}s")
+        if len(timings) > 1:
+            print(f"ssh subsequent runs {describe(timings[1:])}"
+                  + (" (ControlMaster reuse)" if args.control_path else ""))
+        return
+
+    ollama = StubOllama(latency=0.0, output_tokens=4).start()
+    remote_port = ollama.server.server_port
+    try:
+        def loopback_tunnel():
+            return SSHTunnel("localhost", "bench", remote_host="127.0.0.1", remote_port=remote_port,
+                             ssh_command=LOOPBACK_SSH + ["--handshake", str(args.handshake)])
+
+        legacy = [legacy_ready_seconds(remote_port, args.handshake) for _ in range(args.runs)]
+        managed = [managed_ready_seconds(loopback_tunnel()) for _ in range(args.runs)]
+        reconnect = [reconnect_check(loopback_tunnel(), ollama.url) for _ in range(args.runs)]
+    finally:
+        ollama.stop()
+
+    print(f"handshake={args.handshake}s, {args.runs} runs")
+    print(f"legacy readiness (1s polling)   {describe(legacy)}")
+    print(f"managed readiness (backoff)     {describe(managed)}")
+    print(f"reconnect + request after drop  {describe(reconnect)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""CodeLlamaReviewer 콜드 스타트 시간 측정.
+
+각 모드를 새 파이썬 프로세스에서 실행하여 import 캐시 영향 없이 비교합니다.
+  - deferred: 모듈 import + CodeLlamaReviewer 생성 (임베딩 모델/ChromaDB 로드 지연)
+  - eager:    deferred + warm_up() (이전 동작과 같이 시작 시점에 모두 로드)
+
+    cd src && python -m benchmark.startup_benchmark --api-url http://localhost:11434
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+_PROBE = """
+import json, sys, time
+started_at = time.perf_counter()
+from codellama_reviewer import CodeLlamaReviewer
+imported_at = time.perf_counter()
+reviewer = CodeLlamaReviewer(api_url=sys.argv[1])
+constructed_at = time.perf_counter()
+if sys.argv[2] == "eager":
+    reviewer.warm_up()
+ready_at = time.perf_counter()
+print(json.dumps({
+    "import": imported_at - started_at,
+    "construct": constructed_at - imported_at,
+    "warm_up": ready_at - constructed_at,
+    "total": ready_at - started_at,
+}))
+"""
+
+
+def _run(mode: str, api_url: str) -> dict:
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE, api_url, mode],
+        cwd=src_dir,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CodeLlamaReviewer cold-start benchmark")
+    parser.add_argument("--api-url", default="http://localhost:11434", help="Ollama API URL")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per mode")
+    args = parser.parse_args()
+
+    for mode in ("deferred", "eager"):
+        runs = [_run(mode, args.api_url) for _ in range(args.runs)]
+        best = min(runs, key=lambda run: run["total"])
+        print(f"{mode:<9} " + " ".join(f"{name}={value:.2f}s" for name, value in best.items()))
+
+
+if __name__ == "__main__":
+    main()
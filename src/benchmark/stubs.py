@@ -0,0 +1,413 @@
+"""벤치마크용 로컬 stub 서버.
+
+  - StubOllama: /api/tags, /api/generate (stream / non-stream). 요청당 고정 지연과 tokens/sec로 생성 시간을 흉내 냅니다.
+  - StubGitHub: PRExtractor와 GitHubCommenter가 사용하는 REST 엔드포인트를 기록된 PR 코퍼스로 응답합니다.
+
+두 서버 모두 경로별 요청 수를 세므로 벤치마크에서 외부 호출 횟수를 비교할 수 있습니다.
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+STUB_REVIEW_TEXT = """### 🟨 Medium
+- **변수명**: 의미가 드러나지 않는 이름이 사용되었습니다. 역할이 드러나는 이름으로 변경하세요.
+
+### 🟩 Low
+- **로그**: 예외 처리 분기에 로그를 추가하면 장애 분석이 쉬워집니다.
+"""
+
+
+def stub_findings(prompt: str) -> str:
+    """structured output(format) 요청에 대한 응답: 프롬프트의 파일마다 첫 번째 추가 줄에 finding 하나."""
+    findings = []
+    for match in re.finditer(r"^=== File: (.*?) ===$(.*?)(?=^=== File: |\Z)", prompt, re.MULTILINE | re.DOTALL):
+        line = None
+        for diff_line in match.group(2).splitlines():
+            hunk = re.match(r"^@@ -\d+(?:,\d+)? \+(\d+)", diff_line)
+            if hunk:
+                line = int(hunk.group(1))
+            elif line is not None and diff_line.startswith("+"):
+                break
+            elif line is not None and not diff_line.startswith("-"):
+                line += 1
+        if line is not None:
+            findings.append({
+                "file": match.group(1), "line": line, "severity": "medium", "rule_type": "Convention",
+                "confidence": 3, "title": "변수명", "explanation": "의미가 드러나지 않는 이름이 사용되었습니다.",
+                "suggestion": "역할이 드러나는 이름으로 변경하세요.",
+            })
+    return json.dumps({"summary": ["stub 리뷰"], "difficulty": 2, "keywords": ["naming"], "findings": findings},
+                      ensure_ascii=False)
+
+
+class _StubServer:
+    """ThreadingHTTPServer를 백그라운드 스레드에서 실행하고 경로별 요청 수를 기록합니다."""
+
+    def __init__(self, handler_class):
+        self.requests = Counter()
+        self._lock = threading.Lock()
+        handler_class.stub = self
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+        # 작은 응답이 Nagle + delayed ACK에 걸려 지연되지 않도록 합니다.
+        self.server.disable_nagle_algorithm = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.requests[key] += 1
+
+    def reset_counts(self) -> Dict[str, int]:
+        with self._lock:
+            counts = dict(self.requests)
+            self.requests.clear()
+        return counts
+
+
+class _JsonHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    stub: Any = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json",
+              headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), headers=headers)
+
+
+class StubOllama(_StubServer):
+    """생성 시간 = latency + output_tokens / tokens_per_second 인 stub Ollama.
+
+    parallel은 동시에 생성할 수 있는 요청 수(OLLAMA_NUM_PARALLEL)입니다.
+    prompt_eval_tps를 주면 llama.cpp의 슬롯별 prompt cache를 흉내 냅니다. 슬롯에 남은 직전 요청
+    (context + system + prompt + 응답)과 겹치는 prefix는 건너뛰고 나머지만 prompt_eval_tps로 평가하며,
+    응답에 context를 돌려줍니다. 토큰은 4글자로 계산합니다.
+    fail_status를 주면 generate 요청에 그 상태 코드로 실패하고, tags_delay만큼 /api/tags 응답을 늦춥니다.
+    """
+
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self, latency: float = 0.2, tokens_per_second: float = 200.0, output_tokens: int = 120,
+                 parallel: int = 1, models: Optional[List[str]] = None, response_text: str = STUB_REVIEW_TEXT,
+                 prompt_eval_tps: Optional[float] = None, fail_status: Optional[int] = None,
+                 tags_delay: float = 0.0):
+        self.latency = latency
+        self.fail_status = fail_status
+        self.tags_delay = tags_delay
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.models = models or ["qwen2.5-coder:32b-instruct"]
+        self.response_text = response_text
+        self.prompt_eval_tps = prompt_eval_tps
+        self.slots = threading.Semaphore(max(1, parallel))
+        self.slots_count = max(1, parallel)
+        self._cached_texts: List[str] = []
+        self._contexts: Dict[int, str] = {}
+        self._cache_lock = threading.Lock()
+        super().__init__(type("StubOllamaHandler", (_OllamaHandler,), {}))
+
+    def evaluate_prompt(self, request: Dict[str, Any]) -> Tuple[str, int]:
+        """평가할 전체 텍스트와, 슬롯 캐시에서 재사용하지 못해 새로 평가할 토큰 수를 반환합니다."""
+        context = request.get("context")
+        text = (self._contexts.get(context[0], "") if context else "") + (request.get("system") or "") + request["prompt"]
+        with self._cache_lock:
+            best, reused = None, 0
+            for cached in self._cached_texts:
+                common = len(os.path.commonprefix([cached, text]))
+                if common > reused:
+                    best, reused = cached, common
+            if best is not None:
+                self._cached_texts.remove(best)
+        return text, max(1, (len(text) - reused) // self.CHARS_PER_TOKEN)
+
+    def finish_prompt(self, text: str, parallel: int) -> List[int]:
+        """생성이 끝난 슬롯 내용을 캐시에 남기고 Ollama처럼 context(토큰 배열)를 반환합니다."""
+        with self._cache_lock:
+            self._cached_texts = (self._cached_texts + [text])[-parallel:]
+            context_id = len(self._contexts)
+            self._contexts[context_id] = text
+        return [context_id] + [0] * (len(text) // self.CHARS_PER_TOKEN - 1)
+
+
+class _OllamaHandler(_JsonHandler):
+    def do_GET(self):
+        self.stub.count(f"GET {self.path}")
+        if self.path == "/api/tags":
+            time.sleep(self.stub.tags_delay)
+            self._send_json(200, {"models": [{"name": name, "size": 0} for name in self.stub.models]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        self.stub.count(f"POST {self.path}")
+        if self.path != "/api/generate":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        request = self._read_json()
+        stub = self.stub
+        if stub.fail_status:
+            self._send_json(stub.fail_status, {"error": "stub failure"})
+            return
+        if not request.get("prompt"):
+            # 모델 preload 요청
+            self._send_json(200, {"model": request.get("model"), "done": True, "load_duration": 0})
+            return
+
+        eval_duration = stub.output_tokens / stub.tokens_per_second
+        response_text = stub_findings(request["prompt"]) if request.get("format") else stub.response_text
+        with stub.slots:
+            started_at = time.perf_counter()
+            prompt_eval_duration = stub.latency
+            if stub.prompt_eval_tps:
+                evaluated, prompt_eval_count = stub.evaluate_prompt(request)
+                prompt_eval_duration += prompt_eval_count / stub.prompt_eval_tps
+            else:
+                prompt_eval_count = len(request["prompt"]) // stub.CHARS_PER_TOKEN
+            time.sleep(prompt_eval_duration)
+            final = {
+                "model": request.get("model"),
+                "done": True,
+                "prompt_eval_count": prompt_eval_count,
+                "prompt_eval_duration": int(prompt_eval_duration * 1e9),
+                "eval_count": stub.output_tokens,
+                "eval_duration": int(eval_duration * 1e9),
+                "load_duration": 0,
+            }
+            if stub.prompt_eval_tps:
+                final["context"] = stub.finish_prompt(evaluated + response_text, stub.slots_count)
+
+            if not request.get("stream", True):
+                time.sleep(eval_duration)
+                final["response"] = response_text
+                final["total_duration"] = int((time.perf_counter() - started_at) * 1e9)
+                self._send_json(200, final)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            chunks = re.findall(r"\S+\s*", response_text)
+            for chunk in chunks:
+                time.sleep(eval_duration / len(chunks))
+                self._write_chunk({"model": request.get("model"), "response": chunk, "done": False})
+            final["response"] = ""
+            final["total_duration"] = int((time.perf_counter() - started_at) * 1e9)
+            self._write_chunk(final)
+            self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, payload: Dict[str, Any]) -> None:
+        line = json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n"
+        self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+        self.wfile.flush()
+
+
+class StubGitHub(_StubServer):
+    """기록된 PR 코퍼스(benchmark/corpus/*.json)로 GitHub REST API를 흉내 냅니다."""
+
+    def __init__(self, prs: List[Dict[str, Any]], bot_login: str = "review-bot"):
+        self.prs = {(pr["repo"], int(pr["number"])): pr for pr in prs}
+        self.bot_login = bot_login
+        self.comments: Dict[int, Dict[str, Any]] = {}
+        self.reviews: List[Dict[str, Any]] = []
+        self._next_comment_id = 1
+        super().__init__(type("StubGitHubHandler", (_GitHubHandler,), {}))
+
+    def add_comment(self, repo: str, number: int, body: str) -> Dict[str, Any]:
+        with self._lock:
+            comment_id = self._next_comment_id
+            self._next_comment_id += 1
+            self.comments[comment_id] = {"repo": repo, "number": number, "body": body}
+        return self.comment_json(comment_id)
+
+    def comment_json(self, comment_id: int) -> Dict[str, Any]:
+        comment = self.comments[comment_id]
+        return {
+            "id": comment_id,
+            "body": comment["body"],
+            "url": f"{self.url}/repos/{comment['repo']}/issues/comments/{comment_id}",
+            "user": {"login": self.bot_login},
+        }
+
+    def reset_comments(self) -> None:
+        with self._lock:
+            self.comments.clear()
+            self.reviews.clear()
+
+
+def unified_diff(pr: Dict[str, Any]) -> str:
+    """코퍼스 PR의 파일 patch들을 `git diff` 형식의 전체 diff로 조립합니다."""
+    parts = []
+    for file in pr["files"]:
+        old_name = file.get("previous_filename") or file["filename"]
+        parts.append(f"diff --git a/{old_name} b/{file['filename']}\n")
+        if file["status"] == "added":
+            parts.append("new file mode 100644\n")
+        elif file["status"] == "removed":
+            parts.append("deleted file mode 100644\n")
+        elif file["status"] == "renamed":
+            parts.append(f"rename from {old_name}\nrename to {file['filename']}\n")
+        if file.get("patch"):
+            old_path = "/dev/null" if file["status"] == "added" else f"a/{old_name}"
+            new_path = "/dev/null" if file["status"] == "removed" else f"b/{file['filename']}"
+            parts.append(f"--- {old_path}\n+++ {new_path}\n{file['patch']}\n")
+    return "".join(parts)
+
+
+class _GitHubHandler(_JsonHandler):
+    REPO_PATH = re.compile(r"^/repos/([^/]+/[^/]+)(/.*)?$")
+
+    def _route(self, method: str):
+        parsed = urlparse(self.path)
+        self.query = parse_qs(parsed.query)
+        stub = self.stub
+
+        if parsed.path == "/user":
+            stub.count(f"{method} /user")
+            return self._send_json(200, {"login": stub.bot_login, "url": f"{stub.url}/user"})
+
+        match = self.REPO_PATH.match(parsed.path)
+        if not match:
+            stub.count(f"{method} {parsed.path}")
+            return self._send_json(404, {"message": "Not Found"})
+        repo, rest = match.group(1), match.group(2) or ""
+        # 요청 수는 PR 번호/SHA를 뺀 경로 패턴으로 셉니다.
+        stub.count(f"{method} /repos/:repo" + re.sub(r"/(\d+|[0-9a-f]+\.\.\.[0-9a-f]+)(?=/|$)", "/:id", rest))
+
+        if method == "GET" and rest == "":
+            return self._send_json(200, {
+                "id": 1, "name": repo.split("/")[1], "full_name": repo,
+                "url": f"{stub.url}/repos/{repo}", "owner": {"login": repo.split("/")[0]},
+            })
+
+        pull = re.match(r"^/pulls/(\d+)(/files)?$", rest)
+        if method == "GET" and pull:
+            pr = stub.prs.get((repo, int(pull.group(1))))
+            if pr is None:
+                return self._send_json(404, {"message": "Not Found"})
+            if pull.group(2):
+                return self._send_files(repo, pr)
+            if "diff" in self.headers.get("Accept", ""):
+                return self._send(200, unified_diff(pr).encode("utf-8"), "text/plain; charset=utf-8")
+            return self._send_json(200, self._pull_json(repo, pr))
+
+        compare = re.match(r"^/compare/([0-9a-f]+)\.\.\.([0-9a-f]+)$", rest)
+        if method == "GET" and compare:
+            for (pr_repo, _), pr in stub.prs.items():
+                if pr_repo == repo and pr["head_sha"] == compare.group(2):
+                    if "diff" in self.headers.get("Accept", ""):
+                        return self._send(200, unified_diff(pr).encode("utf-8"), "text/plain; charset=utf-8")
+                    return self._send_json(200, self._compare_json(repo, pr))
+            return self._send_json(404, {"message": "Not Found"})
+
+        issue_comments = re.match(r"^/issues/(\d+)/comments$", rest)
+        if issue_comments:
+            number = int(issue_comments.group(1))
+            if method == "POST":
+                return self._send_json(201, stub.add_comment(repo, number, self._read_json()["body"]))
+            comments = [stub.comment_json(comment_id) for comment_id, comment in stub.comments.items()
+                        if comment["repo"] == repo and comment["number"] == number]
+            return self._send_json(200, comments)
+
+        commit = re.match(r"^/commits/([0-9a-f]+)$", rest)
+        if method == "GET" and commit:
+            return self._send_json(200, {"sha": commit.group(1), "url": f"{stub.url}/repos/{repo}{rest}"})
+
+        review_comments = re.match(r"^/pulls/(\d+)/comments$", rest)
+        if method == "GET" and review_comments:
+            number = int(review_comments.group(1))
+            comments = [
+                {"id": review_id * 1000 + index, "path": comment["path"], "position": comment["position"],
+                 "body": comment["body"], "commit_id": review.get("commit_id"), "user": {"login": stub.bot_login}}
+                for review_id, review in enumerate(stub.reviews, start=1)
+                if review["repo"] == repo and review["number"] == number
+                for index, comment in enumerate(review.get("comments", []))
+            ]
+            return self._send_json(200, comments)
+
+        reviews = re.match(r"^/pulls/(\d+)/reviews$", rest)
+        if method == "POST" and reviews:
+            review = dict(self._read_json(), repo=repo, number=int(reviews.group(1)))
+            with stub._lock:
+                stub.reviews.append(review)
+                review_id = len(stub.reviews)
+            return self._send_json(200, {"id": review_id, "body": review.get("body"), "state": "COMMENTED",
+                                         "commit_id": review.get("commit_id"), "user": {"login": stub.bot_login}})
+
+        comment = re.match(r"^/issues/comments/(\d+)$", rest)
+        if method == "PATCH" and comment and int(comment.group(1)) in stub.comments:
+            comment_id = int(comment.group(1))
+            stub.comments[comment_id]["body"] = self._read_json()["body"]
+            return self._send_json(200, stub.comment_json(comment_id))
+
+        return self._send_json(404, {"message": "Not Found"})
+
+    def _pull_json(self, repo: str, pr: Dict[str, Any]) -> Dict[str, Any]:
+        base = f"{self.stub.url}/repos/{repo}"
+        return {
+            "id": int(pr["number"]), "number": int(pr["number"]), "state": "open",
+            "title": pr["title"], "body": pr.get("body", ""),
+            "url": f"{base}/pulls/{pr['number']}",
+            "issue_url": f"{base}/issues/{pr['number']}",
+            "head": {"sha": pr["head_sha"], "ref": "feature"},
+            "base": {"sha": pr["base_sha"], "ref": "main"},
+        }
+
+    def _compare_json(self, repo: str, pr: Dict[str, Any]) -> Dict[str, Any]:
+        base = f"{self.stub.url}/repos/{repo}"
+        return {
+            "status": "ahead", "ahead_by": 1, "behind_by": 0, "total_commits": 1,
+            "url": f"{base}/compare/{pr['base_sha']}...{pr['head_sha']}",
+            "base_commit": {"sha": pr["base_sha"], "url": f"{base}/commits/{pr['base_sha']}"},
+            "merge_base_commit": {"sha": pr["base_sha"], "url": f"{base}/commits/{pr['base_sha']}"},
+            "commits": [], "files": pr["files"],
+        }
+
+    def _send_files(self, repo: str, pr: Dict[str, Any]) -> None:
+        per_page = int(self.query.get("per_page", ["30"])[0])
+        page = int(self.query.get("page", ["1"])[0])
+        files = pr["files"][(page - 1) * per_page:page * per_page]
+        headers = {}
+        if page * per_page < len(pr["files"]):
+            next_url = f"{self.stub.url}/repos/{repo}/pulls/{pr['number']}/files?per_page={per_page}&page={page + 1}"
+            headers["Link"] = f'<{next_url}>; rel="next"'
+        payload = [{"sha": "0" * 40, **file} for file in files]
+        self._send_json(200, payload, headers=headers)
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_PATCH(self):
+        self._route("PATCH")
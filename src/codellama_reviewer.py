@@ -1,65 +1,288 @@
 import requests
 import json
 from loguru import logger
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator, Callable, Set, Tuple
 import os
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 import re
 import subprocess
-import atexit
-import signal
-import socket
-import psutil
-from prompt.xmlStyle import template
-from sentence_transformers import SentenceTransformer
-import chromadb
+from urllib3.exceptions import ReadTimeoutError
+from prompt.xmlStyle import PROMPT_LAYOUTS, STRUCTURED_PROMPT_LAYOUTS, continuation_template
+from http_client import create_http_session
+from response_cache import ResponseCache
+from review_formatter import REVIEW_ERROR_MESSAGE, ReviewFormatter
+from review_findings import REVIEW_FINDINGS_SCHEMA, ReviewFindings, parse_findings
+from embedding_cache import EmbeddingCache
+from prompt_packer import PromptPacker, TokenCounter
+from ollama_pool import OllamaEndpointPool
+from ssh_tunnel import SSHTunnel, find_available_port
+import review_metrics
+from log_config import payload
+import contextvars
+import threading
+from collections import deque
+
+
+DEFAULT_MODEL = "qwen2.5-coder:32b-instruct"
+EMBEDDING_MODEL_NAME = "microsoft/codebert-base"
+# 컨벤션 검색(임베딩 모델 + 규칙 인덱스)이 필요한 파일 확장자
+CONVENTION_FILE_EXTENSIONS = (".java", ".swift")
+# 상주 서버에서 리뷰어를 계속 재사용해도 생성 지표 기록이 무한히 늘지 않도록 최근 기록만 유지합니다.
+GENERATION_METRICS_HISTORY = 1000
+
+# review_code 호출 하나가 만든 생성 지표 (worker 스레드는 복사된 컨텍스트로 같은 목록에 기록)
+_review_generations: contextvars.ContextVar[Optional[List[Dict[str, Any]]]] = contextvars.ContextVar(
+    "review_generations", default=None
+)
+
+SYSTEM_PROMPT = """
+    You are a senior developer proficient in iOS and backend.
+
+    - Always generate your review **in Korean only**, even if this prompt is written in English.
+    - Do **not copy** any example content from the <output-format> section. It is for structure only.
+    - The review must be based solely on the <diff> section.
+    - Detect all code issues first, then group them by severity level in the final output.
+            """
+
+
+class ContextChain:
+    """같은 PR의 순차 요청 사이에 Ollama가 반환한 context(토큰 배열)를 이어 줍니다.
+
+    context가 있으면 다음 요청은 지침 없이 변하는 부분(continuation_template)만 보내고,
+    Ollama는 context를 그대로 앞에 붙이므로 이전 요청의 KV cache를 재사용합니다.
+    컨텍스트 창을 넘을 것 같으면 끊고 전체 프롬프트로 다시 시작합니다.
+    context는 그 context를 만든 서버에서만 의미가 있으므로 endpoint_url에 고정합니다.
+    """
+
+    def __init__(self, token_budget: int, token_counter: TokenCounter):
+        self.token_budget = token_budget
+        self.token_counter = token_counter
+        self.tokens: Optional[List[int]] = None
+        self.endpoint_url: Optional[str] = None
+        self.resets = 0
 
+    @property
+    def pinned_url(self) -> Optional[str]:
+        return self.endpoint_url if self.tokens else None
+
+    def update(self, tokens: Optional[List[int]], endpoint_url: str) -> None:
+        self.tokens = tokens
+        self.endpoint_url = endpoint_url if tokens else None
+
+    def fits(self, text: str) -> bool:
+        return self.tokens is not None and len(self.tokens) + self.token_counter.count(text) <= self.token_budget
+
+    def reset(self) -> None:
+        if self.tokens is not None:
+            self.resets += 1
+        self.tokens = None
+        self.endpoint_url = None
 
 
 class CodeLlamaReviewer:
-    def __init__(self, api_url: str, chroma_db_path: str = "./chroma_db"):
+    def __init__(self, api_url: str, chroma_db_path: str = "./chroma_db", max_workers: int = 3,
+                 stream: bool = False, stream_inactivity_timeout: int = 60,
+                 on_chunk: Optional[Callable[[str], None]] = None,
+                 http_pool_connections: int = 4, http_pool_maxsize: Optional[int] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 embedding_cache_dir: Optional[str] = None, embedding_cache_max_entries: int = 10000,
+                 rule_index_backend: str = "chroma", rule_index_path: str = "./rule_index",
+                 prompt_packer: Optional[PromptPacker] = None,
+                 health_check_interval: float = 30.0, eject_seconds: float = 30.0,
+                 keep_alive: Optional[str] = None, generation_options: Optional[Dict[str, Any]] = None,
+                 preload: bool = False, prompt_layout: str = "diff-first", reuse_context: bool = False,
+                 structured_output: bool = False, min_confidence: int = 1, connect: bool = True):
         logger.info("=== CodeLlamaReviewer 초기화 시작 ===")
         logger.info(f"입력된 api_url: {api_url}")
 
-        self.original_api_url = api_url
-        self.api_url = api_url
-        self.ssh_process = None
+        # 쉼표로 구분된 여러 URL이 주어지면 엔드포인트 풀로 요청을 분산합니다.
+        self.api_urls = [url.strip() for url in api_url.split(",") if url.strip()]
+        self.original_api_url = self.api_urls[0]
+        self.api_url = self.api_urls[0]
+        self.ssh_tunnel: Optional[SSHTunnel] = None
         self.tunnel_port = 8080
-        self.max_workers = 3
+        self.max_workers = max(1, max_workers)
+
+        # 스트리밍 생성 설정
+        self.stream = stream
+        self.stream_inactivity_timeout = stream_inactivity_timeout
+        self.on_chunk = on_chunk
+        self.generation_metrics: deque = deque(maxlen=GENERATION_METRICS_HISTORY)
+
+        # 모델 상주 시간(keep_alive)과 생성 옵션(num_ctx, num_predict, temperature, stop 등)
+        self.keep_alive = keep_alive
+        self.generation_options = {k: v for k, v in (generation_options or {}).items() if v is not None}
+        self.preload = preload
+
+        # Ollama 요청에 공통으로 사용할 keep-alive 커넥션 풀 (기본 호스트당 크기는 max_workers)
+        self.session = create_http_session(
+            pool_connections=max(http_pool_connections, len(self.api_urls)),
+            pool_maxsize=http_pool_maxsize or self.max_workers
+        )
+        self.health_check_interval = health_check_interval
+        self.eject_seconds = eject_seconds
+        self.endpoint_pool = self._create_endpoint_pool(self.api_urls)
+
+        # LLM 응답 캐시 (None이면 사용하지 않음)
+        self.response_cache = response_cache
+
+        # 컨텍스트 예산 기반 프롬프트 패킹 (None이면 사용하지 않음)
+        self.prompt_packer = prompt_packer
+
+        # 프롬프트 배치 (diff-first 또는 prefix-stable)와 순차 요청 간 context 재사용 여부
+        if prompt_layout not in PROMPT_LAYOUTS:
+            raise ValueError(f"Unknown prompt layout: {prompt_layout}")
+        self.prompt_layout = prompt_layout
+        self.reuse_context = reuse_context
+
+        # structured_output이면 Ollama format에 findings JSON 스키마를 넣고 응답을 pydantic 모델로 검증합니다.
+        self.structured_output = structured_output
+        self.min_confidence = min_confidence
+        layouts = STRUCTURED_PROMPT_LAYOUTS if structured_output else PROMPT_LAYOUTS
+        self.prompt_template = layouts[prompt_layout]
         
         # CodingConventionVerifier 관련 초기화
-        self.model = SentenceTransformer("microsoft/codebert-base")
-        
-        # ChromaDB 초기화
-        logger.info("=== ChromaDB 초기화 시작 ===")
-        try:
-            # 클라이언트 생성
-            self.client = chromadb.PersistentClient(
-                path=chroma_db_path,
-                settings=chromadb.Settings(
-                    anonymized_telemetry=False,
-                    allow_reset=True
-                )
-            )
-            
-        except Exception as e:
-            logger.error(f"ChromaDB 초기화 실패: {str(e)}")
-            raise
+        # SentenceTransformer(torch)와 ChromaDB는 Java/Swift 컨벤션 검색에 처음 필요할 때 로드합니다.
+        self.chroma_db_path = chroma_db_path
+        self.rule_index_backend = rule_index_backend
+        self.rule_index_path = rule_index_path
+        self._model = None
+        self._client = None
+        self._model_lock = threading.Lock()
+        self._client_lock = threading.Lock()
+        self.startup_timings: Dict[str, float] = {}
+        self.embedding_cache = EmbeddingCache(EMBEDDING_MODEL_NAME, cache_dir=embedding_cache_dir,
+                                              max_entries=embedding_cache_max_entries)
+
+        # SSH 터널 설정과 Ollama 연결 확인 (connect=False이면 호출자가 connect()를 직접 호출)
+        if connect:
+            self.connect()
+
+        logger.info("=== CodeLlamaReviewer 초기화 완료 ===")
+
+    @property
+    def model(self):
+        """임베딩 모델 (첫 접근 시 로드)"""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    logger.info(f"=== 임베딩 모델 로드 시작: {EMBEDDING_MODEL_NAME} ===")
+                    started_at = time.perf_counter()
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+                    self.startup_timings['embedding_model'] = time.perf_counter() - started_at
+                    logger.info(f"임베딩 모델 로드 완료 ({self.startup_timings['embedding_model']:.2f}초)")
+        return self._model
+
+    @property
+    def client(self):
+        """규칙 인덱스 클라이언트 (첫 접근 시 로드, 기본은 ChromaDB)"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None and self.rule_index_backend == "numpy":
+                    started_at = time.perf_counter()
+                    from rule_index import NumpyRuleIndex
+                    self._client = NumpyRuleIndex(self.rule_index_path)
+                    self.startup_timings['rule_index'] = time.perf_counter() - started_at
+                    logger.info(f"NumPy 규칙 인덱스 열기 완료 ({self.startup_timings['rule_index']:.3f}초)")
+                elif self._client is None:
+                    logger.info("=== ChromaDB 초기화 시작 ===")
+                    started_at = time.perf_counter()
+                    try:
+                        import chromadb
+                        # 클라이언트 생성
+                        self._client = chromadb.PersistentClient(
+                            path=self.chroma_db_path,
+                            settings=chromadb.Settings(
+                                anonymized_telemetry=False,
+                                allow_reset=True
+                            )
+                        )
+                    except Exception as e:
+                        logger.error(f"ChromaDB 초기화 실패: {str(e)}")
+                        raise
+                    self.startup_timings['chromadb'] = time.perf_counter() - started_at
+                    logger.info(f"ChromaDB 초기화 완료 ({self.startup_timings['chromadb']:.2f}초)")
+        return self._client
+
+    def connect(self) -> None:
+        """필요하면 SSH 터널을 열고 Ollama API 서버 연결을 확인합니다."""
+        started_at = time.perf_counter()
 
         # 환경 변수 확인
         self._log_environment_variables()
 
-        # SSH 터널 설정 (필요한 경우만)
-        if self._should_use_ssh_tunnel():
-            self._setup_ssh_tunnel()
+        if len(self.api_urls) > 1:
+            # 여러 엔드포인트는 SSH 터널 없이 직접 연결하고, 하나 이상 정상이면 시작합니다.
+            healthy = self.endpoint_pool.check_health()
+            logger.info(f"Ollama 엔드포인트 {healthy}/{len(self.endpoint_pool)}개 정상")
+            if healthy == 0:
+                raise Exception("Ollama API 서버에 연결할 수 없습니다")
+            self.endpoint_pool.start_health_checks()
         else:
-            logger.info("SSH 터널링 불필요 - 직접 API 호출 사용")
+            # SSH 터널 설정 (필요한 경우만)
+            if self._should_use_ssh_tunnel():
+                self._setup_ssh_tunnel()
+                self.endpoint_pool = self._create_endpoint_pool([self.api_url])
+            else:
+                logger.info("SSH 터널링 불필요 - 직접 API 호출 사용")
 
-        # Ollama 연결 확인
-        self._check_ollama()
+            # Ollama 연결 확인
+            self._check_ollama()
+        self.startup_timings['connect'] = time.perf_counter() - started_at
 
-        logger.info("=== CodeLlamaReviewer 초기화 완료 ===")
+        if self.preload:
+            self.preload_model()
+
+    def preload_model(self, model: str = DEFAULT_MODEL) -> Dict[str, Optional[float]]:
+        """프롬프트 없이 /api/generate를 호출해 각 엔드포인트에 모델을 미리 올려 둡니다.
+
+        엔드포인트별로 Ollama가 반환한 load_duration(초)을 반환합니다. 실패해도 예외를 던지지 않습니다.
+        """
+        started_at = time.perf_counter()
+        request_data = {"model": model}
+        if self.keep_alive is not None:
+            request_data["keep_alive"] = self.keep_alive
+        if self.generation_options.get("num_ctx"):
+            # num_ctx가 바뀌면 Ollama가 모델을 다시 로드하므로 실제 요청과 같은 값으로 올립니다.
+            request_data["options"] = {"num_ctx": self.generation_options["num_ctx"]}
+
+        def load(endpoint):
+            try:
+                response = self.session.post(f"{endpoint.url}/api/generate", json=request_data, timeout=600)
+                response.raise_for_status()
+                load_duration = response.json().get('load_duration')
+                return endpoint.url, load_duration / 1e9 if load_duration else 0.0
+            except Exception as e:
+                logger.warning(f"[Preload] {endpoint.url} 모델 로드 실패: {str(e)}")
+                return endpoint.url, None
+
+        endpoints = [endpoint for endpoint in self.endpoint_pool.endpoints
+                     if endpoint.healthy and endpoint.has_model(model)]
+        with ThreadPoolExecutor(max_workers=max(1, len(endpoints))) as executor:
+            load_durations = dict(executor.map(load, endpoints))
+
+        self.startup_timings['model_preload'] = time.perf_counter() - started_at
+        logger.info(
+            f"[Preload] {model} 로드 완료 ({self.startup_timings['model_preload']:.2f}초, "
+            f"엔드포인트별 load_duration: {load_durations})"
+        )
+        return load_durations
+
+    def _create_endpoint_pool(self, urls: List[str]) -> OllamaEndpointPool:
+        return OllamaEndpointPool(
+            urls,
+            health_check_interval=self.health_check_interval,
+            eject_seconds=self.eject_seconds
+        )
+
+    def warm_up(self) -> Dict[str, float]:
+        """장기 실행 프로세스에서 임베딩 모델과 ChromaDB를 미리 로드합니다."""
+        _ = self.model
+        _ = self.client
+        logger.info(f"[Warm-up] 로드 시간: {self.startup_timings}")
+        return dict(self.startup_timings)
 
     def _log_environment_variables(self):
         """환경 변수 상태 로깅"""
@@ -92,245 +315,46 @@ class CodeLlamaReviewer:
         return not is_local and has_ssh_config
 
     def _setup_ssh_tunnel(self):
-        """SSH 터널을 설정합니다."""
-        logger.info("=== SSH 터널 설정 시작 ===")
+        """SSH 터널을 열고 api_url을 터널의 로컬 주소로 바꿉니다.
 
+        LLM_SERVER_CONTROL_PATH가 설정되어 있으면 ControlMaster 연결을 실행 간에 재사용합니다.
+        """
+        logger.info("=== SSH 터널 설정 시작 ===")
+        host = os.getenv('LLM_SERVER_HOST')
+        user = os.getenv('LLM_SERVER_USER')
+        port = os.getenv('LLM_SERVER_PORT', '22')
+        logger.info(f"SSH 연결 정보: {user}@{host}:{port}")
+
+        if not all([host, user]):
+            logger.error("SSH 연결에 필요한 환경 변수가 설정되지 않았습니다.")
+            raise ValueError("Missing required environment variables for SSH connection")
+
+        self.ssh_tunnel = SSHTunnel(
+            host,
+            user,
+            port=port,
+            local_port=find_available_port(range(self.tunnel_port, 8100)),
+            control_path=os.getenv('LLM_SERVER_CONTROL_PATH') or None,
+            control_persist=os.getenv('LLM_SERVER_CONTROL_PERSIST', '10m')
+        )
         try:
-            # 환경 변수 가져오기
-            host = os.getenv('LLM_SERVER_HOST')
-            user = os.getenv('LLM_SERVER_USER')
-            port = os.getenv('LLM_SERVER_PORT', '22')
-
-            logger.info(f"SSH 연결 정보: {user}@{host}:{port}")
-
-            if not all([host, user]):
-                logger.error("SSH 연결에 필요한 환경 변수가 설정되지 않았습니다.")
-                logger.error(f"LLM_SERVER_HOST: {host}")
-                logger.error(f"LLM_SERVER_USER: {user}")
-                raise ValueError("Missing required environment variables for SSH connection")
-
-            # SSH 연결 테스트 먼저 수행
-            if not self._test_ssh_connection(host, user, port):
-                raise Exception("SSH 연결 테스트 실패")
-
-            # SSH 터널 포트 사용 가능 여부 확인
-            if not self._is_port_available(self.tunnel_port):
-                logger.warning(f"포트 {self.tunnel_port}가 이미 사용 중입니다. 다른 포트를 찾는 중...")
-                self.tunnel_port = self._find_available_port()
-                logger.info(f"사용할 포트: {self.tunnel_port}")
-
-            # SSH 터널 명령어 구성
-            ssh_cmd = [
-                'ssh',
-                '-o', 'StrictHostKeyChecking=no',
-                '-o', 'UserKnownHostsFile=/dev/null',
-                '-o', 'ConnectTimeout=30',
-                '-o', 'ServerAliveInterval=60',
-                '-o', 'ServerAliveCountMax=3',
-                '-N',  # 원격 명령 실행 안함
-                '-f',  # 백그라운드 실행
-                '-L', f'{self.tunnel_port}:localhost:11434',  # 로컬 포트 포워딩
-                '-p', str(port),
-                f'{user}@{host}'
-            ]
-
-            logger.info(f"SSH 터널 명령어: {' '.join(ssh_cmd)}")
-
-            # SSH 터널 실행
-            logger.info("SSH 터널 프로세스 시작...")
-            result = subprocess.run(
-                ssh_cmd,
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
-
-            logger.info(f"SSH 터널 반환 코드: {result.returncode}")
-            if result.stdout:
-                logger.info(f"SSH stdout: {result.stdout}")
-            if result.stderr:
-                logger.info(f"SSH stderr: {result.stderr}")
-
-            if result.returncode != 0:
-                logger.error("SSH 터널 생성 실패")
-                raise Exception(f'SSH 터널 생성 실패: {result.stderr}')
-
-            # SSH 터널 프로세스 찾기 및 저장
-            self._find_and_store_ssh_process()
-
-            # 터널 연결 대기 및 확인
-            logger.info("SSH 터널 연결 대기 중...")
-            max_wait = 30
-            for i in range(max_wait):
-                if self._check_tunnel_connection():
-                    logger.info(f"SSH 터널 연결 성공! (대기 시간: {i + 1}초)")
-                    break
-                time.sleep(1)
-                if i % 5 == 4:  # 5초마다 로그
-                    logger.info(f"터널 연결 대기 중... ({i + 1}/{max_wait}초)")
-            else:
-                raise Exception('SSH 터널 연결 확인 실패 - 타임아웃')
-
-            # API URL을 터널 포인트로 변경
-            self.api_url = f"http://localhost:{self.tunnel_port}"
-            logger.info(f"API URL이 {self.api_url}로 변경되었습니다.")
-
-            # 프로세스 종료 시 SSH 터널도 종료되도록 설정
-            atexit.register(self._cleanup_ssh_tunnel)
-            signal.signal(signal.SIGTERM, self._cleanup_ssh_tunnel)
-
-            logger.info("SSH 터널이 성공적으로 설정되었습니다.")
-
+            self.api_url = self.ssh_tunnel.start()
         except subprocess.TimeoutExpired:
-            logger.error("SSH 터널 생성 타임아웃 (60초)")
+            logger.error("SSH 터널 생성 타임아웃")
             raise Exception('SSH 연결 타임아웃')
         except Exception as e:
             logger.error(f"SSH 터널 설정 중 오류 발생: {str(e)}")
-            self._cleanup_ssh_tunnel()
             raise Exception(f'SSH 연결 실패: {str(e)}')
-
-    def _test_ssh_connection(self, host: str, user: str, port: str) -> bool:
-        """SSH 연결 테스트"""
-        logger.info("=== SSH 연결 테스트 시작 ===")
-
-        try:
-            ssh_test_cmd = [
-                'ssh',
-                '-o', 'StrictHostKeyChecking=no',
-                '-o', 'UserKnownHostsFile=/dev/null',
-                '-o', 'ConnectTimeout=15',
-                '-o', 'BatchMode=yes',  # 인터랙티브 입력 방지
-                '-p', str(port),
-                f'{user}@{host}',
-                'echo "SSH 연결 테스트 성공"'
-            ]
-
-            logger.info(f"SSH 테스트 명령어: {' '.join(ssh_test_cmd)}")
-
-            result = subprocess.run(
-                ssh_test_cmd,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-
-            logger.info(f"SSH 테스트 반환 코드: {result.returncode}")
-            logger.info(f"SSH 테스트 stdout: {result.stdout}")
-            if result.stderr:
-                logger.warning(f"SSH 테스트 stderr: {result.stderr}")
-
-            if result.returncode == 0:
-                logger.info("SSH 연결 테스트 성공!")
-                return True
-            else:
-                logger.error("SSH 연결 테스트 실패")
-                return False
-
-        except subprocess.TimeoutExpired:
-            logger.error("SSH 연결 테스트 타임아웃")
-            return False
-        except Exception as e:
-            logger.error(f"SSH 연결 테스트 중 예외 발생: {str(e)}")
-            return False
-
-    def _is_port_available(self, port: int) -> bool:
-        """포트 사용 가능 여부 확인"""
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                result = sock.bind(('localhost', port))
-                return True
-        except OSError:
-            return False
-
-    def _find_available_port(self) -> int:
-        """사용 가능한 포트 찾기"""
-        for port in range(8080, 8100):
-            if self._is_port_available(port):
-                return port
-        raise Exception("사용 가능한 포트를 찾을 수 없습니다")
-
-    def _find_and_store_ssh_process(self):
-        """SSH 터널 프로세스 찾기 및 저장"""
-        try:
-            logger.info("SSH 터널 프로세스 검색 중...")
-
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-                try:
-                    cmdline = ' '.join(proc.info['cmdline'] or [])
-                    if ('ssh' in proc.info['name'].lower() and
-                            f'{self.tunnel_port}:localhost:11434' in cmdline and
-                            os.getenv('LLM_SERVER_HOST') in cmdline):
-                        self.ssh_process = proc
-                        logger.info(f"SSH 터널 프로세스 발견: PID {proc.info['pid']}")
-                        logger.info(f"명령어: {cmdline}")
-                        break
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
-
-            if not self.ssh_process:
-                logger.warning("SSH 터널 프로세스를 찾을 수 없습니다")
-
-        except Exception as e:
-            logger.warning(f"SSH 프로세스 검색 중 오류: {str(e)}")
-
-    def _check_tunnel_connection(self) -> bool:
-        """터널 연결 상태 확인"""
-        try:
-            logger.debug(f"터널 연결 확인: localhost:{self.tunnel_port}")
-
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                sock.settimeout(3)
-                result = sock.connect_ex(('localhost', self.tunnel_port))
-
-                if result == 0:
-                    logger.debug("터널 포트 연결 성공")
-                    return True
-                else:
-                    logger.debug(f"터널 포트 연결 실패: {result}")
-                    return False
-
-        except Exception as e:
-            logger.debug(f"터널 연결 확인 중 예외: {str(e)}")
-            return False
+        self.tunnel_port = self.ssh_tunnel.local_port
+        logger.info(f"API URL 변경: {self.api_url}")
 
     def _cleanup_ssh_tunnel(self, *args):
-        """SSH 터널을 정리합니다."""
-        logger.info("=== SSH 터널 정리 시작 ===")
-
+        """SSH 터널을 정리합니다. 여러 번 호출해도 안전합니다."""
+        ssh_tunnel = getattr(self, 'ssh_tunnel', None)
+        if ssh_tunnel is None:
+            return
         try:
-            if self.ssh_process:
-                logger.info(f"SSH 프로세스 종료 중: PID {self.ssh_process.pid}")
-                self.ssh_process.terminate()
-
-                # 프로세스가 종료될 때까지 대기 (최대 5초)
-                try:
-                    self.ssh_process.wait(timeout=5)
-                    logger.info("SSH 프로세스 정상 종료")
-                except psutil.TimeoutExpired:
-                    logger.warning("SSH 프로세스 강제 종료")
-                    self.ssh_process.kill()
-
-                self.ssh_process = None
-
-            # 추가로 SSH 터널 프로세스 검색 및 종료
-            logger.info("남은 SSH 터널 프로세스 검색 중...")
-            killed_count = 0
-
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-                try:
-                    cmdline = ' '.join(proc.info['cmdline'] or [])
-                    if ('ssh' in proc.info['name'].lower() and
-                            f'{self.tunnel_port}:localhost:11434' in cmdline):
-                        logger.info(f"남은 SSH 터널 프로세스 종료: PID {proc.info['pid']}")
-                        proc.terminate()
-                        killed_count += 1
-
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
-
-            logger.info(f"SSH 터널 정리 완료 (종료된 프로세스: {killed_count}개)")
-
+            ssh_tunnel.stop()
         except Exception as e:
             logger.error(f"SSH 터널 정리 중 오류: {str(e)}")
 
@@ -345,7 +369,7 @@ class CodeLlamaReviewer:
             try:
                 logger.info(f"Ollama 연결 시도 {attempt + 1}/{max_retries}")
 
-                response = requests.get(
+                response = self.session.get(
                     f"{self.api_url}/api/tags",
                     timeout=10
                 )
@@ -368,7 +392,7 @@ class CodeLlamaReviewer:
                     logger.error(f"Ollama API 응답 오류: {response.status_code}")
                     logger.error(f"응답 내용: {response.text}")
 
-            except requests.exceptions.ConnectError as e:
+            except requests.exceptions.ConnectionError as e:
                 logger.error(f"Ollama 연결 오류 (시도 {attempt + 1}): {str(e)}")
             except requests.exceptions.Timeout as e:
                 logger.error(f"Ollama 연결 타임아웃 (시도 {attempt + 1}): {str(e)}")
@@ -412,53 +436,131 @@ class CodeLlamaReviewer:
             logger.error(f"[Language Detection] 언어 감지 중 오류 발생: {e}")
             return ""
 
+    def _build_request_data(self, prompt: str, model: str, stream: bool,
+                            context: Optional[List[int]] = None) -> Dict[str, Any]:
+        """/api/generate 요청 본문을 생성합니다."""
+        request_data = {
+            "model": model,
+            "prompt": prompt,
+            "stream": stream,
+            "system": SYSTEM_PROMPT
+        }
+        if context:
+            request_data["context"] = context
+        if self.structured_output:
+            request_data["format"] = REVIEW_FINDINGS_SCHEMA
+        if self.generation_options:
+            request_data["options"] = dict(self.generation_options)
+        if self.keep_alive is not None:
+            request_data["keep_alive"] = self.keep_alive
+        return request_data
+
     # FIXME: LLM 모델 바꿔보기
-    def _call_ollama_api(self, prompt: str, model: str = "qwen2.5-coder:32b-instruct") -> str:
-        """Ollama API를 호출하여 응답을 받아옵니다."""
+    def _call_ollama_api(self, prompt: str, model: str = DEFAULT_MODEL, chain: Optional[ContextChain] = None) -> str:
+        """Ollama API를 호출하여 응답을 받아옵니다. 응답 캐시가 있으면 먼저 조회합니다.
+
+        chain이 주어지면 chain.tokens를 context로 보내고, 응답의 context로 갱신합니다.
+        """
+        cache_key = None
+        if self.response_cache and not self.response_cache.bypass:
+            context = chain.tokens if chain else None
+            cache_key = self.response_cache.make_key(self._build_request_data(prompt, model, stream=False,
+                                                                              context=context))
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                # 캐시된 응답에는 context가 없으므로 다음 요청은 전체 프롬프트로 시작합니다.
+                if chain:
+                    chain.reset()
+                # 스트리밍 소비자도 생성 결과를 받을 수 있도록 캐시된 응답을 한 번에 전달합니다.
+                if self.stream and self.on_chunk:
+                    self.on_chunk(cached)
+                return cached
+
+        with review_metrics.span("generation"):
+            review_text = self._generate(prompt, model, chain)
+
+        if cache_key and review_text:
+            self.response_cache.set(cache_key, review_text, model=model)
+        return review_text
+
+    def _generate(self, prompt: str, model: str, chain: Optional[ContextChain] = None) -> str:
+        """캐시를 거치지 않고 Ollama /api/generate를 호출합니다.
+
+        SSH 터널을 사용 중이면 요청 전에 터널 상태를 확인하고, 리뷰 도중 터널이 끊겨 요청이 실패하면
+        다시 연결한 뒤 한 번 더 시도합니다.
+        """
+        if self.ssh_tunnel is None:
+            return self._generate_once(prompt, model, chain)
+
+        self.ssh_tunnel.ensure()
+        try:
+            return self._generate_once(prompt, model, chain)
+        except Exception:
+            if self.ssh_tunnel.is_alive():
+                raise
+            logger.warning("요청 중 SSH 터널이 끊어졌습니다. 다시 연결한 뒤 재시도합니다.")
+            self.ssh_tunnel.ensure()
+            return self._generate_once(prompt, model, chain)
+
+    def _generate_once(self, prompt: str, model: str, chain: Optional[ContextChain] = None) -> str:
+        if self.stream:
+            return "".join(self.stream_ollama_api(prompt, model, on_chunk=self.on_chunk, chain=chain))
+
+        def generate(endpoint):
+            result = self._generate_on(endpoint.url, prompt, model, context=chain.tokens if chain else None)
+            endpoint.record_tokens(result.get('eval_count'), result.get('eval_duration'))
+            return endpoint, result
+
+        # 실패하면 풀이 다른 엔드포인트에서 한 번 더 시도합니다 (context에 묶인 요청은 제외).
+        endpoint, result = self.endpoint_pool.request(generate, model, pinned_url=chain.pinned_url if chain else None)
+        if chain:
+            chain.update(result.get('context'), endpoint.url)
+
+        total_duration = result.get('total_duration')
+        self._record_generation_metrics({
+            'model': model,
+            'endpoint': endpoint.url,
+            'prompt_chars': len(prompt),
+            'time_to_first_token': None,
+            'chunk_count': 0,
+            'prompt_eval_count': result.get('prompt_eval_count'),
+            'prompt_eval_duration': result.get('prompt_eval_duration'),
+            'eval_count': result.get('eval_count'),
+            'eval_duration': result.get('eval_duration'),
+            'load_duration': result.get('load_duration'),
+            'total_duration': total_duration / 1e9 if total_duration else 0.0,
+        })
+        return result.get('response', '')
+
+    def _generate_on(self, api_url: str, prompt: str, model: str,
+                     context: Optional[List[int]] = None) -> Dict[str, Any]:
+        """지정한 엔드포인트에 non-stream generate 요청을 보내고 응답 JSON을 반환합니다."""
         logger.info(f"=== Ollama API 호출 시작 ===")
-        logger.info(f"API URL: {self.api_url}/api/generate")
+        logger.info(f"API URL: {api_url}/api/generate")
         logger.info(f"요청 모델: {model}")
-        logger.info(f"요청 프롬프트: {prompt}")
+        logger.info(f"요청 프롬프트: {payload(prompt, 'prompt')}")
         logger.info(f"프롬프트 길이: {len(prompt)} characters")
         
-        request_data = {
-            "model": model,
-            "prompt": prompt,
-            "stream": False,
-            "system": """
-    You are a senior developer proficient in iOS and backend.
-
-    - Always generate your review **in Korean only**, even if this prompt is written in English.
-    - Do **not copy** any example content from the <output-format> section. It is for structure only.
-    - The review must be based solely on the <diff> section.
-    - Detect all code issues first, then group them by severity level in the final output.
-            """
-        }
+        request_data = self._build_request_data(prompt, model, stream=False, context=context)
 
         try:
-            response = requests.post(
-                f"{self.api_url}/api/generate",
+            response = self.session.post(
+                f"{api_url}/api/generate",
                 json=request_data,
                 timeout=300,  # 5분 타임아웃
-                headers={
-                    'Content-Type': 'application/json',
-                    'User-Agent': 'CodeReview-Bot/1.0'
-                }
+                headers={'Content-Type': 'application/json'}
             )
 
-            logger.info(f"ollama API response: {response.json()}")
+            logger.info(f"ollama API response: {payload(response.text, 'response')}")
 
             if response.status_code != 200:
                 logger.error(f"=== API 호출 실패 상세 정보 ===")
                 logger.error(f"상태 코드: {response.status_code}")
                 logger.error(f"응답 헤더: {dict(response.headers)}")
-                logger.error(f"응답 내용: {response.text}")
+                logger.error(f"응답 내용: {payload(response.text, 'response')}")
                 logger.error(f"요청 URL: {response.url}")
                 raise Exception(f"Ollama API 호출 실패: {response.status_code}")
-            else:
-                print(response.status_code, response.text)
-            result = response.json()
-            return result.get('response', '')
+            return response.json()
 
         except requests.exceptions.Timeout as e:
             logger.error(f"API 요청 타임아웃: {str(e)}")
@@ -473,6 +575,171 @@ class CodeLlamaReviewer:
             logger.error(f"Ollama API 호출 중 예상치 못한 오류: {str(e)}")
             raise
 
+    def stream_ollama_api(self, prompt: str, model: str = DEFAULT_MODEL,
+                          on_chunk: Optional[Callable[[str], None]] = None,
+                          chain: Optional[ContextChain] = None) -> Iterator[str]:
+        """Ollama API를 스트리밍 모드로 호출하여 생성된 텍스트 조각을 순서대로 반환합니다.
+
+        청크 사이 대기 시간이 stream_inactivity_timeout을 넘으면 타임아웃으로 처리합니다.
+        요청이 끝나면 TTFT와 tokens/sec를 generation_metrics에 기록합니다.
+        첫 조각을 받기 전에 실패하면 다른 사용 가능한 엔드포인트에서 한 번 더 시도합니다.
+        """
+        pinned_url = chain.pinned_url if chain else None
+        failed_url = None
+        while True:
+            emitted = False
+            try:
+                with self.endpoint_pool.acquire(model, pinned_url=pinned_url,
+                                                exclude={failed_url} if failed_url else None) as endpoint:
+                    for text in self._stream_from(endpoint, prompt, model, on_chunk, chain):
+                        emitted = True
+                        yield text
+                return
+            except Exception as e:
+                # 이미 내보낸 조각이 있거나 context에 묶인 요청은 다시 보내면 결과가 중복/어긋납니다.
+                if emitted or pinned_url or failed_url or not self.endpoint_pool.can_fail_over(model, endpoint.url):
+                    raise
+                failed_url = endpoint.url
+                logger.warning(f"[Ollama Pool] {failed_url} 스트리밍 실패, 다른 엔드포인트에서 다시 시도합니다: {str(e)}")
+
+    def _stream_from(self, endpoint, prompt: str, model: str,
+                     on_chunk: Optional[Callable[[str], None]] = None,
+                     chain: Optional[ContextChain] = None) -> Iterator[str]:
+        logger.info(f"=== Ollama API 스트리밍 호출 시작 ===")
+        logger.info(f"API URL: {endpoint.url}/api/generate")
+        logger.info(f"요청 모델: {model}")
+        logger.info(f"프롬프트 길이: {len(prompt)} characters")
+
+        request_data = self._build_request_data(prompt, model, stream=True, context=chain.tokens if chain else None)
+        metrics: Dict[str, Any] = {
+            'model': model,
+            'endpoint': endpoint.url,
+            'prompt_chars': len(prompt),
+            'time_to_first_token': None,
+            'chunk_count': 0,
+        }
+        started_at = time.time()
+
+        try:
+            # read timeout은 소켓 read 사이의 최대 대기 시간이므로 청크 간 비활성 타임아웃으로 동작합니다.
+            with self.session.post(
+                f"{endpoint.url}/api/generate",
+                json=request_data,
+                stream=True,
+                timeout=(10, self.stream_inactivity_timeout),
+                headers={'Content-Type': 'application/json'}
+            ) as response:
+                if response.status_code != 200:
+                    logger.error(f"=== API 스트리밍 호출 실패 ===")
+                    logger.error(f"상태 코드: {response.status_code}")
+                    logger.error(f"응답 내용: {response.text}")
+                    raise Exception(f"Ollama API 호출 실패: {response.status_code}")
+
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+
+                    chunk = json.loads(line)
+                    if 'error' in chunk:
+                        raise Exception(f"Ollama API 스트리밍 오류: {chunk['error']}")
+
+                    text = chunk.get('response', '')
+                    if text:
+                        if metrics['time_to_first_token'] is None:
+                            metrics['time_to_first_token'] = time.time() - started_at
+                            logger.info(f"첫 토큰 수신 (TTFT: {metrics['time_to_first_token']:.2f}초)")
+                        metrics['chunk_count'] += 1
+                        if on_chunk:
+                            on_chunk(text)
+                        yield text
+
+                    if chunk.get('done'):
+                        metrics['eval_count'] = chunk.get('eval_count')
+                        metrics['eval_duration'] = chunk.get('eval_duration')
+                        metrics['load_duration'] = chunk.get('load_duration')
+                        metrics['prompt_eval_count'] = chunk.get('prompt_eval_count')
+                        metrics['prompt_eval_duration'] = chunk.get('prompt_eval_duration')
+                        endpoint.record_tokens(metrics['eval_count'], metrics['eval_duration'])
+                        if chain:
+                            chain.update(chunk.get('context'), endpoint.url)
+                        break
+
+        except requests.exceptions.Timeout as e:
+            logger.error(f"API 스트리밍 비활성 타임아웃 ({self.stream_inactivity_timeout}초): {str(e)}")
+            raise Exception("Ollama API 스트리밍 타임아웃")
+        except requests.exceptions.ConnectionError as e:
+            # 본문 수신 중 발생한 read timeout은 ConnectionError로 감싸져 전달됩니다.
+            if e.args and isinstance(e.args[0], ReadTimeoutError):
+                logger.error(f"API 스트리밍 비활성 타임아웃 ({self.stream_inactivity_timeout}초): {str(e)}")
+                raise Exception("Ollama API 스트리밍 타임아웃")
+            logger.error(f"API 연결 오류: {str(e)}")
+            raise Exception(f"Ollama API 연결 오류: {str(e)}")
+        except requests.exceptions.RequestException as e:
+            logger.error(f"API 요청 오류: {str(e)}")
+            raise Exception(f"Ollama API 요청 오류: {str(e)}")
+        finally:
+            metrics['total_duration'] = time.time() - started_at
+            self._record_generation_metrics(metrics)
+
+    def _record_generation_metrics(self, metrics: Dict[str, Any]) -> None:
+        """생성 요청의 TTFT, tokens/sec, 모델 로드 시간을 계산하여 기록합니다."""
+        load_duration = metrics.get('load_duration')
+        metrics['load_seconds'] = load_duration / 1e9 if load_duration else 0.0
+        eval_count = metrics.get('eval_count')
+        eval_duration = metrics.get('eval_duration')
+        if eval_count and eval_duration:
+            # Ollama는 duration을 나노초 단위로 반환합니다.
+            metrics['tokens_per_second'] = eval_count / (eval_duration / 1e9)
+        elif metrics['time_to_first_token'] is not None:
+            generation_time = metrics['total_duration'] - metrics['time_to_first_token']
+            metrics['tokens_per_second'] = metrics['chunk_count'] / generation_time if generation_time > 0 else None
+        else:
+            metrics['tokens_per_second'] = None
+
+        self.generation_metrics.append(metrics)
+        collected = _review_generations.get()
+        if collected is not None:
+            collected.append(metrics)
+        review_metrics.record_generation(metrics)
+
+        ttft = metrics['time_to_first_token']
+        tps = metrics['tokens_per_second']
+        logger.info(
+            f"[Generation Metrics] TTFT: {f'{ttft:.2f}초' if ttft is not None else 'N/A'}, "
+            f"tokens/sec: {f'{tps:.1f}' if tps else 'N/A'}, "
+            f"모델 로드: {metrics['load_seconds']:.2f}초, "
+            f"총 소요 시간: {metrics['total_duration']:.1f}초"
+        )
+
+    def _extract_added_hunks(self, code: str, language: str) -> List[str]:
+        """감지된 언어의 파일에서 hunk별로 추가된('+') 라인을 모아 검색 쿼리 목록을 만듭니다."""
+        extension = f".{language}"
+        hunks: List[str] = []
+        current: List[str] = []
+        in_target_file = False
+
+        def flush():
+            if current:
+                hunks.append("\n".join(current))
+                current.clear()
+
+        for line in code.splitlines():
+            if line.startswith("=== File: "):
+                flush()
+                in_target_file = line[len("=== File: "):].rstrip(" =").endswith(extension)
+            elif not in_target_file:
+                continue
+            elif line.startswith("@@"):
+                flush()
+            elif line.startswith("+") and not line.startswith("+++"):
+                added = line[1:]
+                if added.strip():
+                    current.append(added)
+        flush()
+
+        # 같은 내용의 hunk는 한 번만 검색합니다.
+        return list(dict.fromkeys(hunks))
+
     def _get_convention_guide(self, code: str) -> str:
         try:
             # 1. 언어 감지
@@ -490,35 +757,44 @@ class CodeLlamaReviewer:
                 logger.warning(f"VectorDB 컬렉션 '{collection_name}' 로드 실패: {e}")
                 return "not applicable"
 
-            # 3. 코드 벡터화
-            code_vec = self.model.encode(code).tolist()
+            # 3. hunk 단위로 추가된 코드만 모아 한 번에 벡터화
+            # CodeBERT는 512 토큰에서 잘리므로 PR 전체를 하나로 임베딩하면 앞부분만 검색에 반영됩니다.
+            queries = self._extract_added_hunks(code, detected_language) or [code]
+            query_vectors = self.embedding_cache.encode(lambda texts: self.model.encode(texts), queries)
+            logger.info(f"[Convention Guide] 검색 쿼리 수: {len(queries)}개 hunk")
 
-            # 4. VectorDB 검색
+            # 4. VectorDB 검색 (모든 hunk를 하나의 multi-vector query로)
             results = collection.query(
-                query_embeddings=[code_vec],
+                query_embeddings=query_vectors.tolist(),
                 include=["documents", "metadatas", "distances"]
             )
-            
-            logger.info(f"[Convention Guide] 검색 결과: {len(results['documents'][0]) if results['documents'] else 0}개 발견")
-            
-            # 5. 결과 상세 로깅
-            convention_guides = []
-            for doc, meta, distance in zip(
-                results["documents"][0],
-                results["metadatas"][0],
-                results["distances"][0]
+
+            # 5. hunk별 결과를 규칙 id 기준으로 중복 제거하며 가장 가까운 거리만 남김
+            matched: Dict[str, Dict[str, Any]] = {}
+            for ids, docs, metas, distances in zip(
+                results["ids"],
+                results["documents"],
+                results["metadatas"],
+                results["distances"]
             ):
+                for rule_id, doc, meta, distance in zip(ids, docs, metas, distances):
+                    if rule_id not in matched or distance < matched[rule_id]['distance']:
+                        matched[rule_id] = {'doc': doc, 'meta': meta, 'distance': distance}
+
+            logger.info(f"[Convention Guide] 검색 결과: {len(matched)}개 규칙 발견")
+
+            convention_guides = []
+            for rule in sorted(matched.values(), key=lambda item: item['distance']):
+                meta, distance = rule['meta'], rule['distance']
                 logger.info(
                     f"[Convention Guide] 검색된 규칙 - "
                     f"카테고리: {meta['category']}, "
                     f"제목: {meta['title']}, "
-                    f"거리: {distance:.3f}",
-                    f"내용: {doc.strip()}"
+                    f"거리: {distance:.3f}"
                 )
-            
-                
+
                 if distance < 0.1:  # 유사도 임계값
-                    convention_guides.append(f"- [{meta['category']}] {doc.strip()}")
+                    convention_guides.append(f"- [{meta['category']}] {rule['doc'].strip()}")
                     logger.info(f"[Convention Guide] 규칙 추가됨 (거리: {distance})")
                 else:
                     logger.info(f"[Convention Guide] 규칙 제외됨 (거리: {distance} > 0.1)")
@@ -528,145 +804,317 @@ class CodeLlamaReviewer:
                 return "not applicable"
 
             result = "\n".join(convention_guides)
-            logger.info(f"[Convention Guide] 최종 결과:\n{result}")
+            logger.info(f"[Convention Guide] 최종 결과:\n{payload(result, 'convention_guide')}")
             return result
 
         except Exception as e:
             logger.error(f"[Convention Guide] 컨벤션 가이드 생성 실패: {e}")
             return "not applicable"
     
-    def _export_json_array(self, text: str) -> list:
-        """텍스트에서 JSON 배열을 추출합니다."""
-        match = re.search(r"\[\s*\".*?\"\s*\]", text, re.DOTALL)
-        if match:
-            try:
-                return json.loads(match.group(0))
-            except json.JSONDecodeError:
-                pass
-        return []
+    def _create_prompt(self, code: str, continuation: bool = False) -> str:
+        """코드 리뷰를 위한 프롬프트를 생성합니다.
 
-    def _create_prompt(self, code: str) -> str:
-        """코드 리뷰를 위한 프롬프트를 생성합니다."""
+        continuation=True이면 지침이 이전 요청의 context에 이미 있으므로 컨벤션 가이드와 diff만 담습니다.
+        """
         if not code:
             logger.warning("입력된 코드가 비어있습니다.")
             return ""
 
         try:
-            convention_guide = self._get_convention_guide(code)
-            logger.info(f"_get_convention_guide 결과 {convention_guide}")
-            
-            # xmlStyle.py의 템플릿 사용
-            if not hasattr(template, 'replace'):
-                logger.error("template이 올바른 형식이 아닙니다.")
-                return code
+            return self._fill_prompt(code, self._retrieve_convention_guide(code), continuation)
+        except Exception as e:
+            logger.error(f"프롬프트 생성 중 오류 발생: {str(e)}")
+            return code  # 오류 발생 시 원본 코드 반환
 
-            final_prompt = (
+    def _retrieve_convention_guide(self, code: str) -> str:
+        with review_metrics.span("retrieval"):
+            convention_guide = self._get_convention_guide(code)
+        logger.info(f"_get_convention_guide 결과 {payload(convention_guide, 'convention_guide')}")
+        return convention_guide
+
+    def _fill_prompt(self, code: str, convention_guide: str, continuation: bool = False) -> str:
+        """검색해 둔 컨벤션 가이드와 diff로 템플릿을 채웁니다."""
+        # xmlStyle.py의 템플릿 사용
+        template = continuation_template if continuation else self.prompt_template
+        if not hasattr(template, 'replace'):
+            logger.error("template이 올바른 형식이 아닙니다.")
+            return code
+
+        with review_metrics.span("prompt_build"):
+            return (
                 template
                 .replace("{{CONVENTION_GUIDE_PLACEHOLDER}}", convention_guide or "not applicable")
                 .replace("{{PR_DIFF_PLACEHOLDER}}", code.strip())
             )
 
-            return final_prompt
-        except Exception as e:
-            logger.error(f"프롬프트 생성 중 오류 발생: {str(e)}")
-            return code  # 오류 발생 시 원본 코드 반환
-
-    def review_code(self, pr_data: str) -> str:
-        """PR의 코드를 리뷰하고 결과를 문자열로 반환합니다."""
+    def _split_pr_data(self, pr_data: str) -> Tuple[str, List[Dict[str, str]]]:
+        """PRExtractor 출력을 PR 헤더(제목/설명)와 파일 섹션 목록으로 분리합니다."""
+        matches = list(re.finditer(r'^=== File: (.*?) ===$', pr_data, re.MULTILINE))
+        if not matches:
+            return pr_data, []
+
+        sections = []
+        for index, match in enumerate(matches):
+            end = matches[index + 1].start() if index + 1 < len(matches) else len(pr_data)
+            sections.append({'file': match.group(1), 'text': pr_data[match.start():end]})
+        return pr_data[:matches[0].start()], sections
+
+    def _split_review_units(self, pr_data: str) -> List[Dict[str, str]]:
+        """PRExtractor 출력을 파일 단위 리뷰 유닛으로 분리합니다.
+
+        각 유닛은 PR 헤더(제목/설명)와 파일 섹션 하나로 구성되며, PR에 등장한 순서를 유지합니다.
+        prompt_packer가 있으면 컨텍스트 예산을 넘는 파일은 hunk 경계에서 나눠 같은 파일 경로의 유닛 여러 개가 됩니다.
+        """
+        header, sections = self._split_pr_data(pr_data)
+        if self.prompt_packer and sections:
+            return self.prompt_packer.split(header, sections)
+        return [{'file': section['file'], 'text': header + section['text']} for section in sections]
+
+    @staticmethod
+    def _merge_chunk_reviews(review_texts: List[str]) -> str:
+        """한 파일을 나눠 리뷰한 결과들을 섹션 하나로 합칩니다. 하나라도 실패했으면 파일 전체를 실패로 둡니다."""
+        if any(ReviewFormatter.is_error_section(text) for text in review_texts):
+            return REVIEW_ERROR_MESSAGE
+        parts = [text.strip() for text in review_texts if text and text.strip() != "NO ISSUE"]
+        return "\n\n".join(parts) or "NO ISSUE"
+
+    @classmethod
+    def _group_by_file(cls, reviews: List[Tuple[Optional[str], str]]) -> List[Tuple[Optional[str], str]]:
+        """같은 파일(나뉜 유닛)의 결과를 처음 등장한 위치에 하나의 항목으로 모읍니다."""
+        grouped: Dict[Optional[str], List[str]] = {}
+        for file_name, review_text in reviews:
+            grouped.setdefault(file_name, []).append(review_text)
+        return [(file_name, texts[0] if len(texts) == 1 else cls._merge_chunk_reviews(texts))
+                for file_name, texts in grouped.items()]
+
+    def _review_unit(self, unit: Dict[str, str]) -> str:
+        """리뷰 유닛 하나에 대해 프롬프트를 만들고 Ollama API를 호출합니다."""
+        prompt = self._create_prompt(unit['text'])
+        if not prompt:
+            return ""
+        return self._call_ollama_api(prompt)
+
+    def _review_units(self, units: List[Dict[str, str]]) -> List[str]:
+        if self.reuse_context and len(units) > 1:
+            return self._review_units_chained(units)
+        return self._review_units_parallel(units)
+
+    def _review_units_chained(self, units: List[Dict[str, str]]) -> List[str]:
+        """리뷰 유닛들을 순서대로 리뷰하면서 이전 요청의 context를 다음 요청에 이어 붙입니다.
+
+        context는 직전 응답에 이어지므로 유닛을 동시에 보낼 수 없습니다. 대신 두 번째 요청부터는
+        지침 블록을 다시 평가하지 않습니다.
+        """
+        num_ctx = self.generation_options.get("num_ctx", 32768)
+        num_predict = self.generation_options.get("num_predict", 4096)
+        token_counter = self.prompt_packer.token_counter if self.prompt_packer else TokenCounter()
+        chain = ContextChain(num_ctx - num_predict, token_counter)
+        logger.info(f"=== context 재사용 순차 리뷰 시작: {len(units)}개 유닛 ===")
+
+        results: List[str] = []
+        for unit in units:
+            if not unit['text']:
+                results.append("")
+                continue
+            if chain.tokens and not self.endpoint_pool.is_available(chain.endpoint_url):
+                # context는 만든 서버에서만 유효하므로 다른 엔드포인트로 옮길 때는 전체 프롬프트로 다시 시작합니다.
+                logger.info(f"[Context Reuse] {chain.endpoint_url}을 사용할 수 없어 {unit['file']}부터 새로 시작합니다.")
+                chain.reset()
+            try:
+                # 컨벤션 검색(임베딩/인덱스 조회)은 유닛마다 한 번만 하고 두 템플릿 모두 같은 결과로 채웁니다.
+                convention_guide = self._retrieve_convention_guide(unit['text'])
+                prompt = self._fill_prompt(unit['text'], convention_guide, continuation=True) if chain.tokens else ""
+                if prompt and not chain.fits(prompt):
+                    logger.info(f"[Context Reuse] 컨텍스트 창 초과 예상 - {unit['file']}부터 새로 시작합니다.")
+                    chain.reset()
+                if not chain.tokens:
+                    prompt = self._fill_prompt(unit['text'], convention_guide)
+                results.append(self._call_ollama_api(prompt, chain=chain))
+            except Exception as e:
+                logger.error(f"[Context Reuse] {unit['file']} 리뷰 실패: {str(e)}")
+                chain.reset()
+                results.append(REVIEW_ERROR_MESSAGE)
+
+        logger.info(f"[Context Reuse] 순차 리뷰 완료 (context 재시작 {chain.resets}회)")
+        return results
+
+    def _review_units_parallel(self, units: List[Dict[str, str]]) -> List[str]:
+        """리뷰 유닛들을 max_workers 개수만큼 동시에 리뷰하고 유닛 순서대로 결과를 반환합니다."""
+        logger.info(f"=== 병렬 리뷰 시작: {len(units)}개 파일, workers={self.max_workers} ===")
+        started_at = time.time()
+        results: List[str] = [""] * len(units)
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(units))) as executor:
+            # 리뷰 지표 trace가 worker 스레드에도 전달되도록 유닛마다 컨텍스트를 복사합니다.
+            futures = {
+                executor.submit(contextvars.copy_context().run, self._review_unit, unit): index
+                for index, unit in enumerate(units)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                file_name = units[index]['file']
+                try:
+                    results[index] = future.result()
+                    logger.info(f"[Parallel Review] 완료: {file_name}")
+                except Exception as e:
+                    logger.error(f"[Parallel Review] {file_name} 리뷰 실패: {str(e)}")
+                    results[index] = REVIEW_ERROR_MESSAGE
+
+        logger.info(f"병렬 리뷰 완료 (소요 시간: {time.time() - started_at:.1f}초)")
+        return results
+
+    def review_files(self, pr_data: str, files: Set[str]) -> Dict[str, str]:
+        """지정한 파일들만 파일 단위로 리뷰하고 {파일 경로: 리뷰 결과}를 반환합니다.
+
+        prompt_packer가 있어도 여러 파일을 한 프롬프트로 묶지 않으므로 결과는 항상 파일별로 나뉩니다.
+        """
+        units = [unit for unit in self._split_review_units(pr_data) if unit['file'] in files]
+        logger.info(f"=== 부분 리뷰 시작: {len(units)}개 유닛 ===")
+        if not units:
+            return {}
+
+        results = self._review_units(units)
+        if self.structured_output:
+            formatter = ReviewFormatter()
+            rendered = []
+            for unit, review_text in zip(units, results):
+                findings = parse_findings(review_text, default_file=unit['file'])
+                if findings is not None:
+                    findings = findings.filter(min_confidence=self.min_confidence).findings
+                    review_text = formatter.render_file_findings(findings) if findings else "NO ISSUE"
+                rendered.append(review_text)
+            results = rendered
+        return dict(self._group_by_file([(unit['file'], text) for unit, text in zip(units, results)]))
+
+    def _review_pr(self, pr_data: str, parallel: bool) -> List[Tuple[List[str], str]]:
+        """PR을 리뷰 단위로 나눠 리뷰하고 (유닛에 포함된 파일 경로 목록, 응답) 목록을 반환합니다.
+
+        PR 전체를 한 번에 리뷰하면 파일 경로 목록은 비어 있습니다.
+        """
+        if self.prompt_packer:
+            header, sections = self._split_pr_data(pr_data)
+            units = self.prompt_packer.pack(header, sections) if sections else []
+        else:
+            units = self._split_review_units(pr_data) if parallel else []
+
+        if len(units) == 1 and self.prompt_packer:
+            return [([], self._review_unit(units[0]))]
+        if units:
+            results = self._review_units(units)
+            return [(unit.get('files', [unit['file']]), result) for unit, result in zip(units, results)]
+
+        # Ollama API 호출
+        prompt = self._create_prompt(pr_data)
+        if not prompt:
+            logger.warning("생성된 프롬프트가 비어있습니다.")
+            return []
+        return [([], self._call_ollama_api(prompt))]
+
+    def _parse_reviews(self, reviews: List[Tuple[List[str], str]]) -> Tuple[ReviewFindings, List[Tuple[str, str]]]:
+        """structured_output 응답들을 검증해 하나로 합칩니다. 검증에 실패한 응답은 (파일 경로, 원문)으로 따로 반환합니다.
+
+        파일 하나만 담은 유닛의 응답만 그 경로를 파일이 비어 있는 finding의 기본값으로 씁니다.
+        """
+        parsed, raw = [], []
+        for files, review_text in reviews:
+            findings = parse_findings(review_text, default_file=files[0] if len(files) == 1 else None)
+            if findings is None:
+                raw.append((", ".join(files) or "review", review_text))
+            else:
+                parsed.append(findings)
+        return ReviewFindings.merge(parsed).filter(min_confidence=self.min_confidence), raw
+
+    def _render_parsed(self, findings: ReviewFindings, raw: List[Tuple[str, str]], total: int) -> str:
+        """검증된 findings를 렌더링하고, 검증에 실패한 응답은 원문 그대로 파일 섹션으로 덧붙입니다."""
+        logger.info(f"[Findings] 이슈 {len(findings.findings)}개, 검증 실패 응답 {len(raw)}개")
+        parts = [ReviewFormatter().render_findings(findings)] if len(raw) < total else []
+        fallback = ReviewFormatter.format_file_sections(raw)
+        if fallback:
+            parts.append(fallback)
+        return "\n\n".join(parts)
+
+    def _render_reviews(self, reviews: List[Tuple[List[str], str]]) -> Tuple[Optional[ReviewFindings], str]:
+        """리뷰 응답들을 (검증된 findings, 리포트 본문)으로 만듭니다. structured_output이 아니면 findings는 None입니다."""
+        if self.structured_output:
+            findings, raw = self._parse_reviews(reviews)
+            if raw:
+                logger.warning(f"[Findings] 검증에 실패한 응답 {len(raw)}개는 원문으로 남기고 findings에서 제외합니다: "
+                               f"{[name for name, _ in raw]}")
+            return findings, self._render_parsed(findings, raw, len(reviews))
+        if len(reviews) == 1 and not reviews[0][0]:
+            return None, reviews[0][1]
+        return None, ReviewFormatter.format_file_sections(
+            self._group_by_file([(", ".join(files), review_text) for files, review_text in reviews])
+        )
+
+    def _run_review(self, pr_data: str, parallel: bool) -> Tuple[Optional[ReviewFindings], str]:
+        """review_code와 review_findings가 공유하는 리뷰 실행부입니다.
+
+        이 리뷰의 생성 지표만 집계해 기록하고, 리뷰 중 예외가 나면 findings 없이 오류 메시지를 본문으로 반환합니다.
+        """
         logger.info("=== 코드 리뷰 시작 ===")
 
         if not pr_data:
             logger.warning("PR 데이터가 비어있습니다.")
-            return "NO ISSUE"
+            return None, "NO ISSUE"
 
+        # 여러 작업이 리뷰어를 공유해도 이 리뷰의 생성 지표만 집계합니다.
+        generations: List[Dict[str, Any]] = []
+        generations_token = _review_generations.set(generations)
         try:
-            # Ollama API 호출
-            prompt = self._create_prompt(pr_data)
-            if not prompt:
-                logger.warning("생성된 프롬프트가 비어있습니다.")
-                return "NO ISSUE"
-            
-            review_text = self._call_ollama_api(prompt)
-            
+            reviews = self._review_pr(pr_data, parallel)
+            findings, review_text = self._render_reviews(reviews) if reviews else (None, "")
+
             if not review_text:
                 logger.warning("리뷰 결과가 비어있습니다.")
-                return "NO ISSUE"
-            
+                return findings, "NO ISSUE"
+
             logger.info(f"리뷰 완료 (텍스트 길이: {len(review_text)} characters)")
-            return review_text
+            if generations:
+                load_seconds = sum(metrics['load_seconds'] for metrics in generations)
+                generation_seconds = sum(metrics['total_duration'] for metrics in generations)
+                logger.info(
+                    f"[Generation Metrics] 생성 요청 {len(generations)}회, 모델 로드 {load_seconds:.2f}초 "
+                    f"/ 생성 전체 {generation_seconds:.2f}초"
+                )
+            if self.response_cache:
+                logger.info(f"[Response Cache] 통계: {self.response_cache.stats()}")
+            return findings, review_text
 
         except Exception as e:
             logger.error(f"코드 리뷰 중 오류 발생: {str(e)}")
-            return "리뷰 중 오류가 발생했습니다. 다시 시도해주세요."
-
-    def post_review(self, pr_number: str, summary: str, line_comments: List[Dict[str, Any]]) -> None:
-        """리뷰 결과를 GitHub PR에 포스팅합니다."""
-        logger.info(f"=== 리뷰 포스팅 시작: PR #{pr_number} ===")
-
-        try:
-            logger.debug(f"[DEBUG] post_review 진입: summary={summary}")
-            logger.debug(f"[DEBUG] 전체 line_comments: {line_comments}")
-
-            review_comments = []
-            for comment in line_comments:
-                try:
-                    logger.debug(f"[DEBUG] 원본 comment['line']: {comment['line']}")
-                    logger.debug(f"[DEBUG] comment['file']: {comment['file']}")
-
-                    # 파일의 patch 가져오기
-                    file_patch = self._get_file_patch(pr_number, comment['file'])
-                    if not file_patch:
-                        logger.warning(f"파일 patch를 찾을 수 없음: {comment['file']}")
-                        continue
-
-                    logger.debug(f"[DEBUG] patch 내용 (앞 20줄):\n{file_patch[:1000]}")
-
-                    # 라인 번호를 position으로 변환
-                    line_to_position = self._create_line_to_position_mapping(file_patch)
-                    logger.debug(f"[DEBUG] line_to_position 매핑: {line_to_position}")
-
-                    # 라인 번호 파싱
-                    lines = self._parse_line_numbers(comment['line'])
-                    logger.debug(f"[DEBUG] 파싱된 라인 리스트: {lines}")
-
-                    for line in lines:
-                        if line in line_to_position:
-                            position = line_to_position[line]
-                            logger.debug(f"[DEBUG] 파일: {comment['file']}, 라인: {line}, position: {position}")
-
-                            # 코멘트 생성
-                            review_comment = {
-                                'path': comment['file'],
-                                'position': position,
-                                'body': comment['body']  # 여기서 body를 사용
-                            }
-                            review_comments.append(review_comment)
-                        else:
-                            logger.warning(f"라인 {line}에 대한 position을 찾을 수 없음")
-
-                except Exception as e:
-                    logger.warning(f"Error creating comment: {str(e)}")
-                    continue
-
-            logger.debug(f"[DEBUG] 최종 review_comments 전체: {review_comments}")
-
-            # 리뷰 생성
-            logger.info(f"[DEBUG] create_review 파라미터: summary={summary}, comments={review_comments}")
-            self.repo.create_pull_request_review(
-                pr_number,
-                body=summary,
-                event='COMMENT',
-                comments=review_comments
-            )
-
-            if not review_comments:
-                logger.info("Posted summary comment only (no line comments)")
-            else:
-                logger.info(f"Posted {len(review_comments)} line comments")
-
-        except Exception as e:
-            logger.error(f"리뷰 포스팅 중 오류 발생: {str(e)}")
-            raise
+            return None, f"{REVIEW_ERROR_MESSAGE} 다시 시도해주세요."
+        finally:
+            _review_generations.reset(generations_token)
+
+    def review_findings(self, pr_data: str, parallel: bool = False) -> Tuple[ReviewFindings, str]:
+        """structured_output 모드로 PR을 리뷰하고 (검증된 findings 모델, 리포트 본문)을 반환합니다.
+
+        리포트 본문은 review_code와 같아서 검증에 실패한 응답도 원문 섹션으로 남고, findings에는 포함되지 않습니다.
+        리뷰가 실패하면 빈 findings와 오류 메시지 본문을 반환합니다.
+        """
+        if not self.structured_output:
+            raise ValueError("review_findings requires structured_output=True")
+        findings, review_text = self._run_review(pr_data, parallel)
+        return (findings if findings is not None else ReviewFindings()), review_text
+
+    def review_code(self, pr_data: str, parallel: bool = False) -> str:
+        """PR의 코드를 리뷰하고 결과를 문자열로 반환합니다.
+
+        parallel=True이면 파일 단위로 분리하여 동시에 리뷰한 뒤 하나의 리포트로 병합합니다.
+        prompt_packer가 설정되어 있으면 컨텍스트 예산에 맞춰 묶은 프롬프트 단위로 리뷰합니다.
+        """
+        return self._run_review(pr_data, parallel)[1]
+
+    def close(self):
+        """HTTP 커넥션 풀과 SSH 터널을 정리합니다."""
+        endpoint_pool = getattr(self, 'endpoint_pool', None)
+        if endpoint_pool:
+            endpoint_pool.close()
+        session = getattr(self, 'session', None)
+        if session:
+            session.close()
+        self._cleanup_ssh_tunnel()
 
     def __del__(self):
         """소멸자에서 SSH 터널 정리"""
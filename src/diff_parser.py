@@ -0,0 +1,178 @@
+import bisect
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+HUNK_HEADER_PATTERN = re.compile(r'^@@ -\d+(?:,(\d+))? \+\d+(?:,(\d+))? @@')
+HUNK_NEW_START_PATTERN = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)')
+
+
+@dataclass
+class DiffFile:
+    """unified diff에서 파싱한 파일 하나. PyGithub File과 같은 속성 이름을 사용합니다."""
+    filename: str
+    status: str = "modified"
+    additions: int = 0
+    deletions: int = 0
+    patch: Optional[str] = None
+    previous_filename: Optional[str] = None
+
+
+def _strip_prefix(path: str) -> str:
+    path = path.strip()
+    if path.startswith('"') and path.endswith('"'):
+        path = path[1:-1]
+    return path[2:] if path[:2] in ("a/", "b/") else path
+
+
+def iter_diff_lines(chunks: Iterable[bytes], encoding: str = "utf-8") -> Iterator[str]:
+    """바이트 스트림을 b"\\n"에서만 나눠 줄 단위로 디코딩합니다.
+
+    str.splitlines()나 universal newlines는 \\r, \\x0c, \\x1c-\\x1e, \\x85, \\u2028도 줄 끝으로 보는데,
+    이런 문자는 diff 본문 줄 안에 있을 수 있고 거기서 줄을 나누면 hunk 줄 수가 어긋납니다.
+    """
+    pending = b""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.decode(encoding, errors="replace")
+    if pending:
+        yield pending.decode(encoding, errors="replace")
+
+
+def parse_unified_diff(lines: Iterable[str]) -> Iterator[DiffFile]:
+    """`git diff` 형식의 unified diff를 줄 단위로 읽으면서 파일별 DiffFile을 순서대로 반환합니다.
+
+    hunk 헤더의 줄 수를 따라가므로 '--- '나 '+++ '로 시작하는 본문 줄도 헤더로 오인하지 않습니다.
+    """
+    current: Optional[DiffFile] = None
+    patch_lines: List[str] = []
+    old_remaining = new_remaining = 0
+
+    def finish() -> Optional[DiffFile]:
+        if current is not None and patch_lines:
+            current.patch = "\n".join(patch_lines)
+        return current
+
+    for raw_line in lines:
+        line = raw_line.rstrip("\r\n")
+
+        if old_remaining > 0 or new_remaining > 0:
+            patch_lines.append(line)
+            if line.startswith("+"):
+                current.additions += 1
+                new_remaining -= 1
+            elif line.startswith("-"):
+                current.deletions += 1
+                old_remaining -= 1
+            elif line.startswith("\\"):
+                pass
+            else:
+                old_remaining -= 1
+                new_remaining -= 1
+            continue
+
+        if line.startswith("diff --git "):
+            finished = finish()
+            if finished is not None:
+                yield finished
+            patch_lines = []
+            paths = line[len("diff --git "):]
+            # 공백이 없는 일반적인 경우 "a/x b/x"에서 b/ 경로를 사용합니다.
+            split_at = paths.rfind(" b/")
+            current = DiffFile(filename=_strip_prefix(paths[split_at + 1:] if split_at != -1 else paths))
+        elif current is None:
+            continue
+        elif line.startswith("@@"):
+            match = HUNK_HEADER_PATTERN.match(line)
+            old_remaining = int(match.group(1)) if match and match.group(1) is not None else 1
+            new_remaining = int(match.group(2)) if match and match.group(2) is not None else 1
+            patch_lines.append(line)
+        elif line.startswith("\\") and patch_lines:
+            patch_lines.append(line)
+        elif line.startswith("new file mode"):
+            current.status = "added"
+        elif line.startswith("deleted file mode"):
+            current.status = "removed"
+        elif line.startswith("rename from "):
+            current.status = "renamed"
+            current.previous_filename = line[len("rename from "):]
+        elif line.startswith("rename to "):
+            current.filename = line[len("rename to "):]
+        elif line.startswith("+++ ") and not line.endswith("/dev/null"):
+            current.filename = _strip_prefix(line[4:])
+
+    finished = finish()
+    if finished is not None:
+        yield finished
+
+
+class DiffPositionIndex:
+    """PR의 파일별 patch에서 (파일 경로, 변경 후 줄 번호) -> diff position을 한 번에 계산해 두는 인덱스.
+
+    position은 GitHub 리뷰 코멘트 API의 값으로, 파일의 첫 hunk 헤더 다음 줄이 1이고
+    이후 hunk 헤더를 포함해 파일 끝까지 한 줄씩 증가합니다. 추가(+)와 문맥 줄은 변경 후 파일(RIGHT)에 속하므로
+    코멘트를 달 수 있고, 삭제(-) 줄은 변경 후 줄 번호가 없으므로 인덱스에 넣지 않습니다.
+    """
+
+    def __init__(self):
+        self._positions: Dict[str, Dict[int, int]] = {}
+        self._sorted_lines: Dict[str, List[int]] = {}
+
+    @classmethod
+    def from_patches(cls, patches: Dict[str, str]) -> "DiffPositionIndex":
+        index = cls()
+        for path, patch in patches.items():
+            if patch:
+                index.add_patch(path, patch)
+        return index
+
+    def add_patch(self, path: str, patch: str) -> None:
+        positions: Dict[int, int] = {}
+        position = 0
+        new_line = None
+        for line in patch.split("\n"):
+            if line.startswith("@@"):
+                match = HUNK_NEW_START_PATTERN.match(line)
+                if new_line is not None:
+                    position += 1
+                new_line = int(match.group(1)) if match else 1
+                continue
+            if new_line is None:
+                continue
+            position += 1
+            if line.startswith("-") or line.startswith("\\"):
+                continue
+            positions[new_line] = position
+            new_line += 1
+        self._positions[path] = positions
+        self._sorted_lines[path] = sorted(positions)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._positions
+
+    def __len__(self) -> int:
+        return sum(len(positions) for positions in self._positions.values())
+
+    def position(self, path: str, line: int) -> Optional[int]:
+        """변경 후 줄 번호의 diff position. diff에 없는 줄이면 None입니다."""
+        return self._positions.get(path, {}).get(line)
+
+    def anchor(self, path: str, line: int, max_distance: int = 3) -> Optional[Tuple[int, int]]:
+        """line이 diff에 없으면 max_distance 줄 이내에서 가장 가까운 코멘트 가능한 줄로 옮겨 (줄 번호, position)을 반환합니다."""
+        positions = self._positions.get(path)
+        if not positions:
+            return None
+        if line in positions:
+            return line, positions[line]
+
+        lines = self._sorted_lines[path]
+        index = bisect.bisect_left(lines, line)
+        candidates = [lines[i] for i in (index - 1, index) if 0 <= i < len(lines)]
+        nearest = min(candidates, key=lambda candidate: abs(candidate - line), default=None)
+        if nearest is None or abs(nearest - line) > max_distance:
+            return None
+        return nearest, positions[nearest]
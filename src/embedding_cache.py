@@ -0,0 +1,158 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+from loguru import logger
+
+
+class EmbeddingCache:
+    """텍스트 content hash를 키로 하는 임베딩 캐시.
+
+    프로세스 안에서는 메모리에 보관하고, cache_dir이 주어지면 항목마다 .npy 파일로 저장하여
+    다음 실행에서도 트랜스포머 forward pass를 건너뜁니다.
+    메모리와 디스크 모두 항목 수/전체 크기 한도를 넘으면 가장 오래 사용되지 않은 항목부터 제거합니다(LRU).
+    """
+
+    def __init__(self, model_name: str, cache_dir: Optional[str] = None, max_entries: int = 10000,
+                 max_bytes: int = 100 * 1024 * 1024):
+        self.model_name = model_name
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.encode_seconds = 0.0
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def _load(self, key: str) -> Optional[np.ndarray]:
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            return vector
+        if not self.cache_dir:
+            return None
+
+        path = self._path(key)
+        try:
+            vector = np.load(path)
+        except (OSError, ValueError):
+            return None
+        # LRU 순서를 위해 마지막 사용 시각을 갱신합니다.
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        self._remember(key, vector)
+        return vector
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous.nbytes
+        self._memory[key] = vector
+        self._memory_bytes += vector.nbytes
+        while self._memory and (len(self._memory) > self.max_entries or self._memory_bytes > self.max_bytes):
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+
+    def _store(self, key: str, vector: np.ndarray) -> None:
+        self._remember(key, vector)
+        if not self.cache_dir:
+            return
+
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp.npy"
+        try:
+            np.save(tmp_path, vector)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"[Embedding Cache] 저장 실패: {str(e)}")
+
+    def _evict_disk(self) -> None:
+        """디스크의 .npy 항목이 한도를 넘으면 mtime이 오래된 것부터 제거합니다."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".npy") or ".tmp" in name:
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        removed = 0
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+            _, size, path = entries.pop(0)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total_bytes -= size
+            removed += 1
+        if removed:
+            logger.info(f"[Embedding Cache] LRU 항목 {removed}개 제거")
+
+    def encode(self, encode_fn: Callable[[List[str]], np.ndarray], texts: Union[str, List[str]]) -> np.ndarray:
+        """캐시에 없는 텍스트만 encode_fn으로 한 번에 encode하여 입력 순서대로 임베딩을 반환합니다.
+
+        모든 텍스트가 캐시에 있으면 encode_fn을 호출하지 않으므로 모델 로드도 일어나지 않습니다.
+        """
+        single = isinstance(texts, str)
+        items = [texts] if single else list(texts)
+        keys = [self._key(text) for text in items]
+
+        with self._lock:
+            vectors = [self._load(key) for key in keys]
+            missing = [index for index, vector in enumerate(vectors) if vector is None]
+            self.hits += len(items) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            started_at = time.perf_counter()
+            encoded = encode_fn([items[index] for index in missing])
+            elapsed = time.perf_counter() - started_at
+
+            with self._lock:
+                self.encode_seconds += elapsed
+                for index, vector in zip(missing, encoded):
+                    vector = np.asarray(vector, dtype=np.float32)
+                    self._store(keys[index], vector)
+                    vectors[index] = vector
+                if self.cache_dir:
+                    self._evict_disk()
+
+        logger.info(f"[Embedding Cache] {self.stats()}")
+        return vectors[0] if single else np.stack(vectors)
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        with self._lock:
+            hits, misses, encode_seconds = self.hits, self.misses, self.encode_seconds
+            memory_entries = len(self._memory)
+        total = hits + misses
+        average_encode = encode_seconds / misses if misses else 0.0
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 3) if total else 0.0,
+            'memory_entries': memory_entries,
+            'encode_seconds': round(encode_seconds, 3),
+            'saved_seconds_estimate': round(hits * average_encode, 3),
+        }
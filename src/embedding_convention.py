@@ -1,87 +1,148 @@
-from sentence_transformers import SentenceTransformer
-import chromadb
+#!/usr/bin/env python3
+"""스타일 가이드 규칙 임베딩 인덱스 빌드 스크립트.
+
+src/style_guide/<lang>_style_rules.json 파일을 모두 찾아 <lang>_style_rules 컬렉션에 upsert합니다.
+규칙마다 content hash를 메타데이터로 저장해 두고, 내용이 바뀐 규칙만 한 번에 batch encode합니다.
+여러 번 실행해도 안전하며(idempotent), 변경이 없으면 임베딩 모델도 로드하지 않습니다.
+
+    python src/embedding_convention.py --chroma-db-path ./chroma_db
+    python src/embedding_convention.py --backend numpy --rule-index-path ./rule_index
+"""
+import argparse
+import glob
+import hashlib
 import json
-from chromadb import PersistentClient
-import logging
-
-# Load style rules JSON
-with open("src/style_guide/java_style_rules.json", encoding="utf-8") as f:
-    java_data = json.load(f)
-java_rules = java_data["java_style_guide_rules"]
-
-with open("src/style_guide/swift_style_rules.json", encoding="utf-8") as f:
-    swift_data = json.load(f)
-swift_rules = swift_data["swift_style_guide_rules"]
-
-# Load model
-model = SentenceTransformer("microsoft/codebert-base")
-
-# Setup ChromaDB
-try:
-    # 클라이언트 생성
-    client = PersistentClient(path="./chroma_db", settings=chromadb.Settings(
-        anonymized_telemetry=False,
-        allow_reset=True
-    ))
-    
-    # 연결 테스트
-    try:
-        collections = client.list_collections()
-        print(f"ChromaDB 연결 성공: {len(collections)} 개의 컬렉션 발견")
-    except Exception as e:
-        print(f"ChromaDB 연결 테스트 실패: {str(e)}")
-        raise
-
-    # Create separate collections for Java and Swift rules
-    java_collection = client.create_collection(
-        name="java_style_rules",
-        metadata={"hnsw:space": "cosine"},
-        embedding_function=None  # sentence-transformers를 직접 사용하므로 None
-    )
-    print("=== Java 컬렉션 생성 완료 ===")
-
-    swift_collection = client.create_collection(
-        name="swift_style_rules",
-        metadata={"hnsw:space": "cosine"},
-        embedding_function=None  # sentence-transformers를 직접 사용하므로 None
-    )
-    print("=== Swift 컬렉션 생성 완료 ===")
-
-    # 컬렉션 목록 확인
-    collections = client.list_collections()
-    print(f"생성된 컬렉션 목록: {collections}")
-
-except Exception as e:
-    print(f"ChromaDB 초기화 실패: {str(e)}")
-    raise
-
-# Embed and store Java rules
-for rule in java_rules:
-    doc = f"{rule['title']}\n{rule['rule']}"
-    emb = model.encode(doc).tolist()
-    java_collection.add(
-        documents=[doc],
-        embeddings=[emb],
-        ids=[rule["id"]],
-        metadatas=[{
-            "category": rule["category"],
-            "subcategory": rule["subcategory"],
-            "title": rule["title"]
-        }]
-    )
-
-# Embed and store Swift rules
-for rule in swift_rules:
-    doc = f"{rule['title']}\n{rule['rule']}"
-    emb = model.encode(doc).tolist()
-    swift_collection.add(
-        documents=[doc],
-        embeddings=[emb],
-        ids=[rule["id"]],
-        metadatas=[{
-            "category": rule["category"],
-            "subcategory": rule["subcategory"],
-            "title": rule["title"]
-        }]
-    )
-print("✅ Embedding complete and saved.")
+import os
+from typing import Any, Dict, List
+
+from loguru import logger
+
+EMBEDDING_MODEL_NAME = "microsoft/codebert-base"
+STYLE_GUIDE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "style_guide")
+RULES_FILE_SUFFIX = "_style_rules.json"
+
+
+def discover_rule_files(style_guide_dir: str = STYLE_GUIDE_DIR) -> Dict[str, str]:
+    """<lang>_style_rules.json 파일을 찾아 {언어: 경로}로 반환합니다."""
+    rule_files = {}
+    for path in sorted(glob.glob(os.path.join(style_guide_dir, f"*{RULES_FILE_SUFFIX}"))):
+        language = os.path.basename(path)[:-len(RULES_FILE_SUFFIX)]
+        rule_files[language] = path
+    return rule_files
+
+
+def load_rules(language: str, path: str) -> List[Dict[str, Any]]:
+    """규칙 파일에서 <lang>_style_guide_rules 목록을 읽어옵니다."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return data[f"{language}_style_guide_rules"]
+
+
+def rule_document(rule: Dict[str, Any]) -> str:
+    return f"{rule['title']}\n{rule['rule']}"
+
+
+def rule_metadata(rule: Dict[str, Any]) -> Dict[str, str]:
+    metadata = {
+        "category": rule["category"],
+        "subcategory": rule["subcategory"],
+        "title": rule["title"]
+    }
+    # 임베딩 모델이 바뀌어도 다시 임베딩되도록 모델명을 해시에 포함합니다.
+    payload = json.dumps([EMBEDDING_MODEL_NAME, rule_document(rule), metadata], ensure_ascii=False, sort_keys=True)
+    metadata["content_hash"] = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return metadata
+
+
+class RuleIndexBuilder:
+    """규칙 파일을 규칙 인덱스(ChromaDB 또는 NumPy) 컬렉션과 동기화합니다."""
+
+    def __init__(self, chroma_db_path: str = "./chroma_db", style_guide_dir: str = STYLE_GUIDE_DIR,
+                 batch_size: int = 32, backend: str = "chroma", rule_index_path: str = "./rule_index"):
+        self.style_guide_dir = style_guide_dir
+        self.batch_size = batch_size
+        if backend == "numpy":
+            from rule_index import NumpyRuleIndex
+            self.client = NumpyRuleIndex(rule_index_path)
+        else:
+            import chromadb
+            self.client = chromadb.PersistentClient(path=chroma_db_path, settings=chromadb.Settings(
+                anonymized_telemetry=False,
+                allow_reset=True
+            ))
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            logger.info(f"임베딩 모델 로드: {EMBEDDING_MODEL_NAME}")
+            self._model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+        return self._model
+
+    def build(self) -> Dict[str, Dict[str, int]]:
+        """모든 언어의 규칙 컬렉션을 동기화하고 언어별 변경 통계를 반환합니다."""
+        summary = {}
+        for language, path in discover_rule_files(self.style_guide_dir).items():
+            summary[language] = self.sync_language(language, load_rules(language, path))
+        return summary
+
+    def sync_language(self, language: str, rules: List[Dict[str, Any]]) -> Dict[str, int]:
+        """한 언어의 규칙을 컬렉션과 비교하여 변경된 규칙만 upsert하고 삭제된 규칙을 제거합니다."""
+        collection = self.client.get_or_create_collection(
+            name=f"{language}_style_rules",
+            metadata={"hnsw:space": "cosine"},
+            embedding_function=None  # sentence-transformers를 직접 사용하므로 None
+        )
+
+        existing = collection.get(include=["metadatas"])
+        existing_hashes = {
+            rule_id: (metadata or {}).get("content_hash")
+            for rule_id, metadata in zip(existing["ids"], existing["metadatas"])
+        }
+
+        changed = []
+        for rule in rules:
+            metadata = rule_metadata(rule)
+            if existing_hashes.get(rule["id"]) != metadata["content_hash"]:
+                changed.append((rule, metadata))
+
+        removed = sorted(set(existing_hashes) - {rule["id"] for rule in rules})
+        if removed:
+            collection.delete(ids=removed)
+
+        if changed:
+            documents = [rule_document(rule) for rule, _ in changed]
+            embeddings = self.model.encode(documents, batch_size=self.batch_size)
+            collection.upsert(
+                ids=[rule["id"] for rule, _ in changed],
+                documents=documents,
+                embeddings=[embedding.tolist() for embedding in embeddings],
+                metadatas=[metadata for _, metadata in changed]
+            )
+
+        stats = {"total": len(rules), "embedded": len(changed), "removed": len(removed)}
+        logger.info(f"[{language}] 규칙 인덱스 동기화 완료: {stats}")
+        return stats
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build the style rule embedding index")
+    parser.add_argument("--chroma-db-path", default="./chroma_db", help="ChromaDB persistent directory")
+    parser.add_argument("--style-guide-dir", default=STYLE_GUIDE_DIR, help="Directory of <lang>_style_rules.json files")
+    parser.add_argument("--batch-size", type=int, default=32, help="Encoding batch size")
+    parser.add_argument("--backend", choices=["chroma", "numpy"], default="chroma", help="Rule index backend")
+    parser.add_argument("--rule-index-path", default="./rule_index", help="Directory for the numpy rule index")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    builder = RuleIndexBuilder(args.chroma_db_path, args.style_guide_dir, args.batch_size,
+                               backend=args.backend, rule_index_path=args.rule_index_path)
+    summary = builder.build()
+    logger.info(f"✅ 규칙 인덱스 빌드 완료: {summary}")
+
+
+if __name__ == "__main__":
+    main()
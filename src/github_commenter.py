@@ -1,25 +1,71 @@
 from github import Github
 from loguru import logger
+from diff_parser import DiffPositionIndex
+from log_config import payload
+from review_findings import Finding, ReviewFindings, SEVERITY_ORDER
+from review_formatter import ReviewFormatter
+import json
 import os
-from typing import Dict, List, Any
+import re
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+REVIEW_STATE_PATTERN = re.compile(r'<!-- code-review-head-sha: ([0-9a-fA-F]+) -->')
+REVIEWED_FILES_PATTERN = re.compile(r'<!-- code-review-files: (\[.*?\]) -->')
 
 
 class GitHubCommenter:
     def __init__(self, repo: str, pr_number: int):
         self.repo = repo
         self.pr_number = pr_number
-        self.github = Github(os.getenv("GITHUB_TOKEN"))
+        self.github = Github(os.getenv("GITHUB_TOKEN"), base_url=GITHUB_API_URL)
         self.repo_obj = self.github.get_repo(repo)
         self.pr = self.repo_obj.get_pull(pr_number)
+        self._existing_comment = None
+
+    def get_previous_review(self) -> Tuple[Optional[str], str]:
+        """기존 봇 코멘트에서 마지막으로 리뷰한 head SHA와 리포트 본문을 가져옵니다."""
+        existing_comment = self._find_existing_bot_comment()
+        if not existing_comment:
+            return None, ""
+
+        match = REVIEW_STATE_PATTERN.search(existing_comment.body)
+        head_sha = match.group(1) if match else None
+        logger.info(f"[Incremental] 이전 리뷰 head SHA: {head_sha}")
+        return head_sha, existing_comment.body
+
+    @staticmethod
+    def parse_reviewed_files(report: str) -> Set[str]:
+        """이전 리포트의 숨김 마커에서 리뷰를 마친 파일 목록을 가져옵니다 (이슈가 없어 섹션이 없는 파일 포함)."""
+        match = REVIEWED_FILES_PATTERN.search(report or "")
+        if not match:
+            return set()
+        try:
+            return set(json.loads(match.group(1)))
+        except ValueError:
+            logger.warning("[Incremental] 리뷰 파일 목록 마커를 해석할 수 없습니다.")
+            return set()
+
+    def post_unified_report(self, report: str, head_sha: Optional[str] = None,
+                            reviewed_files: Optional[List[str]] = None) -> None:
+        """통합 리포트를 GitHub PR에 코멘트로 게시합니다.
 
-    def post_unified_report(self, report: str) -> None:
-        """통합 리포트를 GitHub PR에 코멘트로 게시합니다."""
+        head_sha가 주어지면 다음 증분 리뷰를 위해 코멘트에 숨김 마커로 기록합니다.
+        reviewed_files도 함께 기록하여, 이슈가 없어 섹션이 생략된 파일과 리포트에서 빠진 파일을 구분합니다.
+        """
         try:
             logger.info(f"=== 통합 리포트 게시 시작: PR #{self.pr_number} ===")
-            logger.debug(f"[DEBUG] 리포트 내용: {report}")
+            logger.debug(f"[DEBUG] 리포트 내용: {payload(report, 'report')}")
+
+            if head_sha:
+                report = f"{report}\n<!-- code-review-head-sha: {head_sha} -->\n"
+                if reviewed_files is not None:
+                    # 파일 경로에 '>'가 있어도 HTML 주석이 끝나지 않도록 이스케이프합니다.
+                    files_json = json.dumps(list(reviewed_files), ensure_ascii=False).replace(">", "\\u003e")
+                    report += f"<!-- code-review-files: {files_json} -->\n"
 
             # 기존 봇 코멘트가 있는지 확인
-            existing_comment = self._find_existing_bot_comment()
+            existing_comment = self._existing_comment or self._find_existing_bot_comment()
             
             if existing_comment:
                 # 기존 코멘트 업데이트
@@ -34,6 +80,73 @@ class GitHubCommenter:
             logger.error(f"Error posting unified report: {str(e)}")
             raise
 
+    def post_inline_review(self, findings: ReviewFindings, index: DiffPositionIndex, head_sha: Optional[str] = None,
+                           max_comments: int = 50, max_distance: int = 3) -> Dict[str, int]:
+        """findings를 diff position 인덱스로 배치하여 create_review 한 번으로 인라인 코멘트를 게시합니다.
+
+        diff에 없는 줄은 max_distance 줄 이내의 가장 가까운 diff 줄로 옮기고, 그래도 없거나
+        max_comments를 넘는 finding(심각도/신뢰도가 낮은 순으로)은 리뷰 본문에 목록으로 접어 넣습니다.
+        head_sha가 주어지면 그 커밋 기준으로 게시하여 추출 이후 push가 있어도 position이 어긋나지 않습니다.
+        봇이 이미 게시했고 현재 diff에 아직 표시되는 같은 코멘트는 다시 게시하지 않으며,
+        새 인라인 코멘트가 없으면 리뷰를 만들지 않습니다 (접힌 finding은 통합 리포트에 이미 있음).
+        """
+        formatter = ReviewFormatter()
+        ordered = sorted(findings.findings, key=lambda f: (SEVERITY_ORDER.index(f.severity), -f.confidence))
+
+        comments: Dict[Tuple[str, int], List[str]] = {}
+        folded: List[Finding] = []
+        reanchored = 0
+        for finding in ordered:
+            anchor = index.anchor(finding.file, finding.line, max_distance=max_distance)
+            if anchor is None or (len(comments) >= max_comments and (finding.file, anchor[1]) not in comments):
+                folded.append(finding)
+                continue
+            line, position = anchor
+            body = formatter.render_inline_comment(finding)
+            if line != finding.line:
+                reanchored += 1
+                body += f"\n\n_(원래 {finding.line}번째 줄은 diff에 없어 가장 가까운 변경 줄에 표시했습니다.)_"
+            comments.setdefault((finding.file, position), []).append(body)
+
+        posted = self._existing_inline_comments()
+        review_comments = []
+        for (path, position), bodies in comments.items():
+            comment_body = "\n\n---\n\n".join(bodies)
+            if (path, comment_body) not in posted:
+                review_comments.append({"path": path, "position": position, "body": comment_body})
+
+        stats = {"inline": len(review_comments), "reanchored": reanchored, "folded": len(folded),
+                 "already_posted": len(comments) - len(review_comments)}
+        if not review_comments:
+            logger.info(f"[Inline Review] 새로 게시할 인라인 코멘트가 없습니다: {stats}")
+            return stats
+
+        body = f"🔍 코드 리뷰: 인라인 코멘트 {len(review_comments)}개"
+        if folded:
+            body += "\n\n" + formatter.render_folded_findings(folded)
+
+        try:
+            options = {"commit": self.repo_obj.get_commit(head_sha)} if head_sha else {}
+            self.pr.create_review(body=body, event="COMMENT", comments=review_comments, **options)
+        except Exception as e:
+            logger.error(f"Error posting inline review: {str(e)}")
+            raise
+        logger.info(f"[Inline Review] 게시 완료: {stats}")
+        return stats
+
+    def _existing_inline_comments(self) -> Set[Tuple[str, str]]:
+        """봇이 이전 실행에서 게시한 인라인 코멘트 중 현재 diff에 아직 표시되는 것의 (파일 경로, 본문)."""
+        try:
+            bot_login = self.github.get_user().login
+            return {
+                (comment.path, comment.body) for comment in self.pr.get_review_comments()
+                # 이후 push로 해당 줄이 바뀐 코멘트는 position이 null(outdated)이 되므로 다시 게시합니다.
+                if comment.user.login == bot_login and comment.position is not None
+            }
+        except Exception as e:
+            logger.warning(f"기존 인라인 코멘트 검색 중 오류: {str(e)}")
+            return set()
+
     def _find_existing_bot_comment(self):
         """기존 봇 코멘트를 찾습니다."""
         try:
@@ -43,6 +156,7 @@ class GitHubCommenter:
             for comment in comments:
                 if (comment.user.login == bot_login and 
                     "🔍 코드 리뷰 결과" in comment.body):
+                    self._existing_comment = comment
                     return comment
             return None
             
@@ -0,0 +1,25 @@
+import requests
+from requests.adapters import HTTPAdapter
+from loguru import logger
+
+
+def create_http_session(pool_connections: int = 4, pool_maxsize: int = 4, pool_block: bool = True) -> requests.Session:
+    """Keep-alive 커넥션 풀을 사용하는 HTTP 세션을 생성합니다.
+
+    pool_connections는 캐시할 호스트별 풀 개수, pool_maxsize는 호스트당 최대 커넥션 수입니다.
+    pool_block=True이면 호스트당 커넥션 수가 pool_maxsize를 넘지 않도록 요청을 대기시킵니다.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({
+        'Connection': 'keep-alive',
+        'User-Agent': 'CodeReview-Bot/1.0'
+    })
+    logger.info(f"HTTP 커넥션 풀 생성 (pools={pool_connections}, maxsize={pool_maxsize}, block={pool_block})")
+    return session
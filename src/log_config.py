@@ -0,0 +1,116 @@
+import atexit
+import copy
+import hashlib
+import queue
+import sys
+import threading
+from typing import Any, List, Optional
+
+from loguru import logger
+
+LOG_FILE = "logs/code_review.log"
+DEFAULT_PAYLOAD_LIMIT = 2048
+
+_payload_limit = DEFAULT_PAYLOAD_LIMIT
+_payload_spool_enabled = False
+_queued_sinks: List["QueuedSink"] = []
+
+
+def _is_payload_dump(record) -> bool:
+    return record["extra"].get("payload_dump", False)
+
+
+class QueuedSink:
+    """포맷된 로그 문자열만 큐에 넣고 실제 쓰기(터미널/파일 I/O, rotation)는 백그라운드 스레드에서 처리하는 sink.
+
+    loguru의 enqueue=True는 레코드마다 pickle + 파이프 쓰기를 하므로, 같은 프로세스 안에서는
+    스레드 큐가 호출 스레드 비용이 더 작습니다. 실제 sink는 핸들러가 없는 logger 복사본에 등록합니다.
+    """
+
+    def __init__(self, sink, **options):
+        self._writer = copy.deepcopy(logger)
+        self._writer.add(sink, format="{message}", **options)
+        self._queue: "queue.SimpleQueue[Optional[str]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._drain, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, message) -> None:
+        self._queue.put(str(message))
+
+    def _drain(self) -> None:
+        while True:
+            message = self._queue.get()
+            if message is None:
+                return
+            self._writer.opt(raw=True).info(message)
+
+    def stop(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        self._writer.remove()
+
+
+def shutdown_logging() -> None:
+    """대기 중인 로그를 모두 쓰고 백그라운드 writer를 종료합니다. (프로세스 종료 시 자동 호출)"""
+    logger.remove()
+    while _queued_sinks:
+        _queued_sinks.pop().stop()
+
+
+atexit.register(shutdown_logging)
+
+
+def setup_logging(log_file: str = LOG_FILE, enqueue: bool = True, payload_limit: int = DEFAULT_PAYLOAD_LIMIT,
+                  payload_spool: Optional[str] = None, level: str = "DEBUG") -> None:
+    """stderr와 로그 파일 sink를 설정합니다.
+
+    enqueue=True이면 sink 쓰기를 QueuedSink의 백그라운드 스레드에서 처리하여 로그 호출이 디스크/터미널 I/O를 기다리지 않습니다.
+    payload()로 감싼 프롬프트/diff/응답은 payload_limit 글자를 넘으면 길이와 해시만 남기고,
+    payload_spool이 주어지면 전체 내용을 그 파일에만 따로 기록합니다.
+    """
+    global _payload_limit, _payload_spool_enabled
+    _payload_limit = payload_limit
+    _payload_spool_enabled = bool(payload_spool)
+
+    sinks = [
+        (sys.stderr, enqueue, {}, {"level": level, "colorize": sys.stderr.isatty(),
+                                   "filter": lambda record: not _is_payload_dump(record)}),
+        (log_file, enqueue, {"rotation": "1 day", "retention": "7 days"},
+         {"level": level, "filter": lambda record: not _is_payload_dump(record)}),
+    ]
+    if payload_spool:
+        sinks.append((payload_spool, True, {"rotation": "100 MB", "retention": 3}, {
+            "filter": _is_payload_dump,
+            "format": "{time:YYYY-MM-DD HH:mm:ss.SSS} | {extra[label]} | {extra[digest]}\n{message}\n",
+        }))
+
+    # QueuedSink는 핸들러가 없는 logger를 복사하므로 모든 writer를 만든 뒤에 핸들러를 등록합니다.
+    shutdown_logging()
+    handlers = []
+    for sink, queued, file_options, handler_options in sinks:
+        if queued:
+            queued_sink = QueuedSink(sink, **file_options)
+            _queued_sinks.append(queued_sink)
+            handlers.append((queued_sink.write, handler_options))
+        else:
+            handlers.append((sink, {**file_options, **handler_options}))
+    for sink, handler_options in handlers:
+        logger.add(sink, **handler_options)
+
+
+def payload(text: Any, label: str = "payload") -> str:
+    """로그 메시지에 넣을 payload 표현을 반환합니다.
+
+    payload_limit 이하이면 그대로, 넘으면 `<N chars, sha256:...>`만 반환합니다.
+    spool 파일이 설정되어 있으면 전체 내용을 해시와 함께 spool에 기록하므로 해시로 찾아볼 수 있습니다.
+    """
+    text = text if isinstance(text, str) else str(text)
+    if len(text) <= _payload_limit and not _payload_spool_enabled:
+        return text
+
+    digest = hashlib.sha256(text.encode("utf-8", errors="replace")).hexdigest()[:16]
+    if _payload_spool_enabled:
+        logger.bind(payload_dump=True, label=label, digest=digest).debug(text)
+    if len(text) <= _payload_limit:
+        return text
+    return f"<{len(text)} chars, sha256:{digest}>"
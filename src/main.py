@@ -1,16 +1,116 @@
 #!/usr/bin/env python3
 import argparse
+import asyncio
+import contextvars
 import os
+import threading
+import time
 from loguru import logger
 from dotenv import load_dotenv
 
-from pr_extractor import PRExtractor
-from codellama_reviewer import CodeLlamaReviewer
+from pr_extractor import PRExtractor, LocalGitExtractor
+from diff_parser import DiffPositionIndex
+from codellama_reviewer import CONVENTION_FILE_EXTENSIONS, CodeLlamaReviewer, SYSTEM_PROMPT
+from prompt.xmlStyle import PROMPT_LAYOUTS, STRUCTURED_PROMPT_LAYOUTS
+from prompt_packer import PromptPacker, TokenCounter
+from response_cache import ResponseCache
 from review_formatter import ReviewFormatter
+from review_metrics import ReviewMetrics, span
 from github_commenter import GitHubCommenter
+import log_config
+from log_config import payload
 
-def setup_logging():
-    logger.add("logs/code_review.log", rotation="1 day", retention="7 days")
+def setup_logging(args):
+    log_config.setup_logging(
+        enqueue=not args.sync_logging,
+        payload_limit=args.log_payload_limit,
+        payload_spool=args.log_payload_spool
+    )
+
+def add_review_arguments(parser):
+    """리뷰 파이프라인 옵션을 등록합니다. (main.py와 review_server.py가 함께 사용)"""
+    parser.add_argument("--api-url", required=True,
+                        help="Ollama API URL (comma-separated list to balance requests across several servers)")
+    parser.add_argument("--health-check-interval", type=float, default=30.0,
+                        help="Seconds between /api/tags health checks of each Ollama endpoint")
+    parser.add_argument("--eject-seconds", type=float, default=30.0,
+                        help="How long a repeatedly failing Ollama endpoint is taken out of rotation")
+    parser.add_argument("--parallel", action="store_true", help="Review each file concurrently and merge the results")
+    parser.add_argument("--max-workers", type=int, default=3, help="Maximum concurrent review requests")
+    parser.add_argument("--stream", action="store_true", help="Stream generation from Ollama and record TTFT metrics")
+    parser.add_argument("--stream-timeout", type=int, default=60, help="Inactivity timeout between streamed chunks (seconds)")
+    parser.add_argument("--keep-alive", default=None,
+                        help="How long Ollama keeps the model loaded after a request (e.g. 30m, -1 for forever; "
+                             "default: server setting)")
+    parser.add_argument("--num-ctx", type=int, default=None,
+                        help="Ollama context window (default: --context-window with --pack-prompts/--reuse-context, "
+                             "otherwise the model setting)")
+    parser.add_argument("--num-predict", type=int, default=None,
+                        help="Maximum generated tokens (default: --max-output-tokens with --pack-prompts/--reuse-context, "
+                             "otherwise the model setting)")
+    parser.add_argument("--temperature", type=float, default=None, help="Sampling temperature (default: model setting)")
+    parser.add_argument("--stop", action="append", default=None, help="Stop sequence (repeatable)")
+    parser.add_argument("--preload", action="store_true",
+                        help="Load the model into every Ollama endpoint at startup (overlaps PR extraction)")
+    parser.add_argument("--cache-dir", default="./.review_cache", help="Directory for cached LLM review responses")
+    parser.add_argument("--cache-ttl", type=int, default=7 * 24 * 3600, help="Response cache TTL (seconds)")
+    parser.add_argument("--cache-max-entries", type=int, default=500, help="Maximum number of cached responses")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the response cache")
+    parser.add_argument("--embedding-cache-dir", default="./.review_cache/embeddings",
+                        help="Directory for persisted convention-query embeddings (empty to keep them in memory only)")
+    parser.add_argument("--embedding-cache-max-entries", type=int, default=10000,
+                        help="Maximum number of cached embeddings (memory and disk, LRU)")
+    parser.add_argument("--rule-index-backend", choices=["chroma", "numpy"], default="chroma",
+                        help="Vector index backend for convention rules")
+    parser.add_argument("--rule-index-path", default="./rule_index", help="Directory of the numpy rule index")
+    parser.add_argument("--pack-prompts", action="store_true",
+                        help="Bin-pack files into as few prompts as fit the model context window")
+    parser.add_argument("--context-window", type=int, default=32768, help="Model context window in tokens")
+    parser.add_argument("--max-output-tokens", type=int, default=4096, help="Tokens reserved for the review output")
+    parser.add_argument("--prompt-layout", choices=sorted(PROMPT_LAYOUTS), default="diff-first",
+                        help="prefix-stable puts the fixed instructions first so Ollama reuses their KV cache across requests")
+    parser.add_argument("--reuse-context", action="store_true",
+                        help="Review multi-unit PRs (--parallel/--pack-prompts) sequentially, passing each response's "
+                             "Ollama context to the next request instead of resending the instructions")
+    parser.add_argument("--structured-output", action="store_true",
+                        help="Constrain the model to JSON findings (Ollama format schema) and render Markdown from them")
+    parser.add_argument("--inline-comments", action="store_true",
+                        help="Also post structured findings as inline review comments in one review (implies --structured-output)")
+    parser.add_argument("--max-inline-comments", type=int, default=50,
+                        help="Findings beyond this many inline comments are listed in the review body")
+    parser.add_argument("--min-confidence", type=int, default=1, choices=range(1, 6),
+                        help="Drop structured findings below this confidence (1-5)")
+    parser.add_argument("--tokenizer", default=None,
+                        help="Hugging Face tokenizer for exact token counts (default: character-based estimate)")
+    parser.add_argument("--extract-source", choices=["api", "diff", "git"], default="api",
+                        help="Extract changes via paged files API, a single unified diff download, or a local git clone")
+    parser.add_argument("--repo-path", default=".", help="Local clone used by --extract-source git")
+    parser.add_argument("--context-lines", type=int, default=3, help="Diff context lines for --extract-source git")
+    parser.add_argument("--no-renames", action="store_true", help="Disable rename detection for --extract-source git")
+    parser.add_argument("--fetch-missing-patches", action="store_true",
+                        help="Fetch contents and diff locally for files whose patch GitHub omits")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only re-review files changed since the last reviewed head SHA")
+    parser.add_argument("--metrics-file", default="logs/review_metrics.jsonl",
+                        help="JSON Lines file receiving per-review stage timings and token counters (empty to disable)")
+    parser.add_argument("--log-payload-limit", type=int, default=log_config.DEFAULT_PAYLOAD_LIMIT,
+                        help="Log prompts/diffs/responses longer than this many characters as length + hash only")
+    parser.add_argument("--log-payload-spool", default=None,
+                        help="Write full prompts/diffs/responses to this separate spool file")
+    parser.add_argument("--sync-logging", action="store_true",
+                        help="Write log sinks synchronously instead of through a background queue")
+    parser.add_argument("--prometheus-textfile", default=None,
+                        help="Write cumulative metrics in Prometheus text format (node_exporter textfile collector)")
+
+def check_review_arguments(parser, args):
+    """함께 쓸 수 없는 리뷰 옵션 조합을 거부합니다."""
+    if args.inline_comments and args.incremental:
+        # 증분 리뷰는 이전 리포트의 Markdown을 이어받으므로 인라인 코멘트로 옮길 findings가 없습니다.
+        parser.error("--inline-comments cannot be combined with --incremental")
+    if args.inline_comments and args.extract_source == "git":
+        # 로컬 git diff의 position(--context-lines, diff 알고리즘)은 GitHub PR diff와 다를 수 있습니다.
+        parser.error("--inline-comments requires the GitHub diff (--extract-source api or diff)")
+    return args
 
 def parse_args():
     parser = argparse.ArgumentParser(description="GitHub PR Code Review System")
@@ -18,39 +118,330 @@ def parse_args():
     parser.add_argument("--pr-number", required=True, type=int, help="Pull request number")
     parser.add_argument("--base-sha", required=True, help="Base commit SHA")
     parser.add_argument("--head-sha", required=True, help="Head commit SHA")
-    parser.add_argument("--api-url", required=True, help="Ollama API URL")
-    return parser.parse_args()
+    add_review_arguments(parser)
+    parser.add_argument("--async-pipeline", action="store_true",
+                        help="Run extraction, model load, index open and Ollama health check concurrently")
+    return check_review_arguments(parser, parser.parse_args())
+
+def run_incremental_review(extractor, reviewer, formatter, github_commenter, pr_data, head_sha):
+    """이전 리뷰 이후 변경된 파일만 리뷰하고 나머지 파일의 결과는 이어받습니다.
+
+    증분 리뷰를 할 수 없으면 None을 반환하여 전체 리뷰로 대체합니다.
+    """
+    previous_sha, previous_report = github_commenter.get_previous_review()
+    if not previous_sha:
+        logger.info("[Incremental] 이전 리뷰 기록이 없어 전체 리뷰를 수행합니다.")
+        return None
+
+    previous_reviews = formatter.parse_file_sections(previous_report)
+    if not previous_reviews and "NO ISSUE" not in previous_report:
+        logger.info("[Incremental] 이전 리포트에 파일별 결과가 없어 전체 리뷰를 수행합니다.")
+        return None
+
+    # 이전 버전이 --pack-prompts로 여러 파일을 묶어 리뷰한 섹션("a.java, b.java")은 파일별로 이어받을 수 없습니다.
+    unknown_sections = [name for name in previous_reviews if name not in extractor.changed_files]
+    if unknown_sections:
+        logger.info(f"[Incremental] 변경 파일과 맞지 않는 이전 섹션이 있어 전체 리뷰를 수행합니다: {unknown_sections}")
+        return None
+
+    if previous_sha == head_sha:
+        changed = set()
+    else:
+        changed = extractor.get_changed_files_between(previous_sha, head_sha)
+        if changed is None:
+            return None
+
+    # 변경된 파일에 더해, 이전 리뷰가 실패했거나 이전 리포트에 결과가 없는 파일도 다시 리뷰합니다.
+    reviewed_files = github_commenter.parse_reviewed_files(previous_report)
+    targets = set()
+    for file_name in extractor.changed_files:
+        if file_name in changed:
+            targets.add(file_name)
+        elif file_name in previous_reviews:
+            if formatter.is_error_section(previous_reviews[file_name]):
+                targets.add(file_name)
+        elif file_name not in reviewed_files:
+            targets.add(file_name)
+    logger.info(f"[Incremental] 전체 {len(extractor.changed_files)}개 파일 중 {len(targets)}개 파일만 다시 리뷰합니다.")
+    new_reviews = reviewer.review_files(pr_data, targets)
+    return formatter.merge_file_reviews(extractor.changed_files, new_reviews, previous_reviews)
+
+def build_extractor(args):
+    """--extract-source에 맞는 PR 추출기를 생성합니다."""
+    if args.extract_source == "git":
+        return LocalGitExtractor(
+            args.repo_path,
+            args.base_sha,
+            args.head_sha,
+            context_lines=args.context_lines,
+            find_renames=not args.no_renames
+        )
+    return PRExtractor(args.repo, args.pr_number)
+
+def extract_pr_data(args, extractor):
+    with span("extraction"):
+        return extractor.extract_pr_data(
+            fetch_missing_patches=args.fetch_missing_patches,
+            source=args.extract_source,
+            base_sha=args.base_sha,
+            head_sha=args.head_sha
+        )
+
+def build_metrics(args):
+    return ReviewMetrics(metrics_file=args.metrics_file or None, prometheus_textfile=args.prometheus_textfile)
+
+def parse_keep_alive(value):
+    """숫자만 주어지면 초 단위로 보냅니다 (Ollama는 단위 없는 문자열을 거부)."""
+    if value is None:
+        return None
+    return int(value) if value.lstrip("-").isdigit() else value
+
+def build_reviewer(args, connect=True, http_pool_maxsize=None):
+    """CLI 옵션으로 CodeLlamaReviewer를 생성합니다. connect=False이면 Ollama 연결은 나중에 합니다.
+
+    http_pool_maxsize를 주지 않으면 호스트당 커넥션 수는 max_workers입니다.
+    """
+    response_cache = ResponseCache(
+        cache_dir=args.cache_dir,
+        max_entries=args.cache_max_entries,
+        ttl_seconds=args.cache_ttl,
+        bypass=args.no_cache
+    )
+    prompt_packer = None
+    if args.pack_prompts:
+        layouts = STRUCTURED_PROMPT_LAYOUTS if args.structured_output or args.inline_comments else PROMPT_LAYOUTS
+        fixed_prompt = (
+            layouts[args.prompt_layout]
+            .replace("{{CONVENTION_GUIDE_PLACEHOLDER}}", "")
+            .replace("{{PR_DIFF_PLACEHOLDER}}", "")
+        ) + SYSTEM_PROMPT
+        prompt_packer = PromptPacker(
+            TokenCounter(args.tokenizer),
+            fixed_prompt=fixed_prompt,
+            context_window=args.context_window,
+            reserved_output_tokens=args.max_output_tokens
+        )
+    # 패킹/context 재사용은 --context-window 기준으로 프롬프트를 나누므로 Ollama에도 같은 창을 요청합니다.
+    # 그 외에는 이전처럼 옵션을 보내지 않고 모델/서버 설정을 따릅니다.
+    budgeted = args.pack_prompts or args.reuse_context
+    return CodeLlamaReviewer(
+        api_url=args.api_url,
+        max_workers=args.max_workers,
+        http_pool_maxsize=http_pool_maxsize,
+        stream=args.stream,
+        stream_inactivity_timeout=args.stream_timeout,
+        response_cache=response_cache,
+        embedding_cache_dir=args.embedding_cache_dir or None,
+        embedding_cache_max_entries=args.embedding_cache_max_entries,
+        rule_index_backend=args.rule_index_backend,
+        rule_index_path=args.rule_index_path,
+        prompt_packer=prompt_packer,
+        health_check_interval=args.health_check_interval,
+        eject_seconds=args.eject_seconds,
+        keep_alive=parse_keep_alive(args.keep_alive),
+        generation_options={
+            "num_ctx": args.num_ctx or (args.context_window if budgeted else None),
+            "num_predict": args.num_predict or (args.max_output_tokens if budgeted else None),
+            "temperature": args.temperature,
+            "stop": args.stop,
+        },
+        preload=args.preload,
+        prompt_layout=args.prompt_layout,
+        reuse_context=args.reuse_context,
+        structured_output=args.structured_output or args.inline_comments,
+        min_confidence=args.min_confidence,
+        connect=connect
+    )
+
+def review_and_post(args, extractor, reviewer, github_commenter, pr_data):
+    """리뷰를 수행하고 통합 리포트를 GitHub에 게시합니다."""
+    formatter = ReviewFormatter()
+    head_sha = extractor.head_sha
+
+    review_results = None
+    findings = None
+    if args.incremental:
+        review_results = run_incremental_review(extractor, reviewer, formatter, github_commenter, pr_data, head_sha)
+        if review_results is None:
+            # 다음 증분 리뷰가 파일별로 이어받을 수 있도록 여러 파일을 묶지 않고 파일 단위로 리뷰합니다.
+            new_reviews = reviewer.review_files(pr_data, set(extractor.changed_files))
+            review_results = formatter.merge_file_reviews(extractor.changed_files, new_reviews, {})
+    if review_results is None and args.inline_comments:
+        findings, review_results = reviewer.review_findings(pr_data, parallel=args.parallel)
+    elif review_results is None:
+        review_results = reviewer.review_code(pr_data, parallel=args.parallel)
+    logger.info(f"[DEBUG] review_results: {payload(review_results, 'review_results')}")
+
+    # 통합 리포트 생성
+    with span("formatting"):
+        final_report = formatter.create_unified_report(review_results)
+    logger.info(f"[DEBUG] final_report: {payload(final_report, 'report')}")
+
+    # GitHub에 통합 리포트 게시
+    with span("posting"):
+        if args.incremental:
+            github_commenter.post_unified_report(final_report, head_sha=head_sha,
+                                                 reviewed_files=extractor.changed_files)
+        else:
+            github_commenter.post_unified_report(final_report)
+        if findings is not None:
+            # position 인덱스는 추출 때 받은 patch로 PR당 한 번만 만듭니다.
+            index = DiffPositionIndex.from_patches(extractor.patches)
+            github_commenter.post_inline_review(findings, index, head_sha=head_sha,
+                                                max_comments=args.max_inline_comments)
+    if len(reviewer.endpoint_pool) > 1:
+        logger.info(f"[Ollama Pool] 엔드포인트별 통계: {reviewer.endpoint_pool.stats()}")
+
+async def run_pipeline_async(args):
+    """독립적인 시작 단계(PR 추출, 임베딩 모델 로드, 벡터 인덱스 열기, Ollama 연결 확인)를 동시에 실행하고
+    리뷰에 필요한 입력(PR 데이터, Ollama 연결)이 준비되는 즉시 리뷰를 시작합니다."""
+    timings = {}
+    started_at = time.perf_counter()
+
+    async def stage(name, fn, *fn_args):
+        stage_started_at = time.perf_counter()
+        try:
+            return await asyncio.to_thread(fn, *fn_args)
+        finally:
+            timings[name] = time.perf_counter() - stage_started_at
+            logger.info(f"[Pipeline] {name} 완료 ({timings[name]:.2f}초)")
+
+    async def extract(extractor_task):
+        extractor = await extractor_task
+        pr_data = await stage("extraction", extract_pr_data, args, extractor)
+        return extractor, pr_data
+
+    async def needs_conventions(extractor_task):
+        """추출을 기다리지 않고 파일 경로만 조회해 Java/Swift 파일이 있는지 판단합니다. 판단할 수 없으면 None입니다."""
+        extractor = await extractor_task
+        try:
+            # 첫 Java/Swift 파일이 나오면 나머지 페이지를 기다리지 않습니다.
+            return await stage("file_listing", lambda: any(
+                file_name.endswith(CONVENTION_FILE_EXTENSIONS) for file_name in extractor.iter_file_names()
+            ))
+        except Exception as e:
+            logger.warning(f"[Pipeline] 파일 목록 조회 실패 - 추출 결과로 판단합니다: {str(e)}")
+            return None
+
+    def warm_up(name, fn):
+        """daemon 스레드에서 fn을 실행합니다. 실패해서 일찍 끝나도 프로세스가 모델 로드 완료를 기다리지 않습니다.
+
+        cancel_warm_up이 설정되면 아직 시작하지 않은 로드는 건너뜁니다 (진행 중인 import는 중단할 수 없음).
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        context = contextvars.copy_context()
+
+        def settle(result, error):
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+        def run():
+            stage_started_at = time.perf_counter()
+            result, error = None, None
+            try:
+                if not cancel_warm_up.is_set():
+                    result = context.run(fn)
+            except Exception as e:
+                error = e
+            timings[name] = time.perf_counter() - stage_started_at
+            logger.info(f"[Pipeline] {name} 완료 ({timings[name]:.2f}초)")
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(settle, result, error)
+
+        threading.Thread(target=run, name=f"pipeline-{name}", daemon=True).start()
+        return future
+
+    def start_warm_ups():
+        return [
+            warm_up("embedding_model_load", lambda: reviewer.model),
+            warm_up("vector_index_open", lambda: reviewer.client),
+        ]
+
+    reviewer = build_reviewer(args, connect=False)
+    cancel_warm_up = threading.Event()
+    startup_tasks = []
+    warm_up_tasks = []
+    try:
+        extractor_task = asyncio.create_task(stage("extractor_init", build_extractor, args))
+        extraction_task = asyncio.create_task(extract(extractor_task))
+        languages_task = asyncio.create_task(needs_conventions(extractor_task))
+        connect_task = asyncio.create_task(stage("ollama_connect", reviewer.connect))
+        commenter_task = asyncio.create_task(stage("commenter_init", GitHubCommenter, args.repo, args.pr_number))
+        startup_tasks = [extractor_task, extraction_task, languages_task, connect_task, commenter_task]
+
+        # 임베딩 모델과 벡터 인덱스는 Java/Swift 컨벤션 검색에만 필요하므로 파일 경로로 판단해
+        # 추출과 동시에 뒤에서 로드합니다 (리뷰가 먼저 필요로 하면 lock에서 대기).
+        # 경로를 미리 알 수 없으면 일단 로드를 시작하고, 추출 결과에 해당 파일이 없으면 취소합니다.
+        needed = await languages_task
+        if needed is not False:
+            warm_up_tasks = start_warm_ups()
+
+        extractor, pr_data = await extraction_task
+        logger.info(f"[DEBUG] pr_data: {payload(pr_data, 'pr_data')}")
+        if needed is None and not any(name.endswith(CONVENTION_FILE_EXTENSIONS) for name in extractor.changed_files):
+            logger.info("[Pipeline] 컨벤션 검색이 필요한 파일이 없어 백그라운드 로드를 취소합니다.")
+            cancel_warm_up.set()
+            for task in warm_up_tasks:
+                task.cancel()
+            warm_up_tasks = []
+        await connect_task
+        github_commenter = await commenter_task
+        timings["startup"] = time.perf_counter() - started_at
+
+        await stage("review_and_post", review_and_post, args, extractor, reviewer, github_commenter, pr_data)
+
+        for result in await asyncio.gather(*warm_up_tasks, return_exceptions=True):
+            if isinstance(result, Exception):
+                logger.warning(f"[Pipeline] 백그라운드 로드 실패: {str(result)}")
+    finally:
+        cancel_warm_up.set()
+        for task in warm_up_tasks:
+            task.cancel()
+        # 시작 단계가 실패해도 남은 단계(Ollama 연결 등)가 끝난 뒤 터널/커넥션을 정리합니다.
+        await asyncio.gather(*startup_tasks, return_exceptions=True)
+        reviewer.close()
+
+    total = time.perf_counter() - started_at
+    sequential = sum(value for name, value in timings.items() if name != "startup")
+    logger.info(
+        f"[Pipeline] 단계별 소요 시간: { {name: round(value, 2) for name, value in timings.items()} }, "
+        f"전체 {total:.2f}초 (순차 실행 합계 {sequential:.2f}초, 절약 {sequential - total:.2f}초)"
+    )
 
 def main():
     load_dotenv()
-    setup_logging()
     args = parse_args()
+    setup_logging(args)
+    metrics = build_metrics(args)
 
     try:
-        # PR 정보 추출
-        extractor = PRExtractor(args.repo, args.pr_number)
-        pr_data = extractor.extract_pr_data()
-        logger.info(f"[DEBUG] pr_data: {pr_data}")
-
-        # CodeLlama 모델을 사용한 코드 리뷰
-        reviewer = CodeLlamaReviewer(api_url=args.api_url)
-        review_results = reviewer.review_code(pr_data)
-        logger.info(f"[DEBUG] review_results: {review_results}")
-
-        # 통합 리포트 생성
-        formatter = ReviewFormatter()
-        final_report = formatter.create_unified_report(review_results)
-        logger.info(f"[DEBUG] final_report: {final_report}")
+        # asyncio.run과 to_thread는 컨텍스트를 복사하므로 비동기 파이프라인의 단계도 같은 trace에 기록됩니다.
+        with metrics.review(args.repo, args.pr_number):
+            if args.async_pipeline:
+                asyncio.run(run_pipeline_async(args))
+                logger.info("Code review completed successfully")
+                return
+
+            # PR 정보 추출
+            extractor = build_extractor(args)
+            pr_data = extract_pr_data(args, extractor)
+            logger.info(f"[DEBUG] pr_data: {payload(pr_data, 'pr_data')}")
 
-        # GitHub에 통합 리포트 게시
-        github_commenter = GitHubCommenter(args.repo, args.pr_number)
-        github_commenter.post_unified_report(final_report)
+            # CodeLlama 모델을 사용한 코드 리뷰
+            reviewer = build_reviewer(args)
+            github_commenter = GitHubCommenter(args.repo, args.pr_number)
+            review_and_post(args, extractor, reviewer, github_commenter, pr_data)
 
-        logger.info("Code review completed successfully")
+            logger.info("Code review completed successfully")
 
     except Exception as e:
         logger.error(f"Error during code review: {str(e)}")
         raise
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
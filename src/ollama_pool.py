@@ -0,0 +1,221 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, TypeVar
+
+from loguru import logger
+
+from http_client import create_http_session
+
+T = TypeVar("T")
+
+
+class OllamaEndpoint:
+    """Ollama 서버 하나의 상태와 요청 통계."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.healthy = True
+        self.models: Optional[Set[str]] = None  # None이면 아직 /api/tags를 확인하지 않은 상태
+        self.ejected_until = 0.0
+        self.consecutive_failures = 0
+
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.eval_count = 0
+        self.eval_duration_ns = 0
+        self.latencies = deque(maxlen=500)
+
+    def available(self, now: float) -> bool:
+        return self.healthy and now >= self.ejected_until
+
+    def has_model(self, model: Optional[str]) -> bool:
+        if model is None or self.models is None:
+            return True
+        # 태그를 생략한 모델명은 :latest로 취급합니다.
+        return model in self.models or (":" not in model and f"{model}:latest" in self.models)
+
+    def record_tokens(self, eval_count: Optional[int], eval_duration: Optional[int]) -> None:
+        if eval_count and eval_duration:
+            self.eval_count += eval_count
+            self.eval_duration_ns += eval_duration
+
+    def stats(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))], 3)
+
+        return {
+            "healthy": self.healthy,
+            "ejected": time.monotonic() < self.ejected_until,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "latency_p50": percentile(50),
+            "latency_p95": percentile(95),
+            "tokens_per_second": (
+                round(self.eval_count / (self.eval_duration_ns / 1e9), 1) if self.eval_duration_ns else None
+            ),
+        }
+
+
+class OllamaEndpointPool:
+    """여러 Ollama 서버에 generate 요청을 분산합니다.
+
+    요청한 모델을 가진 사용 가능한 엔드포인트 중 진행 중인 요청이 가장 적은 곳을 고르고,
+    max_failures번 연속 실패한 엔드포인트는 eject_seconds 동안 제외합니다.
+    request()로 보낸 요청이 실패하면 다른 사용 가능한 엔드포인트에서 한 번 더 시도합니다.
+    health_check_interval마다 백그라운드에서 /api/tags로 상태와 모델 목록을 갱신합니다.
+    """
+
+    def __init__(self, urls: List[str], health_check_interval: float = 30.0,
+                 eject_seconds: float = 30.0, max_failures: int = 2, health_check_timeout: float = 5.0):
+        if not urls:
+            raise ValueError("Ollama 엔드포인트가 하나 이상 필요합니다")
+        self.endpoints = [OllamaEndpoint(url) for url in urls]
+        # 상태 확인은 생성 요청용 풀(pool_block=True)과 따로 작은 비차단 풀을 써서
+        # 긴 생성 요청들이 커넥션을 모두 잡고 있어도 확인이 밀리지 않게 합니다.
+        self.session = create_http_session(pool_connections=len(self.endpoints), pool_maxsize=1, pool_block=False)
+        self.health_check_timeout = health_check_timeout
+        self.health_check_interval = health_check_interval
+        self.eject_seconds = eject_seconds
+        self.max_failures = max(1, max_failures)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._health_thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def _probe(self, endpoint: OllamaEndpoint) -> None:
+        try:
+            response = self.session.get(f"{endpoint.url}/api/tags", timeout=self.health_check_timeout)
+            response.raise_for_status()
+            models = {model.get("name") for model in response.json().get("models", [])}
+            with self._lock:
+                if not endpoint.healthy:
+                    logger.info(f"[Ollama Pool] {endpoint.url} 복구됨")
+                endpoint.models = models
+                endpoint.healthy = True
+        except Exception as e:
+            with self._lock:
+                if endpoint.healthy:
+                    logger.warning(f"[Ollama Pool] {endpoint.url} 상태 확인 실패: {str(e)}")
+                endpoint.healthy = False
+
+    def check_health(self) -> int:
+        """모든 엔드포인트의 /api/tags를 동시에 확인하고 정상 엔드포인트 수를 반환합니다."""
+        if len(self.endpoints) == 1:
+            self._probe(self.endpoints[0])
+        else:
+            # 응답하지 않는 서버 하나가 나머지 확인을 timeout만큼 늦추지 않도록 동시에 확인합니다.
+            with ThreadPoolExecutor(max_workers=len(self.endpoints), thread_name_prefix="ollama-probe") as executor:
+                list(executor.map(self._probe, self.endpoints))
+        return sum(endpoint.healthy for endpoint in self.endpoints)
+
+    def start_health_checks(self) -> None:
+        if self._health_thread is not None or self.health_check_interval <= 0:
+            return
+
+        def run():
+            while not self._stop.wait(self.health_check_interval):
+                self.check_health()
+
+        self._health_thread = threading.Thread(target=run, name="ollama-health-check", daemon=True)
+        self._health_thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        self.session.close()
+
+    def _select(self, model: Optional[str], exclude: Optional[Set[str]] = None) -> OllamaEndpoint:
+        now = time.monotonic()
+        candidates = [endpoint for endpoint in self.endpoints
+                      if endpoint.available(now) and not (exclude and endpoint.url in exclude)]
+        with_model = [endpoint for endpoint in candidates if endpoint.has_model(model)]
+        if with_model:
+            candidates = with_model
+        elif candidates:
+            logger.warning(f"[Ollama Pool] 모델 {model}을 가진 엔드포인트가 없어 전체 엔드포인트에서 선택합니다")
+        else:
+            # 모두 제외된 상태라면 가장 먼저 복귀할 엔드포인트로 시도합니다.
+            candidates = [min(self.endpoints, key=lambda endpoint: endpoint.ejected_until)]
+        return min(candidates, key=lambda endpoint: (endpoint.in_flight, endpoint.requests))
+
+    def get(self, url: Optional[str]) -> Optional[OllamaEndpoint]:
+        return next((endpoint for endpoint in self.endpoints if endpoint.url == url), None)
+
+    def is_available(self, url: Optional[str]) -> bool:
+        endpoint = self.get(url)
+        return endpoint is not None and endpoint.available(time.monotonic())
+
+    def can_fail_over(self, model: Optional[str], failed_url: str) -> bool:
+        """failed_url 말고 모델을 가진 사용 가능한 엔드포인트가 있는지 확인합니다."""
+        now = time.monotonic()
+        with self._lock:
+            return any(endpoint.url != failed_url and endpoint.available(now) and endpoint.has_model(model)
+                       for endpoint in self.endpoints)
+
+    def request(self, fn: Callable[[OllamaEndpoint], T], model: Optional[str] = None,
+                pinned_url: Optional[str] = None) -> T:
+        """엔드포인트를 골라 fn(endpoint)을 실행하고, 실패하면 다른 사용 가능한 엔드포인트에서 한 번 더 시도합니다.
+
+        pinned_url 요청은 그 서버의 context에 묶여 있으므로 다른 엔드포인트로 옮기지 않습니다.
+        """
+        failed_url = None
+        while True:
+            try:
+                with self.acquire(model, pinned_url=pinned_url,
+                                  exclude={failed_url} if failed_url else None) as endpoint:
+                    return fn(endpoint)
+            except Exception as e:
+                if pinned_url or failed_url or not self.can_fail_over(model, endpoint.url):
+                    raise
+                failed_url = endpoint.url
+                logger.warning(f"[Ollama Pool] {failed_url} 요청 실패, 다른 엔드포인트에서 다시 시도합니다: {str(e)}")
+
+    @contextmanager
+    def acquire(self, model: Optional[str] = None, pinned_url: Optional[str] = None,
+                exclude: Optional[Set[str]] = None) -> Iterator[OllamaEndpoint]:
+        """요청을 보낼 엔드포인트를 골라 진행 중 요청 수와 지연/실패 통계를 기록합니다.
+
+        pinned_url이 주어지면 그 엔드포인트를 사용합니다 (이전 응답의 context를 이어 보내는 요청).
+        exclude에 있는 엔드포인트는 고르지 않습니다 (실패한 요청을 다른 엔드포인트로 다시 보낼 때).
+        """
+        with self._lock:
+            endpoint = self.get(pinned_url) if pinned_url else None
+            if endpoint is None:
+                endpoint = self._select(model, exclude)
+            endpoint.in_flight += 1
+            endpoint.requests += 1
+        started_at = time.perf_counter()
+        try:
+            yield endpoint
+        except Exception:
+            with self._lock:
+                endpoint.failures += 1
+                endpoint.consecutive_failures += 1
+                if endpoint.consecutive_failures >= self.max_failures:
+                    endpoint.ejected_until = time.monotonic() + self.eject_seconds
+                    logger.warning(
+                        f"[Ollama Pool] {endpoint.url} 연속 {endpoint.consecutive_failures}회 실패, "
+                        f"{self.eject_seconds:.0f}초 동안 제외"
+                    )
+            raise
+        else:
+            with self._lock:
+                endpoint.consecutive_failures = 0
+                endpoint.latencies.append(time.perf_counter() - started_at)
+        finally:
+            with self._lock:
+                endpoint.in_flight -= 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {endpoint.url: endpoint.stats() for endpoint in self.endpoints}
@@ -1,35 +1,376 @@
 from github import Github
 from loguru import logger
+import base64
+import difflib
+import math
 import os
-from typing import Dict, List, Any
+import subprocess
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Set
+from diff_parser import iter_diff_lines, parse_unified_diff
+
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+# patch가 생략된 파일을 로컬 diff로 복원할 때의 한도 (difflib은 큰 입력에서 급격히 느려집니다)
+MAX_LOCAL_PATCH_CHANGES = 5000
+MAX_LOCAL_PATCH_BYTES = 1024 * 1024
 
 class PRExtractor:
     def __init__(self, repo: str, pr_number: int):
         self.repo = repo
         self.pr_number = pr_number
-        self.github = Github(os.getenv("GITHUB_TOKEN"))
+        self.github = Github(os.getenv("GITHUB_TOKEN"), base_url=GITHUB_API_URL)
         self.repo_obj = self.github.get_repo(repo)
         self.pr = self.repo_obj.get_pull(pr_number)
+        self.changed_files: List[str] = []
+        self._content_requests = 0
+        self._content_requests_lock = threading.Lock()
+        self._merge_base_sha: Optional[str] = None
+        # get_files() 페이지 캐시 (파일 경로 조회와 추출이 같은 페이지를 다시 요청하지 않도록 공유)
+        self._file_pages: List[List[Any]] = []
+        self._file_pages_complete = False
+        self._files_lock = threading.Lock()
+
+    @property
+    def head_sha(self) -> str:
+        return self.pr.head.sha
 
-    def extract_pr_data(self) -> str:
-        """PR의 변경 사항을 추출하고 하나의 문자열로 반환합니다."""
+    def extract_pr_data(self, fetch_missing_patches: bool = False, max_workers: int = 8,
+                        source: str = "api", base_sha: Optional[str] = None,
+                        head_sha: Optional[str] = None) -> str:
+        """PR의 변경 사항을 추출하고 하나의 문자열로 반환합니다.
+
+        source="api"는 get_files()를 페이지 단위로 조회하고, source="diff"는 PR(또는 base...head compare)의
+        전체 diff를 한 번의 요청으로 받아 파싱합니다. diff 다운로드가 실패하면 페이지 조회로 대체합니다.
+        fetch_missing_patches=True이면 GitHub가 patch를 생략한 파일(대용량/생성 파일)의
+        base/head 내용을 동시에 가져와 로컬에서 diff를 계산합니다.
+        """
         try:
-            files = self.pr.get_files()
-            pr_text = f"PR Title: {self.pr.title}\n"
-            pr_text += f"PR Description: {self.pr.body}\n\n"
-            pr_text += "Changed Files:\n"
+            started_at = time.time()
+            files = None
+            api_calls = 0
+            if source == "diff":
+                files = self._download_diff_files(base_sha, head_sha)
+                api_calls = 1
+                if files is None:
+                    logger.warning("diff 다운로드 실패 - 페이지 단위 API 조회로 대체합니다.")
+                    source = "api"
 
-            for file in files:
-                pr_text += f"\n=== File: {file.filename} ===\n"
-                pr_text += f"Status: {file.status}\n"
-                pr_text += f"Changes: +{file.additions} -{file.deletions}\n"
-                if file.patch:
-                    pr_text += f"\nPatch:\n{file.patch}\n"
-                pr_text += "=" * 50 + "\n"
+            if files is None:
+                files = list(self._iter_files())
+                api_calls += max(1, math.ceil(len(files) / self.github.per_page))
 
+            pr_text = self._format_pr_text(
+                self.pr.title, self.pr.body, files,
+                fetch_missing_patches=fetch_missing_patches and source == "api",
+                max_workers=max_workers
+            )
+            logger.info(
+                f"[Extraction] source={source}, 파일 {len(files)}개, GitHub API 호출 {api_calls}회, "
+                f"소요 시간 {time.time() - started_at:.2f}초"
+            )
             logger.info(f"[DEBUG] extract_pr_data 결과 길이: {len(pr_text)} characters")
             return pr_text
 
         except Exception as e:
             logger.error(f"PR 데이터 추출 중 오류 발생: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    def _iter_files(self) -> Iterator[Any]:
+        """PR 파일 목록을 페이지를 받는 대로 내보냅니다.
+
+        받은 페이지는 보관하므로 iter_file_names()와 추출이 동시에 돌아도 페이지마다 요청은 한 번입니다.
+        """
+        paginated = self.pr.get_files()
+        page = 0
+        while True:
+            with self._files_lock:
+                if page == len(self._file_pages) and not self._file_pages_complete:
+                    items = paginated.get_page(page)
+                    self._file_pages.append(items)
+                    self._file_pages_complete = len(items) < self.github.per_page
+                items = self._file_pages[page] if page < len(self._file_pages) else None
+            if items is None:
+                return
+            yield from items
+            page += 1
+
+    def iter_file_names(self) -> Iterator[str]:
+        """추출을 기다리지 않고 변경 파일 경로만 순서대로 조회합니다 (리뷰 준비 단계의 언어 판단용)."""
+        return (file.filename for file in self._iter_files())
+
+    def _format_pr_text(self, title: str, body: Optional[str], files: Iterable[Any],
+                        fetch_missing_patches: bool = False, max_workers: int = 8) -> str:
+        """파일 목록(PyGithub File 또는 DiffFile)을 리뷰 입력 문자열로 조립합니다."""
+        parts = [
+            f"PR Title: {title}\n",
+            f"PR Description: {body}\n\n",
+            "Changed Files:\n"
+        ]
+
+        self.changed_files = []
+        # 인라인 리뷰 코멘트의 diff position 인덱스를 만들 때 다시 조회하지 않도록 patch를 보관합니다.
+        # 로컬에서 계산한 patch는 GitHub diff와 position이 다를 수 있으므로 넣지 않습니다.
+        self.patches: Dict[str, str] = {}
+        missing = []
+        for file in files:
+            self.changed_files.append(file.filename)
+            parts.append(f"\n=== File: {file.filename} ===\n")
+            parts.append(f"Status: {file.status}\n")
+            parts.append(f"Changes: +{file.additions} -{file.deletions}\n")
+            if file.patch:
+                self.patches[file.filename] = file.patch
+                parts.append(f"\nPatch:\n{file.patch}\n")
+            elif fetch_missing_patches and file.status != "removed":
+                # 나중에 로컬 diff로 채울 자리를 남겨 둡니다.
+                missing.append((len(parts), file))
+                parts.append("")
+            parts.append("=" * 50 + "\n")
+
+        if missing:
+            patches = self._fetch_missing_patches([file for _, file in missing], max_workers)
+            for (index, file), patch in zip(missing, patches):
+                if patch:
+                    parts[index] = f"\nPatch:\n{patch}\n"
+
+        return "".join(parts)
+
+    def _download_diff_files(self, base_sha: Optional[str], head_sha: Optional[str]) -> Optional[List[Any]]:
+        """diff media type으로 전체 diff를 한 번에 받아 스트리밍 파싱합니다. 실패하면 None을 반환합니다."""
+        # "main"/"HEAD" 같은 ref는 러너 체크아웃 기준이라 GitHub에서 다른 커밋을 가리킬 수 있으므로
+        # 둘 다 전체 커밋 SHA일 때만 compare를 쓰고, 그 외에는 PR diff 엔드포인트를 사용합니다.
+        if self._is_full_sha(base_sha) and self._is_full_sha(head_sha):
+            url = f"{GITHUB_API_URL}/repos/{self.repo}/compare/{base_sha}...{head_sha}"
+        else:
+            if base_sha or head_sha:
+                logger.info(f"전체 커밋 SHA가 아닌 ref({base_sha}, {head_sha})는 무시하고 PR diff를 받습니다.")
+            url = f"{GITHUB_API_URL}/repos/{self.repo}/pulls/{self.pr_number}"
+
+        headers = {'Accept': 'application/vnd.github.diff'}
+        token = os.getenv("GITHUB_TOKEN")
+        if token:
+            headers['Authorization'] = f"Bearer {token}"
+
+        try:
+            with requests.get(url, headers=headers, stream=True, timeout=(10, 60)) as response:
+                if response.status_code != 200:
+                    # 파일/라인 수가 너무 많은 diff는 GitHub가 406 등으로 거절합니다.
+                    logger.warning(f"diff 다운로드 응답 오류: {response.status_code} {response.text[:200]}")
+                    return None
+                # iter_lines(decode_unicode=True)는 줄 안의 \x0c, \x85, \u2028 등에서도 줄을 나누므로 바이트로 나눕니다.
+                return list(parse_unified_diff(iter_diff_lines(response.iter_content(chunk_size=64 * 1024))))
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"diff 다운로드 실패: {str(e)}")
+            return None
+
+    @staticmethod
+    def _is_full_sha(ref: Optional[str]) -> bool:
+        return bool(ref) and len(ref) == 40 and all(c in "0123456789abcdef" for c in ref.lower())
+
+    def _fetch_missing_patches(self, files: List[Any], max_workers: int) -> List[Optional[str]]:
+        """patch가 없는 파일들의 base/head 내용을 제한된 worker pool로 동시에 가져와 diff를 만듭니다."""
+        logger.info(f"=== patch 누락 파일 {len(files)}개 내용 가져오기 시작 (workers={max_workers}) ===")
+        started_at = time.time()
+        self._content_requests = 0
+        self._merge_base_sha = self._resolve_merge_base()
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            patches = list(executor.map(self._build_local_patch, files))
+
+        restored = sum(1 for patch in patches if patch)
+        logger.info(
+            f"patch 누락 파일 처리 완료: {restored}/{len(files)}개 복원 "
+            f"(소요 시간: {time.time() - started_at:.2f}초, 내용 조회 요청 수: {self._content_requests})"
+        )
+        return patches
+
+    def _resolve_merge_base(self) -> str:
+        """PR diff와 같은 범위를 만들도록 base 브랜치 끝이 아닌 merge base를 PR당 compare 한 번으로 구합니다."""
+        try:
+            comparison = self.repo_obj.compare(self.pr.base.sha, self.pr.head.sha)
+            return comparison.merge_base_commit.sha
+        except Exception as e:
+            logger.warning(f"merge base 조회 실패 - base SHA를 사용합니다: {str(e)}")
+            return self.pr.base.sha
+
+    def _build_local_patch(self, file) -> Optional[str]:
+        if file.changes > MAX_LOCAL_PATCH_CHANGES:
+            logger.info(f"변경 줄이 너무 많아 로컬 diff를 건너뜁니다: {file.filename} ({file.changes}줄)")
+            return None
+        try:
+            head_text = self._read_blob(file.sha)
+            base_text = ""
+            if file.status != "added":
+                base_path = file.previous_filename or file.filename
+                base_text = self._read_file_at(base_path, self._merge_base_sha or self.pr.base.sha)
+            if head_text is None or base_text is None:
+                logger.info(f"텍스트가 아닌 파일은 건너뜁니다: {file.filename}")
+                return None
+            if len(head_text) + len(base_text) > MAX_LOCAL_PATCH_BYTES:
+                logger.info(f"파일이 너무 커서 로컬 diff를 건너뜁니다: {file.filename}")
+                return None
+
+            diff = difflib.unified_diff(
+                base_text.splitlines(),
+                head_text.splitlines(),
+                lineterm="",
+                n=3
+            )
+            # GitHub patch 형식에 맞춰 맨 앞의 ---/+++ 파일 헤더 두 줄만 제외합니다.
+            # (본문의 "--- 주석"이나 "++i;" 같은 변경 줄은 그대로 유지해야 hunk 줄 수가 맞습니다.)
+            return "\n".join(list(diff)[2:])
+
+        except Exception as e:
+            logger.warning(f"{file.filename} 내용 가져오기 실패: {str(e)}")
+            return None
+
+    def _count_content_request(self) -> None:
+        with self._content_requests_lock:
+            self._content_requests += 1
+
+    def _read_file_at(self, path: str, ref: str) -> Optional[str]:
+        self._count_content_request()
+        content = self.repo_obj.get_contents(path, ref=ref)
+        if content.encoding == "base64" and content.content:
+            return self._decode(content.content)
+        # Contents API는 1MB가 넘는 파일의 내용을 주지 않으므로 blob API로 다시 가져옵니다.
+        return self._read_blob(content.sha)
+
+    def _read_blob(self, sha: str) -> Optional[str]:
+        self._count_content_request()
+        blob = self.repo_obj.get_git_blob(sha)
+        return self._decode(blob.content)
+
+    @staticmethod
+    def _decode(encoded: str) -> Optional[str]:
+        try:
+            return base64.b64decode(encoded).decode("utf-8")
+        except (ValueError, UnicodeDecodeError):
+            return None
+
+    def get_changed_files_between(self, old_sha: str, new_sha: str) -> Optional[Set[str]]:
+        """두 커밋 사이에서 변경된 파일 경로를 반환합니다. 비교할 수 없으면 None을 반환합니다."""
+        try:
+            comparison = self.repo_obj.compare(old_sha, new_sha)
+            if comparison.status not in ("ahead", "identical"):
+                # force push 등으로 이전 head가 새 head의 조상이 아니면 증분 리뷰를 할 수 없습니다.
+                logger.warning(f"[Incremental] {old_sha[:7]}..{new_sha[:7]} 비교 상태: {comparison.status}")
+                return None
+
+            changed = set()
+            for file in comparison.files:
+                changed.add(file.filename)
+                if file.previous_filename:
+                    changed.add(file.previous_filename)
+            logger.info(f"[Incremental] {old_sha[:7]}..{new_sha[:7]} 사이 변경 파일: {len(changed)}개")
+            return changed
+
+        except Exception as e:
+            logger.warning(f"[Incremental] 커밋 비교 실패: {str(e)}")
+            return None
+
+
+class LocalGitExtractor(PRExtractor):
+    """체크아웃된 로컬 저장소의 git 객체에서 직접 diff를 계산하는 추출기.
+
+    GitHub API를 전혀 호출하지 않으므로 오프라인에서도 동작하며, 출력 형식은 PRExtractor와 같습니다.
+    base...head(merge-base 기준) diff를 사용하므로 GitHub PR diff와 같은 범위를 리뷰합니다.
+    """
+
+    def __init__(self, repo_path: str, base_sha: str, head_sha: str, context_lines: int = 3,
+                 find_renames: bool = True, title: Optional[str] = None, description: str = ""):
+        self.repo_path = repo_path
+        self.context_lines = context_lines
+        self.find_renames = find_renames
+        self.base_sha = self._git("rev-parse", "--verify", f"{base_sha}^{{commit}}").strip()
+        self._head_sha = self._git("rev-parse", "--verify", f"{head_sha}^{{commit}}").strip()
+        self.title = title if title is not None else self._git("log", "-1", "--format=%s", self._head_sha).strip()
+        self.description = description
+        self.changed_files: List[str] = []
+
+    @property
+    def head_sha(self) -> str:
+        return self._head_sha
+
+    def _git(self, *args: str) -> str:
+        result = subprocess.run(
+            ["git", "-C", self.repo_path, *args],
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            check=False
+        )
+        if result.returncode != 0:
+            raise Exception(f"git {' '.join(args)} 실패: {result.stderr.strip()}")
+        return result.stdout
+
+    def iter_file_names(self) -> Iterator[str]:
+        output = self._git("diff", "--name-only", "-z", "--no-renames", f"{self.base_sha}...{self._head_sha}")
+        return (name for name in output.split("\0") if name)
+
+    def _diff_args(self) -> List[str]:
+        return [
+            "diff", "--no-color", "--no-ext-diff",
+            f"-U{self.context_lines}",
+            "--find-renames" if self.find_renames else "--no-renames"
+        ]
+
+    def extract_pr_data(self, **kwargs) -> str:
+        """base...head diff를 git에서 스트리밍으로 읽어 PRExtractor와 같은 형식의 문자열로 반환합니다."""
+        started_at = time.time()
+        # text 모드(universal newlines)는 줄 안의 단독 \r에서도 줄을 나누므로 바이트로 읽어 \n에서만 나눕니다.
+        process = subprocess.Popen(
+            ["git", "-C", self.repo_path, *self._diff_args(), f"{self.base_sha}...{self._head_sha}"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        # stdout을 읽는 동안 stderr 파이프가 가득 차 git이 멈추지 않도록 별도 스레드에서 비웁니다.
+        stderr_chunks: List[bytes] = []
+        stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+        stderr_reader.start()
+        try:
+            files = list(parse_unified_diff(iter_diff_lines(iter(lambda: process.stdout.read(64 * 1024), b""))))
+        finally:
+            process.stdout.close()
+            stderr_reader.join()
+            process.stderr.close()
+            returncode = process.wait()
+        if returncode != 0:
+            stderr = b"".join(stderr_chunks).decode("utf-8", errors="replace")
+            raise Exception(f"git diff 실패: {stderr.strip()}")
+
+        pr_text = self._format_pr_text(self.title, self.description, files)
+        # 로컬 git diff(--context-lines, diff 알고리즘)의 position은 GitHub PR diff와 다를 수 있으므로
+        # 인라인 코멘트 인덱스용 patch로 내보내지 않습니다.
+        self.patches = {}
+        logger.info(
+            f"[Extraction] source=git, 파일 {len(files)}개, GitHub API 호출 0회, "
+            f"소요 시간 {time.time() - started_at:.2f}초"
+        )
+        return pr_text
+
+    def get_changed_files_between(self, old_sha: str, new_sha: str) -> Optional[Set[str]]:
+        """두 커밋 사이에서 변경된 파일 경로를 로컬 git으로 계산합니다."""
+        try:
+            # 이전 head가 새 head의 조상이 아니면(force push) 증분 리뷰를 할 수 없습니다.
+            ancestor = subprocess.run(
+                ["git", "-C", self.repo_path, "merge-base", "--is-ancestor", old_sha, new_sha],
+                capture_output=True
+            )
+            if ancestor.returncode != 0:
+                logger.warning(f"[Incremental] {old_sha[:7]}는 {new_sha[:7]}의 조상이 아닙니다.")
+                return None
+
+            output = self._git("diff", "--name-status", "--find-renames", old_sha, new_sha)
+            changed = set()
+            for line in output.splitlines():
+                # 이름 변경(R100 old new)은 이전/새 경로를 모두 포함합니다.
+                changed.update(line.split("\t")[1:])
+            return changed
+
+        except Exception as e:
+            logger.warning(f"[Incremental] 커밋 비교 실패: {str(e)}")
+            return None
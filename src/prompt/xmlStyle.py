@@ -1,16 +1,5 @@
-template = """
-<review-task>
-  <diff>
-    <![CDATA[
-    {{PR_DIFF_PLACEHOLDER}}
-    ]]>
-  </diff>
-
-  <convention-guide>
-  {{CONVENTION_GUIDE_PLACEHOLDER}}
-  </convention-guide>
-
-    
+# 리뷰 지침/기준/출력 형식은 요청마다 바뀌지 않는 고정 블록이고, diff와 컨벤션 가이드만 요청마다 바뀝니다.
+REVIEW_GUIDELINES = """    
     <instruction>
     **반드시 한국어로만 작성하세요 (Always write in Korean only)** 
     
@@ -67,7 +56,9 @@ template = """
     - 🟨 Low: Styling issue, naming inconsistency, or non-critical suggestions  
   </severity-criteria>
 
-  <output-format>
+"""
+
+MARKDOWN_OUTPUT_FORMAT = """  <output-format>
     <![CDATA[
     # ✅ PR Summary in 3 Lines
     - [Summary line 1]
@@ -99,6 +90,73 @@ template = """
     ...
     ]]>
   </output-format>
+"""
+
+# structured output: Ollama format(JSON schema)으로 출력 구조를 강제하므로 필드 의미만 설명합니다.
+JSON_OUTPUT_FORMAT = """  <output-format>
+    Respond with a single JSON object only. Do not use Markdown or code fences.
+    - summary: up to 3 lines summarizing the PR
+    - difficulty: review difficulty from 1 to 5 according to <review-difficulty-criteria>
+    - keywords: key keywords of the review
+    - findings: one object per issue
+      - file: file path exactly as shown in the diff
+      - line: line number in the new version of the file (end_line for the last line of a multi-line issue)
+      - severity: high, medium or low according to <severity-criteria>
+      - rule_type: Runtime, Logging, Optimization, Security or Convention
+      - confidence: 1 to 5 according to <confidence-score-criteria>
+      - title, explanation, suggestion: written in Korean
+    Use an empty findings array when there are no issues.
+  </output-format>
+"""
+
+REVIEW_INSTRUCTIONS = REVIEW_GUIDELINES + MARKDOWN_OUTPUT_FORMAT
+STRUCTURED_REVIEW_INSTRUCTIONS = REVIEW_GUIDELINES + JSON_OUTPUT_FORMAT
+
+CONVENTION_GUIDE_BLOCK = """  <convention-guide>
+  {{CONVENTION_GUIDE_PLACEHOLDER}}
+  </convention-guide>
+"""
+
+DIFF_BLOCK = """  <diff>
+    <![CDATA[
+    {{PR_DIFF_PLACEHOLDER}}
+    ]]>
+  </diff>
+"""
+
+
+def _diff_first(instructions: str) -> str:
+    """diff를 맨 앞에 두는 기존 배치"""
+    return "\n<review-task>\n" + DIFF_BLOCK + "\n" + CONVENTION_GUIDE_BLOCK + "\n" + instructions + "\n</review-task>\n"
+
+
+def _prefix_stable(instructions: str) -> str:
+    """고정 블록을 앞에 두어 모든 요청이 바이트 단위로 같은 prefix를 공유하므로
+    Ollama(llama.cpp)가 이전 요청의 KV cache를 재사용하고 변하는 부분만 새로 평가합니다."""
+    return "\n<review-task>\n" + instructions + "\n" + CONVENTION_GUIDE_BLOCK + "\n" + DIFF_BLOCK + "</review-task>\n"
+
+
+template = _diff_first(REVIEW_INSTRUCTIONS)
+prefix_stable_template = _prefix_stable(REVIEW_INSTRUCTIONS)
+
+# 이전 요청의 context를 이어 받을 때 사용하는 프롬프트 (지침은 이미 context에 있음)
+continuation_template = """
+<review-task>
+    <instruction>
+    **반드시 한국어로만 작성하세요 (Always write in Korean only)**
+
+    Review the diff below with exactly the same instructions, criteria and output format as the previous review task.
+    Do not repeat findings from previous files.
+    </instruction>
+
+""" + CONVENTION_GUIDE_BLOCK + "\n" + DIFF_BLOCK + "</review-task>\n"
+
+PROMPT_LAYOUTS = {
+    "diff-first": template,
+    "prefix-stable": prefix_stable_template,
+}
 
-</review-task>
-"""
\ No newline at end of file
+STRUCTURED_PROMPT_LAYOUTS = {
+    "diff-first": _diff_first(STRUCTURED_REVIEW_INSTRUCTIONS),
+    "prefix-stable": _prefix_stable(STRUCTURED_REVIEW_INSTRUCTIONS),
+}
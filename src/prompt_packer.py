@@ -0,0 +1,136 @@
+import re
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+
+class TokenCounter:
+    """대상 모델 기준 토큰 수를 셉니다.
+
+    tokenizer_name이 주어지면 transformers 토크나이저로 정확히 세고,
+    없거나 로드에 실패하면 chars_per_token 비율로 보수적으로 추정합니다.
+    """
+
+    def __init__(self, tokenizer_name: Optional[str] = None, chars_per_token: float = 3.0):
+        self.chars_per_token = chars_per_token
+        self.tokenizer = None
+        if tokenizer_name:
+            try:
+                from transformers import AutoTokenizer
+                self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+                logger.info(f"[Prompt Packer] 토크나이저 로드: {tokenizer_name}")
+            except Exception as e:
+                logger.warning(f"[Prompt Packer] 토크나이저 로드 실패, 문자 수 기반 추정 사용: {str(e)}")
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.tokenizer is not None:
+            return len(self.tokenizer.encode(text, add_special_tokens=False))
+        return int(len(text) / self.chars_per_token) + 1
+
+
+class PromptPacker:
+    """파일 단위 리뷰 유닛을 모델 컨텍스트 예산에 맞게 최소 개수의 프롬프트로 묶습니다.
+
+    예산 = context_window - 템플릿/시스템 프롬프트 - 컨벤션 가이드 예약분 - 출력 예약분 - PR 헤더.
+    예산보다 큰 파일은 hunk(@@) 경계에서 나누고, 유닛들은 first-fit decreasing으로 bin-packing합니다.
+    """
+
+    def __init__(self, token_counter: TokenCounter, fixed_prompt: str, context_window: int = 32768,
+                 reserved_output_tokens: int = 4096, reserved_convention_tokens: int = 1024):
+        self.token_counter = token_counter
+        self.context_window = context_window
+        self.reserved_output_tokens = reserved_output_tokens
+        self.reserved_convention_tokens = reserved_convention_tokens
+        self.fixed_tokens = token_counter.count(fixed_prompt)
+
+    def budget(self, header: str) -> int:
+        return (self.context_window - self.fixed_tokens - self.reserved_output_tokens
+                - self.reserved_convention_tokens - self.token_counter.count(header))
+
+    def _split_oversized(self, file_name: str, section: str, budget: int) -> List[Dict[str, str]]:
+        """예산을 넘는 파일 섹션을 hunk 경계에서 잘라 여러 유닛으로 만듭니다."""
+        patch_index = section.find("\n@@")
+        if patch_index == -1:
+            return [{'file': file_name, 'text': section}]
+
+        preamble = section[:patch_index + 1]
+        hunks = re.split(r'(?m)^(?=@@)', section[patch_index + 1:])
+        parts, current = [], preamble
+        for hunk in hunks:
+            if not hunk:
+                continue
+            if current != preamble and self.token_counter.count(current + hunk) > budget:
+                parts.append(current)
+                current = preamble
+            # 단일 hunk가 예산을 넘으면 그대로 보내고 모델 쪽 잘림에 맡깁니다.
+            current += hunk
+        if current != preamble:
+            parts.append(current)
+        return [{'file': file_name, 'text': part} for part in parts]
+
+    def _checked_budget(self, header: str) -> int:
+        budget = self.budget(header)
+        if budget <= 0:
+            raise ValueError(f"컨텍스트 예산이 부족합니다 (context_window={self.context_window})")
+        return budget
+
+    def _fit(self, section: Dict[str, str], budget: int) -> List[Dict[str, str]]:
+        if self.token_counter.count(section['text']) > budget:
+            return self._split_oversized(section['file'], section['text'], budget)
+        return [section]
+
+    def split(self, header: str, sections: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """파일을 묶지 않고 예산을 넘는 파일만 hunk 경계에서 나눈 유닛 목록을 파일 순서대로 반환합니다.
+
+        각 항목의 'file'은 항상 파일 하나이므로 결과를 파일별로 다시 모을 수 있습니다.
+        """
+        budget = self._checked_budget(header)
+        return [{'file': part['file'], 'text': header + part['text']}
+                for section in sections for part in self._fit(section, budget)]
+
+    def pack(self, header: str, sections: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """(file, text) 섹션 목록을 예산에 맞는 프롬프트 입력 목록으로 묶습니다.
+
+        반환하는 각 항목의 'text'는 PR 헤더를 포함한 diff이고 'files'는 포함된 파일 경로 목록,
+        'file'은 리포트에 표시할 경로들을 쉼표로 이은 문자열입니다.
+        """
+        budget = self._checked_budget(header)
+
+        pieces = []
+        for order, section in enumerate(sections):
+            for part_index, part in enumerate(self._fit(section, budget)):
+                pieces.append(((order, part_index), part, self.token_counter.count(part['text'])))
+
+        bins: List[Dict[str, object]] = []
+        for order, part, tokens in sorted(pieces, key=lambda piece: -piece[2]):
+            for packed in bins:
+                if packed['tokens'] + tokens <= budget:
+                    break
+            else:
+                packed = {'tokens': 0, 'pieces': []}
+                bins.append(packed)
+            packed['tokens'] += tokens
+            packed['pieces'].append((order, part))
+
+        prompts = []
+        for packed in bins:
+            ordered = sorted(packed['pieces'], key=lambda item: item[0])
+            files = list(dict.fromkeys(part['file'] for _, part in ordered))
+            prompts.append({
+                'file': ", ".join(files),
+                'files': files,
+                'text': header + "".join(part['text'] for _, part in ordered)
+            })
+
+        # 파일을 하나씩 보낼 때와 비교한 예상 프롬프트 토큰 수
+        header_tokens = self.token_counter.count(header)
+        diff_tokens = sum(tokens for _, _, tokens in pieces)
+        per_file_total = len(sections) * (self.fixed_tokens + header_tokens) + diff_tokens
+        packed_total = len(prompts) * (self.fixed_tokens + header_tokens) + diff_tokens
+        logger.info(
+            f"[Prompt Packer] 예산 {budget} tokens: {len(sections)}개 파일 -> {len(prompts)}개 프롬프트, "
+            f"예상 프롬프트 토큰 {per_file_total} -> {packed_total}"
+        )
+        return prompts
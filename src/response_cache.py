@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+
+class ResponseCache:
+    """LLM 리뷰 응답을 디스크에 저장하는 content-addressed 캐시.
+
+    키는 모델명, 시스템 프롬프트, 생성 옵션, 최종 프롬프트를 합친 SHA-256 해시입니다.
+    항목 수/전체 크기 한도를 넘으면 가장 오래 사용되지 않은 항목부터 제거하고(LRU),
+    ttl_seconds가 지난 항목은 조회 시 만료 처리합니다.
+    """
+
+    def __init__(self, cache_dir: str = "./.review_cache", max_entries: int = 500,
+                 max_bytes: int = 200 * 1024 * 1024, ttl_seconds: Optional[int] = 7 * 24 * 3600,
+                 bypass: bool = False):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if not self.bypass:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(request_data: Dict[str, Any]) -> str:
+        """요청 본문에서 응답에 영향을 주지 않는 필드(stream, keep_alive)를 제외하고 해시 키를 만듭니다."""
+        payload = {k: v for k, v in request_data.items() if k not in ('stream', 'keep_alive')}
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        """캐시된 응답을 반환합니다. 없거나 만료되었으면 None을 반환합니다."""
+        if self.bypass:
+            return None
+
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self.misses += 1
+                return None
+
+            if self.ttl_seconds is not None and time.time() - entry.get('created_at', 0) > self.ttl_seconds:
+                logger.info(f"[Response Cache] 만료된 항목 제거: {key[:12]}")
+                self._remove(path)
+                self.misses += 1
+                return None
+
+            # LRU 순서를 위해 마지막 사용 시각을 갱신합니다.
+            os.utime(path, None)
+            self.hits += 1
+
+        logger.info(f"[Response Cache] 캐시 적중: {key[:12]}")
+        return entry.get('response')
+
+    def set(self, key: str, response: str, model: str = "") -> None:
+        """응답을 저장하고 한도를 넘으면 LRU 항목을 제거합니다."""
+        if self.bypass:
+            return
+
+        entry = {'created_at': time.time(), 'model': model, 'response': response}
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with self._lock:
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(entry, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning(f"[Response Cache] 저장 실패: {str(e)}")
+                self._remove(tmp_path)
+                return
+            self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+            _, size, path = entries.pop(0)
+            self._remove(path)
+            total_bytes -= size
+            logger.info(f"[Response Cache] LRU 항목 제거: {os.path.basename(path)[:12]}")
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,88 @@
+import json
+import re
+from typing import List, Literal, Optional
+
+from loguru import logger
+from pydantic import BaseModel, Field, ValidationError
+
+from log_config import payload
+
+Severity = Literal["high", "medium", "low"]
+RuleType = Literal["Runtime", "Logging", "Optimization", "Security", "Convention"]
+
+SEVERITY_ORDER = ["high", "medium", "low"]
+RULE_TYPE_ORDER = ["Runtime", "Logging", "Optimization", "Security", "Convention"]
+
+
+class Finding(BaseModel):
+    """리뷰에서 발견한 이슈 하나. line은 변경 후 파일 기준 줄 번호입니다."""
+    file: str = Field(description="Path of the file as shown in the diff")
+    line: int = Field(description="Line number in the new version of the file")
+    end_line: Optional[int] = Field(default=None, description="Last line of a multi-line issue")
+    severity: Severity
+    rule_type: RuleType
+    confidence: int = Field(ge=1, le=5, description="1 (speculative) to 5 (explicit and observable)")
+    title: str = Field(description="Short issue title in Korean")
+    explanation: str = Field(description="Why this is a problem, in Korean")
+    suggestion: str = Field(description="Suggested fix in Korean, with a code example when useful")
+
+
+class ReviewFindings(BaseModel):
+    """리뷰 요청 하나의 구조화된 결과."""
+    summary: List[str] = Field(default_factory=list, description="Up to three summary lines in Korean")
+    difficulty: int = Field(default=1, ge=1, le=5, description="Review difficulty from 1 to 5")
+    keywords: List[str] = Field(default_factory=list)
+    findings: List[Finding] = Field(default_factory=list)
+
+    @classmethod
+    def merge(cls, results: List["ReviewFindings"]) -> "ReviewFindings":
+        """파일/유닛별 결과를 하나로 합칩니다. 요약과 키워드는 중복을 제거하고 난이도는 최댓값을 사용합니다."""
+        summary = list(dict.fromkeys(line for result in results for line in result.summary))
+        keywords = list(dict.fromkeys(keyword for result in results for keyword in result.keywords))
+        return cls(
+            summary=summary[:3],
+            difficulty=max((result.difficulty for result in results), default=1),
+            keywords=keywords,
+            findings=[finding for result in results for finding in result.findings]
+        )
+
+    def filter(self, min_confidence: int = 1, severities: Optional[List[str]] = None) -> "ReviewFindings":
+        """신뢰도와 심각도 기준으로 걸러낸 복사본을 반환합니다."""
+        findings = [
+            finding for finding in self.findings
+            if finding.confidence >= min_confidence and (severities is None or finding.severity in severities)
+        ]
+        return self.model_copy(update={"findings": findings})
+
+
+# Ollama /api/generate의 format에 넣어 출력을 이 스키마로 제한합니다.
+REVIEW_FINDINGS_SCHEMA = ReviewFindings.model_json_schema()
+
+
+def parse_findings(text: str, default_file: Optional[str] = None) -> Optional[ReviewFindings]:
+    """모델 응답을 ReviewFindings로 검증합니다. JSON이 아니거나 스키마에 맞지 않으면 None을 반환합니다.
+
+    default_file이 주어지면 파일 경로가 비어 있는 finding에 채웁니다 (파일 단위 리뷰 유닛).
+    """
+    if not text:
+        return None
+    candidate = text.strip()
+    if not candidate.startswith("{"):
+        # format을 지원하지 않는 서버가 코드 블록으로 감싸 반환한 경우
+        match = re.search(r"\{.*\}", candidate, re.DOTALL)
+        if not match:
+            logger.warning(f"[Findings] JSON 객체를 찾을 수 없습니다: {payload(text, 'response')}")
+            return None
+        candidate = match.group(0)
+
+    try:
+        findings = ReviewFindings.model_validate_json(candidate)
+    except (ValidationError, json.JSONDecodeError) as e:
+        logger.warning(f"[Findings] 응답 검증 실패: {str(e)}")
+        return None
+
+    if default_file:
+        for finding in findings.findings:
+            if not finding.file.strip():
+                finding.file = default_file
+    return findings
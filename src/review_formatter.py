@@ -1,5 +1,15 @@
-from typing import Dict, List, Any, Union
+from typing import Dict, List, Any, Union, Tuple
+import re
 from loguru import logger
+from log_config import payload
+from review_findings import Finding, ReviewFindings, RULE_TYPE_ORDER, SEVERITY_ORDER
+
+REPORT_HEADER = "# 🔍 코드 리뷰 결과\n\n"
+REPORT_FOOTER = "\n\n---\n🤖 *이 리뷰는 AI에 의해 자동 생성되었습니다.*\n"
+FILE_SECTION_PATTERN = re.compile(r'^## 📄 `(.+?)`$', re.MULTILINE)
+SEVERITY_HEADINGS = {"high": "🟥 High", "medium": "🟧 Medium", "low": "🟨 Low"}
+REVIEW_ERROR_MESSAGE = "리뷰 중 오류가 발생했습니다."
+
 
 class ReviewFormatter:
     def __init__(self):
@@ -9,18 +19,130 @@ class ReviewFormatter:
         """리뷰 결과를 하나의 통합된 리포트로 생성합니다."""
         try:
             logger.info("=== 통합 리포트 생성 시작 ===")
-            logger.debug(f"[DEBUG] review_results: {review_results}")
+            logger.debug(f"[DEBUG] review_results: {payload(review_results, 'review_results')}")
 
             # 리포트 헤더
-            report = "# 🔍 코드 리뷰 결과\n\n"
+            report = REPORT_HEADER
             report += review_results
             # 리포트 푸터
-            report += "\n\n---\n"
-            report += "🤖 *이 리뷰는 AI에 의해 자동 생성되었습니다.*\n"
+            report += REPORT_FOOTER
             
             logger.info("통합 리포트 생성 완료")
             return report
 
         except Exception as e:
             logger.error(f"Error creating unified report: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+
+    @staticmethod
+    def format_file_sections(file_reviews: List[Tuple[str, str]]) -> str:
+        """(파일 경로, 리뷰 결과) 목록을 파일별 섹션으로 이어 붙입니다. 이슈가 없는 파일은 생략합니다."""
+        sections = []
+        for file_name, review_text in file_reviews:
+            if not review_text or review_text.strip() == "NO ISSUE":
+                continue
+            sections.append(f"## 📄 `{file_name}`\n\n{review_text.strip()}")
+        return "\n\n".join(sections)
+
+    @staticmethod
+    def _render_finding(index: int, finding: Finding) -> str:
+        lines = f"{finding.line}-{finding.end_line}" if finding.end_line and finding.end_line > finding.line \
+            else str(finding.line)
+        return (
+            f"#### {index}. [{finding.rule_type}] {finding.title}\n"
+            f"📌 Line: {lines} | 🔎 Confidence: {'⭐' * finding.confidence}\n\n"
+            f"{finding.explanation.strip()}\n\n"
+            f"💡 **Suggestion:** {finding.suggestion.strip()}"
+        )
+
+    def render_file_findings(self, findings: List[Finding]) -> str:
+        """파일 하나의 이슈들을 심각도 → 규칙 유형 → 줄 번호 순으로 렌더링합니다. (파일 섹션 제목 제외)"""
+        ordered = sorted(findings, key=lambda f: (SEVERITY_ORDER.index(f.severity),
+                                                  RULE_TYPE_ORDER.index(f.rule_type), f.line))
+        blocks = []
+        for severity in SEVERITY_ORDER:
+            group = [finding for finding in ordered if finding.severity == severity]
+            if group:
+                blocks.append(f"### {SEVERITY_HEADINGS[severity]}\n\n" + "\n\n".join(
+                    self._render_finding(index, finding) for index, finding in enumerate(group, 1)
+                ))
+        return "\n\n".join(blocks)
+
+    @staticmethod
+    def render_inline_comment(finding: Finding) -> str:
+        """인라인 리뷰 코멘트 본문 (파일/줄은 코멘트 위치로 드러나므로 생략)."""
+        return (
+            f"**{SEVERITY_HEADINGS[finding.severity]} · [{finding.rule_type}] {finding.title}** "
+            f"(🔎 {'⭐' * finding.confidence})\n\n"
+            f"{finding.explanation.strip()}\n\n"
+            f"💡 **Suggestion:** {finding.suggestion.strip()}"
+        )
+
+    @staticmethod
+    def render_folded_findings(findings: List[Finding]) -> str:
+        """인라인으로 달 수 없는 finding들을 리뷰 본문용 목록으로 렌더링합니다."""
+        lines = ["### 📌 인라인으로 표시하지 않은 이슈"]
+        lines += [
+            f"- `{finding.file}`:{finding.line} {SEVERITY_HEADINGS[finding.severity]} "
+            f"[{finding.rule_type}] **{finding.title}** - {finding.explanation.strip()}"
+            for finding in findings
+        ]
+        return "\n".join(lines)
+
+    def render_findings(self, review: ReviewFindings) -> str:
+        """구조화된 리뷰 결과를 Markdown으로 렌더링합니다.
+
+        이슈는 format_file_sections와 같은 파일별 섹션으로 묶으므로 증분 리뷰의 parse_file_sections로 다시 읽을 수 있습니다.
+        """
+        header = ""
+        if review.summary:
+            header += "# ✅ PR Summary\n" + "\n".join(f"- {line}" for line in review.summary) + "\n\n"
+            header += f"# 🎯 Review Difficulty: {'⭐' * review.difficulty}\n"
+            if review.keywords:
+                header += f"# 🔑 Key Keywords: {', '.join(review.keywords)}\n"
+            header += "\n"
+
+        files: Dict[str, List[Finding]] = {}
+        for finding in review.findings:
+            files.setdefault(finding.file, []).append(finding)
+
+        file_reviews = [(file_name, self.render_file_findings(findings)) for file_name, findings in files.items()]
+        return header + (self.format_file_sections(file_reviews) or "NO ISSUE")
+
+    @staticmethod
+    def parse_file_sections(report: str) -> Dict[str, str]:
+        """이전 통합 리포트에서 파일별 섹션을 {파일 경로: 리뷰 결과}로 추출합니다."""
+        if not report:
+            return {}
+
+        body = report
+        footer_index = body.rfind(REPORT_FOOTER.rstrip("\n"))
+        if footer_index != -1:
+            body = body[:footer_index]
+
+        matches = list(FILE_SECTION_PATTERN.finditer(body))
+        sections = {}
+        for index, match in enumerate(matches):
+            end = matches[index + 1].start() if index + 1 < len(matches) else len(body)
+            sections[match.group(1)] = body[match.end():end].strip()
+        return sections
+
+    @staticmethod
+    def is_error_section(review_text: str) -> bool:
+        """리뷰 실패로 오류 문구만 남은 섹션인지 확인합니다."""
+        return (review_text or "").strip().startswith(REVIEW_ERROR_MESSAGE)
+
+    def merge_file_reviews(self, file_order: List[str], new_reviews: Dict[str, str],
+                           previous_reviews: Dict[str, str]) -> str:
+        """새로 리뷰한 파일은 새 결과로, 나머지 파일은 이전 결과를 이어받아 파일 순서대로 병합합니다."""
+        merged = []
+        carried = 0
+        for file_name in file_order:
+            if file_name in new_reviews:
+                merged.append((file_name, new_reviews[file_name]))
+            elif file_name in previous_reviews:
+                merged.append((file_name, previous_reviews[file_name]))
+                carried += 1
+
+        logger.info(f"[Incremental] 새 리뷰 {len(new_reviews)}개 파일, 이전 결과 유지 {carried}개 파일")
+        return self.format_file_sections(merged) or "NO ISSUE"
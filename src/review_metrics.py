@@ -0,0 +1,196 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from loguru import logger
+
+# Ollama 응답에서 누적할 토큰/시간 카운터 (duration은 나노초)
+GENERATION_COUNTERS = [
+    "prompt_eval_count", "prompt_eval_duration", "eval_count", "eval_duration", "load_duration"
+]
+
+_current_trace: ContextVar[Optional["ReviewTrace"]] = ContextVar("review_trace", default=None)
+
+
+class ReviewTrace:
+    """리뷰 한 건의 단계별 소요 시간과 Ollama 토큰 카운터."""
+
+    def __init__(self, repo: str, pr_number: int, queue_wait: Optional[float] = None):
+        self.repo = repo
+        self.pr_number = pr_number
+        self.queue_wait = queue_wait
+        self.started_at = time.time()
+        self.spans: Dict[str, Dict[str, float]] = {}
+        self.generation = {counter: 0 for counter in GENERATION_COUNTERS}
+        self.generation["requests"] = 0
+        self.status = "running"
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started_at
+            with self._lock:
+                span = self.spans.setdefault(name, {"seconds": 0.0, "count": 0})
+                span["seconds"] += elapsed
+                span["count"] += 1
+
+    def record_generation(self, metrics: Dict[str, Any]) -> None:
+        with self._lock:
+            self.generation["requests"] += 1
+            for counter in GENERATION_COUNTERS:
+                self.generation[counter] += metrics.get(counter) or 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        generation = dict(self.generation)
+        eval_seconds = generation["eval_duration"] / 1e9
+        prompt_eval_seconds = generation["prompt_eval_duration"] / 1e9
+        generation["tokens_per_second"] = round(generation["eval_count"] / eval_seconds, 2) if eval_seconds else None
+        generation["prompt_tokens_per_second"] = (
+            round(generation["prompt_eval_count"] / prompt_eval_seconds, 2) if prompt_eval_seconds else None
+        )
+        return {
+            "repo": self.repo,
+            "pr_number": self.pr_number,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration": round(time.time() - self.started_at, 4),
+            "queue_wait": round(self.queue_wait, 4) if self.queue_wait is not None else None,
+            # 병렬 리뷰에서는 같은 단계가 겹쳐 실행되므로 seconds는 단계별 누적 시간입니다.
+            "spans": {name: {"seconds": round(span["seconds"], 4), "count": span["count"]}
+                      for name, span in self.spans.items()},
+            "generation": generation,
+        }
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """현재 리뷰 trace에 단계 소요 시간을 기록합니다. 진행 중인 trace가 없으면 아무것도 하지 않습니다."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    with trace.span(name):
+        yield
+
+
+def record_generation(metrics: Dict[str, Any]) -> None:
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.record_generation(metrics)
+
+
+class ReviewMetrics:
+    """리뷰 trace를 시작/종료하고 누적 지표를 JSON Lines 파일과 Prometheus 텍스트 형식으로 내보냅니다.
+
+    trace는 contextvar로 전달되므로 리뷰를 실행하는 스레드(또는 컨텍스트를 복사한 worker)에서 span()을 호출하면 됩니다.
+    """
+
+    def __init__(self, metrics_file: Optional[str] = None, prometheus_textfile: Optional[str] = None):
+        self.metrics_file = metrics_file
+        self.prometheus_textfile = prometheus_textfile
+        self._lock = threading.Lock()
+        self.reviews: Dict[str, int] = {}
+        self.stage_seconds: Dict[str, float] = {}
+        self.stage_count: Dict[str, int] = {}
+        self.generation_totals = {counter: 0 for counter in GENERATION_COUNTERS}
+        self.generation_requests = 0
+        self.queue_wait_seconds = 0.0
+        self.queue_wait_count = 0
+
+    @contextmanager
+    def review(self, repo: str, pr_number: int, queue_wait: Optional[float] = None) -> Iterator[ReviewTrace]:
+        """리뷰 한 건을 trace로 감싸고, 끝나면 누적 지표에 반영해 내보냅니다."""
+        trace = ReviewTrace(repo, pr_number, queue_wait=queue_wait)
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+            trace.status = "success"
+        except Exception:
+            trace.status = "failure"
+            raise
+        finally:
+            _current_trace.reset(token)
+            self._finish(trace)
+
+    def _finish(self, trace: ReviewTrace) -> None:
+        record = trace.to_dict()
+        with self._lock:
+            self.reviews[trace.status] = self.reviews.get(trace.status, 0) + 1
+            for name, span_data in record["spans"].items():
+                self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + span_data["seconds"]
+                self.stage_count[name] = self.stage_count.get(name, 0) + span_data["count"]
+            for counter in GENERATION_COUNTERS:
+                self.generation_totals[counter] += trace.generation[counter]
+            self.generation_requests += trace.generation["requests"]
+            if trace.queue_wait is not None:
+                self.queue_wait_seconds += trace.queue_wait
+                self.queue_wait_count += 1
+
+        logger.info(f"[Review Metrics] {record}")
+        try:
+            if self.metrics_file:
+                self._append_json_line(record)
+            if self.prometheus_textfile:
+                self._write_prometheus_textfile()
+        except OSError as e:
+            logger.warning(f"[Review Metrics] 지표 파일 기록 실패: {str(e)}")
+
+    def _append_json_line(self, record: Dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(self.metrics_file) or ".", exist_ok=True)
+        with self._lock, open(self.metrics_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _write_prometheus_textfile(self) -> None:
+        # node_exporter textfile collector가 쓰다 만 파일을 읽지 않도록 rename으로 교체합니다.
+        os.makedirs(os.path.dirname(self.prometheus_textfile) or ".", exist_ok=True)
+        temp_path = f"{self.prometheus_textfile}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(temp_path, self.prometheus_textfile)
+
+    def prometheus_text(self) -> str:
+        """누적 지표를 Prometheus text exposition format으로 반환합니다."""
+        with self._lock:
+            lines: List[str] = [
+                "# HELP code_review_reviews_total Completed reviews by status.",
+                "# TYPE code_review_reviews_total counter",
+            ]
+            lines += [f'code_review_reviews_total{{status="{status}"}} {count}'
+                      for status, count in sorted(self.reviews.items())]
+            lines += [
+                "# HELP code_review_stage_seconds Time spent per pipeline stage.",
+                "# TYPE code_review_stage_seconds summary",
+            ]
+            for name in sorted(self.stage_seconds):
+                lines.append(f'code_review_stage_seconds_sum{{stage="{name}"}} {self.stage_seconds[name]:.6f}')
+                lines.append(f'code_review_stage_seconds_count{{stage="{name}"}} {self.stage_count[name]}')
+            lines += [
+                "# HELP code_review_queue_wait_seconds Time reviews waited in the job queue.",
+                "# TYPE code_review_queue_wait_seconds summary",
+                f"code_review_queue_wait_seconds_sum {self.queue_wait_seconds:.6f}",
+                f"code_review_queue_wait_seconds_count {self.queue_wait_count}",
+                "# HELP code_review_generation_requests_total Ollama generate requests.",
+                "# TYPE code_review_generation_requests_total counter",
+                f"code_review_generation_requests_total {self.generation_requests}",
+                "# HELP code_review_prompt_tokens_total Prompt tokens evaluated by Ollama.",
+                "# TYPE code_review_prompt_tokens_total counter",
+                f"code_review_prompt_tokens_total {self.generation_totals['prompt_eval_count']}",
+                "# HELP code_review_generated_tokens_total Tokens generated by Ollama.",
+                "# TYPE code_review_generated_tokens_total counter",
+                f"code_review_generated_tokens_total {self.generation_totals['eval_count']}",
+                "# HELP code_review_ollama_seconds_total Ollama-reported time by phase.",
+                "# TYPE code_review_ollama_seconds_total counter",
+                f'code_review_ollama_seconds_total{{phase="prompt_eval"}} '
+                f"{self.generation_totals['prompt_eval_duration'] / 1e9:.6f}",
+                f'code_review_ollama_seconds_total{{phase="eval"}} {self.generation_totals["eval_duration"] / 1e9:.6f}',
+                f'code_review_ollama_seconds_total{{phase="load"}} {self.generation_totals["load_duration"] / 1e9:.6f}',
+            ]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""PR 이벤트를 HTTP로 받아 처리하는 상주 리뷰 서버.
+
+임베딩 모델, 규칙 인덱스, Ollama 커넥션 풀을 한 번만 준비해 두고(warm) 내부 작업 큐로 리뷰를 처리합니다.
+
+    python src/review_server.py --api-url http://localhost:11434 --port 8000 --concurrency 2
+
+기본으로 127.0.0.1에만 바인딩하며, 다른 주소로 열려면 --webhook-secret(GITHUB_WEBHOOK_SECRET)이 필요합니다.
+
+엔드포인트
+  - POST /webhook : GitHub pull_request 이벤트 (opened / synchronize / reopened)
+  - GET  /metrics : 큐 길이, 처리 건수, 대기/처리 지연(p50/p95)
+  - GET  /metrics/prometheus : 단계별 소요 시간과 Ollama 토큰 카운터 (Prometheus text format)
+  - GET  /healthz : 상태 확인
+
+GITHUB_API_URL 환경 변수와 --api-url을 로컬 stub 서버로 지정하면 외부 의존 없이 실행할 수 있습니다.
+"""
+import argparse
+import hashlib
+import hmac
+import ipaddress
+import json
+import os
+import queue
+import signal
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from loguru import logger
+
+from github_commenter import GitHubCommenter
+from main import (add_review_arguments, build_extractor, build_metrics, build_reviewer, check_review_arguments,
+                  extract_pr_data, review_and_post, setup_logging)
+
+REVIEW_ACTIONS = {"opened", "synchronize", "reopened"}
+
+
+def _percentile(values, percentile: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+    return round(ordered[index], 3)
+
+
+class ReviewServer:
+    """리뷰 작업 큐와 worker 스레드, 지연 통계를 관리합니다."""
+
+    def __init__(self, args: argparse.Namespace, concurrency: int = 1, webhook_secret: Optional[str] = None):
+        self.args = args
+        self.concurrency = max(1, concurrency)
+        self.webhook_secret = webhook_secret
+        self.jobs: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        # (repo, PR 번호) -> [lock, 사용 중인 worker 수]. 같은 PR의 작업은 한 번에 하나만 처리합니다.
+        self._pr_locks: Dict[Tuple[str, int], List[Any]] = {}
+        self._workers = []
+
+        self.in_flight = 0
+        self.processed = 0
+        self.failed = 0
+        self.queue_wait_seconds = deque(maxlen=500)
+        self.processing_seconds = deque(maxlen=500)
+
+        self.review_metrics = build_metrics(args)
+
+        # 모든 작업이 공유하는 리뷰어 (모델/인덱스/HTTP 풀 warm 상태 유지)
+        # worker마다 max_workers개의 요청을 동시에 보내므로 HTTP 풀도 그만큼 잡아야 풀 대기로 직렬화되지 않습니다.
+        self.reviewer = build_reviewer(args, http_pool_maxsize=self.concurrency * max(1, args.max_workers))
+        try:
+            self.reviewer.warm_up()
+        except Exception as e:
+            logger.warning(f"[Review Server] 컨벤션 리소스 미리 로드 실패 (필요 시 다시 시도): {str(e)}")
+
+    def start(self) -> None:
+        for index in range(self.concurrency):
+            worker = threading.Thread(target=self._work, name=f"review-worker-{index}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        logger.info(f"[Review Server] worker {self.concurrency}개 시작")
+
+    def stop(self) -> None:
+        for _ in self._workers:
+            self.jobs.put(None)
+        for worker in self._workers:
+            worker.join(timeout=5)
+        self.reviewer.close()
+
+    def verify_signature(self, body: bytes, signature: Optional[str]) -> bool:
+        if not self.webhook_secret:
+            return True
+        expected = "sha256=" + hmac.new(self.webhook_secret.encode(), body, hashlib.sha256).hexdigest()
+        return bool(signature) and hmac.compare_digest(expected, signature)
+
+    def enqueue(self, event: Dict[str, Any]) -> Optional[str]:
+        """pull_request 이벤트를 작업으로 등록합니다. 리뷰 대상이 아니거나 이미 대기 중이면 None을 반환합니다."""
+        if event.get("action") not in REVIEW_ACTIONS or "pull_request" not in event:
+            return None
+
+        pull_request = event["pull_request"]
+        job = {
+            "repo": event["repository"]["full_name"],
+            "pr_number": pull_request["number"],
+            "base_sha": pull_request["base"]["sha"],
+            "head_sha": pull_request["head"]["sha"],
+            "enqueued_at": time.perf_counter(),
+        }
+        key = (job["repo"], job["pr_number"], job["head_sha"])
+        with self._lock:
+            if key in self._pending:
+                return None
+            self._pending.add(key)
+        job["id"] = f"{job['repo']}#{job['pr_number']}@{job['head_sha'][:7]}"
+        self.jobs.put(job)
+        logger.info(f"[Review Server] 작업 등록: {job['id']} (대기 {self.jobs.qsize()}개)")
+        return job["id"]
+
+    @contextmanager
+    def _serialized(self, repo: str, pr_number: int) -> Iterator[None]:
+        """같은 PR의 작업(예: 연속 push)을 순서대로 처리합니다.
+
+        동시에 리뷰하면 두 작업이 모두 기존 봇 코멘트를 찾지 못해 코멘트가 중복으로 생성될 수 있습니다.
+        """
+        key = (repo, pr_number)
+        with self._lock:
+            entry = self._pr_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._pr_locks[key]
+
+    def _work(self) -> None:
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            with self._serialized(job["repo"], job["pr_number"]):
+                self._process(job)
+
+    def _process(self, job: Dict[str, Any]) -> None:
+        started_at = time.perf_counter()
+        queue_wait = started_at - job["enqueued_at"]
+        with self._lock:
+            self.in_flight += 1
+            self.queue_wait_seconds.append(queue_wait)
+        try:
+            with self.review_metrics.review(job["repo"], job["pr_number"], queue_wait=queue_wait):
+                self._review(job)
+            with self._lock:
+                self.processed += 1
+        except Exception as e:
+            logger.error(f"[Review Server] {job['id']} 리뷰 실패: {str(e)}")
+            with self._lock:
+                self.failed += 1
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.processing_seconds.append(time.perf_counter() - started_at)
+                self._pending.discard((job["repo"], job["pr_number"], job["head_sha"]))
+            self.jobs.task_done()
+
+    def _review(self, job: Dict[str, Any]) -> None:
+        job_args = argparse.Namespace(**vars(self.args))
+        job_args.repo = job["repo"]
+        job_args.pr_number = job["pr_number"]
+        job_args.base_sha = job["base_sha"]
+        job_args.head_sha = job["head_sha"]
+
+        logger.info(f"[Review Server] 리뷰 시작: {job['id']}")
+        extractor = build_extractor(job_args)
+        pr_data = extract_pr_data(job_args, extractor)
+        github_commenter = GitHubCommenter(job_args.repo, job_args.pr_number)
+        review_and_post(job_args, extractor, self.reviewer, github_commenter, pr_data)
+        logger.info(f"[Review Server] 리뷰 완료: {job['id']}")
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "queue_depth": self.jobs.qsize(),
+                "in_flight": self.in_flight,
+                "processed": self.processed,
+                "failed": self.failed,
+                "concurrency": self.concurrency,
+                "queue_wait_seconds": {
+                    "p50": _percentile(self.queue_wait_seconds, 50),
+                    "p95": _percentile(self.queue_wait_seconds, 95),
+                },
+                "processing_seconds": {
+                    "p50": _percentile(self.processing_seconds, 50),
+                    "p95": _percentile(self.processing_seconds, 95),
+                },
+                "ollama_endpoints": self.reviewer.endpoint_pool.stats(),
+            }
+
+
+def make_handler(server: ReviewServer):
+    class WebhookHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            logger.debug(f"[Review Server] {self.address_string()} {format % args}")
+
+        def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/healthz":
+                self._send_json(200, {"status": "ok"})
+            elif self.path == "/metrics":
+                self._send_json(200, server.metrics())
+            elif self.path == "/metrics/prometheus":
+                body = server.review_metrics.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/webhook":
+                self._send_json(404, {"error": "not found"})
+                return
+
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if not server.verify_signature(body, self.headers.get("X-Hub-Signature-256")):
+                self._send_json(401, {"error": "invalid signature"})
+                return
+
+            event_type = self.headers.get("X-GitHub-Event", "pull_request")
+            if event_type == "ping":
+                self._send_json(200, {"status": "pong"})
+                return
+            if event_type != "pull_request":
+                self._send_json(202, {"status": "ignored"})
+                return
+
+            try:
+                event = json.loads(body)
+            except json.JSONDecodeError:
+                self._send_json(400, {"error": "invalid json"})
+                return
+
+            job_id = server.enqueue(event)
+            if job_id is None:
+                self._send_json(202, {"status": "ignored"})
+            else:
+                self._send_json(202, {"status": "queued", "job": job_id, "queue_depth": server.jobs.qsize()})
+
+    return WebhookHandler
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Long-lived PR review server")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Listen address (non-loopback addresses require --webhook-secret)")
+    parser.add_argument("--port", type=int, default=8000, help="Listen port")
+    parser.add_argument("--concurrency", type=int, default=1, help="Number of reviews processed concurrently")
+    parser.add_argument("--webhook-secret", default=os.getenv("GITHUB_WEBHOOK_SECRET"),
+                        help="GitHub webhook secret for X-Hub-Signature-256 verification")
+    add_review_arguments(parser)
+    args = check_review_arguments(parser, parser.parse_args())
+    # 서명 검증 없이 외부에 열면 누구나 리뷰 작업(LLM 호출, PR 코멘트 게시)을 일으킬 수 있습니다.
+    if not args.webhook_secret and not _is_loopback(args.host):
+        parser.error("--webhook-secret (or GITHUB_WEBHOOK_SECRET) is required to listen on a non-loopback address")
+    return args
+
+
+def main():
+    load_dotenv()
+    args = parse_args()
+    setup_logging(args)
+    # webhook 이벤트의 저장소를 사용하므로 git 추출은 지원하지 않습니다.
+    if args.extract_source == "git":
+        raise SystemExit("--extract-source git is not supported in server mode")
+
+    review_server = ReviewServer(args, concurrency=args.concurrency, webhook_secret=args.webhook_secret)
+    review_server.start()
+
+    http_server = ThreadingHTTPServer((args.host, args.port), make_handler(review_server))
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=http_server.shutdown).start())
+    logger.info(f"[Review Server] http://{args.host}:{args.port} 에서 대기 중")
+    try:
+        http_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        http_server.server_close()
+        review_server.stop()
+        logger.info("[Review Server] 종료")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+
+
+class NumpyRuleCollection:
+    """정규화된 규칙 임베딩을 메모리 매핑된 .npy로 보관하고 exact cosine top-k를 계산하는 컬렉션.
+
+    ChromaDB 컬렉션에서 리뷰어와 인덱스 빌더가 사용하는 메서드(query/get/upsert/delete)만
+    같은 입출력 형태로 제공하므로 chromadb 클라이언트 대신 끼워 넣을 수 있습니다.
+    거리는 Chroma의 cosine space와 같이 1 - cosine similarity입니다.
+    """
+
+    def __init__(self, name: str, index_dir: str, metadata: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.metadata = metadata or {}
+        self._vectors_path = os.path.join(index_dir, f"{name}.npy")
+        self._sidecar_path = os.path.join(index_dir, f"{name}.json")
+        self._lock = threading.Lock()
+
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.embeddings = np.zeros((0, 0), dtype=np.float32)
+        # get()이 id마다 리스트를 선형 탐색하지 않도록 id → 행 번호를 보관합니다.
+        self._positions: Dict[str, int] = {}
+
+        if os.path.exists(self._sidecar_path):
+            self._load()
+
+    def _load(self) -> None:
+        with open(self._sidecar_path, encoding="utf-8") as f:
+            sidecar = json.load(f)
+        self.ids = sidecar["ids"]
+        self.documents = sidecar["documents"]
+        self.metadatas = sidecar["metadatas"]
+        self.metadata = sidecar.get("metadata", self.metadata)
+        self._positions = {rule_id: index for index, rule_id in enumerate(self.ids)}
+        if self.ids:
+            self.embeddings = np.load(self._vectors_path, mmap_mode="r")
+
+    def _save(self) -> None:
+        tmp_vectors = f"{self._vectors_path}.tmp.npy"
+        tmp_sidecar = f"{self._sidecar_path}.tmp"
+        np.save(tmp_vectors, np.ascontiguousarray(self.embeddings, dtype=np.float32))
+        with open(tmp_sidecar, "w", encoding="utf-8") as f:
+            json.dump({
+                "ids": self.ids,
+                "documents": self.documents,
+                "metadatas": self.metadatas,
+                "metadata": self.metadata
+            }, f, ensure_ascii=False)
+        os.replace(tmp_vectors, self._vectors_path)
+        os.replace(tmp_sidecar, self._sidecar_path)
+        # 저장 후에는 다시 메모리 매핑으로 열어 프로세스 간 페이지 캐시를 공유합니다.
+        self.embeddings = np.load(self._vectors_path, mmap_mode="r") if self.ids else self.embeddings
+
+    @staticmethod
+    def _normalize(vectors: Sequence[Sequence[float]]) -> np.ndarray:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix[np.newaxis, :]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def query(self, query_embeddings: Sequence[Sequence[float]], n_results: int = 10,
+              include: Optional[List[str]] = None) -> Dict[str, List[List[Any]]]:
+        """모든 쿼리 벡터에 대해 행렬곱 한 번으로 top-k 규칙을 찾습니다."""
+        queries = self._normalize(query_embeddings)
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        if not self.ids or n_results <= 0:
+            for key in results:
+                results[key] = [[] for _ in range(len(queries))]
+            return results
+
+        similarities = queries @ self.embeddings.T
+        k = min(n_results, len(self.ids))
+        top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        for row, candidates in enumerate(top):
+            ordered = candidates[np.argsort(-similarities[row, candidates])]
+            results["ids"].append([self.ids[i] for i in ordered])
+            results["documents"].append([self.documents[i] for i in ordered])
+            results["metadatas"].append([self.metadatas[i] for i in ordered])
+            results["distances"].append([float(1.0 - similarities[row, i]) for i in ordered])
+        return results
+
+    def get(self, ids: Optional[List[str]] = None, include: Optional[List[str]] = None) -> Dict[str, List[Any]]:
+        if ids is None:
+            indexes = range(len(self.ids))
+        else:
+            indexes = [self._positions[i] for i in ids if i in self._positions]
+        return {
+            "ids": [self.ids[i] for i in indexes],
+            "documents": [self.documents[i] for i in indexes],
+            "metadatas": [self.metadatas[i] for i in indexes],
+        }
+
+    def upsert(self, ids: List[str], embeddings: Sequence[Sequence[float]], documents: List[str],
+               metadatas: List[Dict[str, Any]]) -> None:
+        vectors = self._normalize(embeddings)
+        with self._lock:
+            matrix = np.array(self.embeddings, dtype=np.float32) if self.ids else np.zeros((0, vectors.shape[1]), np.float32)
+            positions = {rule_id: index for index, rule_id in enumerate(self.ids)}
+            appended = []
+            for rule_id, vector, document, metadata in zip(ids, vectors, documents, metadatas):
+                if rule_id in positions:
+                    index = positions[rule_id]
+                    matrix[index] = vector
+                    self.documents[index] = document
+                    self.metadatas[index] = metadata
+                else:
+                    positions[rule_id] = len(self.ids)
+                    self.ids.append(rule_id)
+                    self.documents.append(document)
+                    self.metadatas.append(metadata)
+                    appended.append(vector)
+            if appended:
+                matrix = np.vstack([matrix, np.stack(appended)])
+            self.embeddings = matrix
+            self._positions = positions
+            self._save()
+
+    def delete(self, ids: List[str]) -> None:
+        with self._lock:
+            removed = set(ids)
+            keep = [index for index, rule_id in enumerate(self.ids) if rule_id not in removed]
+            self.embeddings = np.array(self.embeddings, dtype=np.float32)[keep] if self.ids else self.embeddings
+            self.ids = [self.ids[i] for i in keep]
+            self.documents = [self.documents[i] for i in keep]
+            self.metadatas = [self.metadatas[i] for i in keep]
+            self._positions = {rule_id: index for index, rule_id in enumerate(self.ids)}
+            self._save()
+
+
+class NumpyRuleIndex:
+    """NumpyRuleCollection을 디렉터리 단위로 관리하는 chromadb 클라이언트 대체 백엔드."""
+
+    def __init__(self, path: str = "./rule_index"):
+        self.path = path
+        self._collections: Dict[str, NumpyRuleCollection] = {}
+        os.makedirs(self.path, exist_ok=True)
+
+    def _exists(self, name: str) -> bool:
+        return os.path.exists(os.path.join(self.path, f"{name}.json"))
+
+    def get_collection(self, name: str) -> NumpyRuleCollection:
+        if name not in self._collections:
+            if not self._exists(name):
+                raise ValueError(f"Collection {name} does not exist.")
+            self._collections[name] = NumpyRuleCollection(name, self.path)
+            logger.info(f"[Rule Index] '{name}' 로드 완료 ({self._collections[name].count()}개 규칙)")
+        return self._collections[name]
+
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None,
+                                 embedding_function=None) -> NumpyRuleCollection:
+        if name not in self._collections:
+            self._collections[name] = NumpyRuleCollection(name, self.path, metadata)
+        return self._collections[name]
+
+    def list_collections(self) -> List[str]:
+        return sorted(name[:-len(".json")] for name in os.listdir(self.path) if name.endswith(".json"))
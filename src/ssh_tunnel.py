@@ -0,0 +1,223 @@
+import atexit
+import signal
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from typing import List, Optional, Sequence, Union
+
+from loguru import logger
+
+
+def find_available_port(candidates: Sequence[int] = range(8080, 8100)) -> int:
+    """후보 포트 중 바인드 가능한 첫 포트를 반환합니다. 모두 사용 중이면 OS가 고른 임시 포트를 사용합니다."""
+    for port in list(candidates) + [0]:
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+                sock.bind(("127.0.0.1", port))
+                return sock.getsockname()[1]
+        except OSError:
+            continue
+    raise Exception("사용 가능한 포트를 찾을 수 없습니다")
+
+
+def is_port_open(port: int, host: str = "127.0.0.1", timeout: float = 0.2) -> bool:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        return sock.connect_ex((host, port)) == 0
+
+
+class SSHTunnel:
+    """로컬 포트를 원격 Ollama 포트로 포워딩하는 SSH 터널을 직접 소유하고 관리합니다.
+
+    - 기본: `ssh -N -L`을 Popen으로 띄우고 핸들을 보관합니다 (-f/프로세스 검색 없음).
+    - control_path가 있으면 ControlMaster 연결을 재사용합니다. 살아 있는 master가 있으면
+      `-O forward`로 포워딩만 추가하므로 SSH 핸드셰이크 없이 바로 준비되고, 종료 시 `-O cancel`로
+      포워딩만 제거하여 master는 control_persist 동안 다음 실행을 위해 남겨 둡니다.
+    - 준비 여부는 프로세스 생존과 로컬 포트 연결을 짧은 간격부터 지수 backoff로 확인합니다.
+    - ensure()는 터널이 끊어졌으면 같은 로컬 포트로 다시 연결합니다.
+
+    ssh_command로 ssh 대신 다른 실행 파일(예: 로컬 포워더)을 지정할 수 있습니다.
+    """
+
+    def __init__(self, host: str, user: str, port: Union[int, str] = 22, remote_host: str = "localhost",
+                 remote_port: int = 11434, local_port: Optional[int] = None, control_path: Optional[str] = None,
+                 control_persist: str = "10m", connect_timeout: int = 30, ready_timeout: float = 30.0,
+                 ssh_command: Optional[List[str]] = None):
+        self.host = host
+        self.user = user
+        self.port = str(port)
+        self.remote_host = remote_host
+        self.remote_port = remote_port
+        self.local_port = local_port
+        self.control_path = control_path
+        self.control_persist = control_persist
+        self.connect_timeout = connect_timeout
+        self.ready_timeout = ready_timeout
+        self.ssh_command = ssh_command or ["ssh"]
+        self.process: Optional[subprocess.Popen] = None
+        self._stderr_file = None
+        self.reconnects = 0
+        self._forward_added = False
+        # SIGTERM 핸들러가 start()/ensure() 도중의 같은 스레드에서 실행되어도 교착되지 않도록 재진입 가능한 lock을 씁니다.
+        self._lock = threading.RLock()
+        self._cleanup_registered = False
+
+    @property
+    def destination(self) -> str:
+        return f"{self.user}@{self.host}"
+
+    @property
+    def forward_spec(self) -> str:
+        return f"{self.local_port}:{self.remote_host}:{self.remote_port}"
+
+    @property
+    def url(self) -> str:
+        return f"http://localhost:{self.local_port}"
+
+    def _base_options(self) -> List[str]:
+        return [
+            "-o", "StrictHostKeyChecking=no",
+            "-o", "UserKnownHostsFile=/dev/null",
+            "-o", f"ConnectTimeout={self.connect_timeout}",
+            "-o", "ServerAliveInterval=30",
+            "-o", "ServerAliveCountMax=3",
+            "-o", "BatchMode=yes",  # 인터랙티브 입력 방지 (인증 실패 시 바로 종료)
+            "-o", "ExitOnForwardFailure=yes",  # 포워딩 실패 시 바로 종료
+            "-p", self.port,
+        ]
+
+    def _control(self, operation: str, *extra: str, timeout: float = 10) -> subprocess.CompletedProcess:
+        command = self.ssh_command + ["-S", self.control_path, "-O", operation, *extra, "-p", self.port, self.destination]
+        return subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+
+    def start(self) -> str:
+        """터널을 열고 준비될 때까지 기다린 뒤 로컬 API URL을 반환합니다."""
+        with self._lock:
+            self._start_locked()
+        return self.url
+
+    def _start_locked(self) -> None:
+        started_at = time.perf_counter()
+        if self.local_port is None:
+            self.local_port = find_available_port()
+
+        if self.control_path:
+            self._start_multiplexed()
+        else:
+            command = self.ssh_command + ["-N", *self._base_options(), "-L", self.forward_spec, self.destination]
+            logger.info(f"SSH 터널 시작: {' '.join(command)}")
+            # ssh가 실행되는 동안 아무도 읽지 않는 PIPE는 가득 차면 ssh를 멈추게 하므로 임시 파일에 기록합니다.
+            self._stderr_file = tempfile.TemporaryFile()
+            self.process = subprocess.Popen(
+                command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=self._stderr_file
+            )
+
+        self._wait_ready()
+        self._register_cleanup()
+        logger.info(f"SSH 터널 준비 완료: {self.url} ({time.perf_counter() - started_at:.2f}초)")
+
+    def _start_multiplexed(self) -> None:
+        if self._control("check").returncode == 0:
+            logger.info(f"기존 SSH master 연결 재사용: {self.control_path}")
+        else:
+            # master는 control_persist 동안 유지되어 다음 실행에서 재사용됩니다.
+            command = self.ssh_command + [
+                "-M", "-S", self.control_path, "-o", f"ControlPersist={self.control_persist}",
+                "-N", "-f", *self._base_options(), self.destination
+            ]
+            logger.info(f"SSH master 연결 시작: {' '.join(command)}")
+            result = subprocess.run(command, capture_output=True, text=True, timeout=self.connect_timeout + 30)
+            if result.returncode != 0:
+                raise Exception(f"SSH master 연결 실패: {result.stderr.strip()}")
+
+        result = self._control("forward", "-L", self.forward_spec)
+        if result.returncode != 0:
+            raise Exception(f"SSH 포트 포워딩 추가 실패: {result.stderr.strip()}")
+        self._forward_added = True
+
+    def _wait_ready(self) -> None:
+        deadline = time.monotonic() + self.ready_timeout
+        delay = 0.01
+        while True:
+            if self.process is not None and self.process.poll() is not None:
+                stderr = self._read_stderr()
+                self._stop_locked()
+                raise Exception(f"SSH 터널 프로세스가 종료되었습니다: {stderr}")
+            if is_port_open(self.local_port):
+                return
+            if time.monotonic() >= deadline:
+                self._stop_locked()
+                raise Exception(f"SSH 터널 연결 확인 실패 - 타임아웃 ({self.ready_timeout:.0f}초)")
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
+
+    def _read_stderr(self, limit: int = 4096) -> str:
+        """ssh stderr 기록의 마지막 limit 바이트를 반환합니다."""
+        if self._stderr_file is None:
+            return ""
+        self._stderr_file.seek(0, 2)
+        size = self._stderr_file.tell()
+        self._stderr_file.seek(max(0, size - limit))
+        return self._stderr_file.read().decode("utf-8", errors="replace").strip()
+
+    def is_alive(self) -> bool:
+        if self.process is not None:
+            return self.process.poll() is None
+        return self._forward_added and is_port_open(self.local_port)
+
+    def ensure(self) -> None:
+        """터널이 끊어졌으면 같은 로컬 포트로 다시 연결합니다."""
+        if self.is_alive():
+            return
+        with self._lock:
+            if self.is_alive():
+                return
+            logger.warning(f"SSH 터널이 끊어졌습니다. 다시 연결합니다: {self.forward_spec}")
+            self._stop_locked()
+            self._start_locked()
+            self.reconnects += 1
+
+    def stop(self, *_args) -> None:
+        with self._lock:
+            self._stop_locked()
+
+    def _stop_locked(self) -> None:
+        if self.process is not None:
+            process, self.process = self.process, None
+            if process.poll() is None:
+                logger.info(f"SSH 터널 프로세스 종료: PID {process.pid}")
+                process.terminate()
+                try:
+                    process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    logger.warning("SSH 터널 프로세스 강제 종료")
+                    process.kill()
+                    process.wait()
+        if self._stderr_file is not None:
+            self._stderr_file.close()
+            self._stderr_file = None
+        if self._forward_added:
+            self._forward_added = False
+            try:
+                self._control("cancel", "-L", self.forward_spec)
+            except Exception as e:
+                logger.warning(f"SSH 포트 포워딩 제거 실패: {str(e)}")
+
+    def _register_cleanup(self) -> None:
+        if self._cleanup_registered:
+            return
+        self._cleanup_registered = True
+        atexit.register(self.stop)
+        # SIGTERM 기본 동작이면 터널을 정리한 뒤 종료하도록 합니다 (다른 핸들러는 덮어쓰지 않음).
+        if threading.current_thread() is threading.main_thread() and \
+                signal.getsignal(signal.SIGTERM) is signal.SIG_DFL:
+            def handle_sigterm(signum, frame):
+                # lock 없이 프로세스만 종료합니다 (다른 스레드가 lock을 잡고 준비를 기다리는 중일 수 있음).
+                # 포워딩 제거 등 나머지 정리는 종료 과정의 atexit stop()이 수행합니다.
+                process = self.process
+                if process is not None and process.poll() is None:
+                    process.terminate()
+                raise SystemExit(128 + signum)
+            signal.signal(signal.SIGTERM, handle_sigterm)
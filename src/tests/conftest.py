@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 모듈들은 src/에서 평면 import(`from diff_parser import ...`)하므로 테스트도 같은 경로를 사용합니다.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
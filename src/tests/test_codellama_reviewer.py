@@ -0,0 +1,51 @@
+import json
+import socket
+
+import pytest
+
+from codellama_reviewer import CodeLlamaReviewer
+from review_formatter import REVIEW_ERROR_MESSAGE
+
+
+def finding(file: str = "") -> dict:
+    return {"file": file, "line": 3, "severity": "medium", "rule_type": "Convention", "confidence": 3,
+            "title": "t", "explanation": "e", "suggestion": "s"}
+
+
+def response(*findings: dict) -> str:
+    return json.dumps({"summary": ["s"], "difficulty": 2, "keywords": [], "findings": list(findings)})
+
+
+@pytest.fixture
+def reviewer():
+    # 닫힌 포트를 엔드포인트로 써서 생성 요청은 연결 오류로 실패합니다.
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+    reviewer = CodeLlamaReviewer(url, structured_output=True, health_check_interval=0, connect=False)
+    yield reviewer
+    reviewer.close()
+
+
+def test_only_single_file_units_fill_missing_finding_file(reviewer):
+    findings, raw = reviewer._parse_reviews([
+        (["a.py"], response(finding())),
+        (["b.py", "c.py"], response(finding(), finding("c.py"))),
+        (["d.py", "e.py"], "not json"),
+    ])
+
+    assert [item.file for item in findings.findings] == ["a.py", "", "c.py"]
+    assert raw == [("d.py, e.py", "not json")]
+
+
+def test_review_findings_returns_error_report_when_review_fails(reviewer, monkeypatch):
+    def fail(pr_data, parallel):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(reviewer, "_review_pr", fail)
+
+    findings, report = reviewer.review_findings("=== File: a.py ===\n+x\n")
+
+    assert findings.findings == []
+    assert report.startswith(REVIEW_ERROR_MESSAGE)
+    assert reviewer.review_code("=== File: a.py ===\n+x\n").startswith(REVIEW_ERROR_MESSAGE)
@@ -0,0 +1,116 @@
+from diff_parser import DiffPositionIndex, iter_diff_lines, parse_unified_diff
+
+DIFF = """diff --git a/app/service.py b/app/service.py
+index 1111111..2222222 100644
+--- a/app/service.py
++++ b/app/service.py
+@@ -1,4 +1,5 @@
+ import os
+--- removed comment
++++ added comment
++import sys
+ 
+ def run():
+diff --git a/docs/old.md b/docs/new.md
+similarity index 90%
+rename from docs/old.md
+rename to docs/new.md
+index 3333333..4444444 100644
+--- a/docs/old.md
++++ b/docs/new.md
+@@ -1 +1 @@
+-old
+\\ No newline at end of file
++new
+\\ No newline at end of file
+diff --git a/added.py b/added.py
+new file mode 100644
+index 0000000..5555555
+--- /dev/null
++++ b/added.py
+@@ -0,0 +1,2 @@
++a = 1
++b = 2
+diff --git a/gone.py b/gone.py
+deleted file mode 100644
+index 6666666..0000000
+--- a/gone.py
++++ /dev/null
+@@ -1 +0,0 @@
+-x = 1
+diff --git a/logo.png b/logo.png
+index 7777777..8888888 100644
+Binary files a/logo.png and b/logo.png differ
+"""
+
+PATCH = """@@ -10,4 +10,5 @@ class Service:
+ context 10
+-removed 11
++added 11
++added 12
+ context 13
+@@ -40,2 +41,3 @@ def other():
+ context 41
++added 42
+ context 43"""
+
+
+def test_parse_unified_diff_files_and_statuses():
+    files = {file.filename: file for file in parse_unified_diff(DIFF.splitlines())}
+
+    assert list(files) == ["app/service.py", "docs/new.md", "added.py", "gone.py", "logo.png"]
+    assert files["docs/new.md"].status == "renamed"
+    assert files["docs/new.md"].previous_filename == "docs/old.md"
+    assert files["added.py"].status == "added"
+    assert files["gone.py"].status == "removed"
+    assert files["logo.png"].patch is None
+
+
+def test_parse_unified_diff_keeps_body_lines_that_look_like_headers():
+    service = next(parse_unified_diff(DIFF.splitlines()))
+
+    # "--- "/"+++ "로 시작하는 본문 줄도 hunk 줄 수에 따라 변경 줄로 셉니다.
+    assert (service.additions, service.deletions) == (2, 1)
+    assert service.patch.splitlines()[2:4] == ["--- removed comment", "+++ added comment"]
+    assert service.patch.startswith("@@ -1,4 +1,5 @@")
+
+
+def test_parse_unified_diff_no_newline_marker_stays_in_patch():
+    renamed = list(parse_unified_diff(DIFF.splitlines()))[1]
+
+    assert renamed.patch.splitlines() == ["@@ -1 +1 @@", "-old", "\\ No newline at end of file",
+                                          "+new", "\\ No newline at end of file"]
+    assert (renamed.additions, renamed.deletions) == (1, 1)
+
+
+def test_iter_diff_lines_splits_only_on_newline():
+    chunks = [b"@@ -1 +1 @@\n-a\x0cb\n+a\xe2\x80", b"\xa8b\r\n", b"+tail"]
+
+    assert list(iter_diff_lines(chunks)) == ["@@ -1 +1 @@", "-a\x0cb", "+a b\r", "+tail"]
+
+
+def test_position_index_maps_added_and_context_lines():
+    index = DiffPositionIndex()
+    index.add_patch("app/service.py", PATCH)
+
+    assert "app/service.py" in index
+    assert index.position("app/service.py", 10) == 1
+    assert index.position("app/service.py", 11) == 3
+    assert index.position("app/service.py", 13) == 5
+    # 두 번째 hunk 헤더도 position을 하나 차지합니다.
+    assert index.position("app/service.py", 41) == 7
+    assert index.position("app/service.py", 43) == 9
+    assert index.position("app/service.py", 30) is None
+    assert len(index) == 7
+
+
+def test_position_index_anchor_moves_to_nearest_line():
+    index = DiffPositionIndex.from_patches({"app/service.py": PATCH, "empty.py": ""})
+
+    assert index.anchor("app/service.py", 12) == (12, 4)
+    assert index.anchor("app/service.py", 15) == (13, 5)
+    assert index.anchor("app/service.py", 39) == (41, 7)
+    assert index.anchor("app/service.py", 25) is None
+    assert index.anchor("app/service.py", 16, max_distance=2) is None
+    assert index.anchor("empty.py", 1) is None
+    assert "empty.py" not in index
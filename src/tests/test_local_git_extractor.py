@@ -0,0 +1,131 @@
+import os
+import re
+import subprocess
+
+import pytest
+
+from pr_extractor import LocalGitExtractor
+
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "test", "GIT_AUTHOR_EMAIL": "test@example.com",
+    "GIT_COMMITTER_NAME": "test", "GIT_COMMITTER_EMAIL": "test@example.com",
+    "GIT_CONFIG_GLOBAL": os.devnull, "GIT_CONFIG_NOSYSTEM": "1",
+}
+
+
+def git(repo, *args):
+    return subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True, text=True,
+                          env={**os.environ, **GIT_ENV}).stdout.strip()
+
+
+def write(repo, path, content: bytes):
+    target = repo / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_bytes(content)
+
+
+def sections(pr_text: str) -> dict:
+    """PRExtractor 출력 형식을 {파일 경로: 섹션 본문}으로 나눕니다."""
+    matches = list(re.finditer(r'^=== File: (.*?) ===$', pr_text, re.MULTILINE))
+    return {match.group(1): pr_text[match.end():matches[i + 1].start() if i + 1 < len(matches) else len(pr_text)]
+            for i, match in enumerate(matches)}
+
+
+@pytest.fixture
+def fixture_repo(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    git(repo, "init", "-q", "-b", "main")
+    rename_body = "".join(f"def helper_{i}():\n    return {i}\n\n" for i in range(20)).encode()
+    write(repo, "app/service.py", b"import os\n\n\ndef run():\n    return os.getcwd()\n")
+    write(repo, "app/old_helpers.py", rename_body)
+    write(repo, "docs/legacy.txt", "caf\xe9 menu\nline two\n".encode("latin-1"))
+    write(repo, "assets/logo.bin", bytes(range(256)))
+    write(repo, "app/gone.py", b"x = 1\n")
+    git(repo, "add", "-A")
+    git(repo, "commit", "-q", "-m", "base")
+    base = git(repo, "rev-parse", "HEAD")
+
+    git(repo, "checkout", "-q", "-b", "feature")
+    write(repo, "app/service.py", b"import os\nimport sys\n\n\ndef run():\n    # \x0cform feed\n    return os.getcwd()\n")
+    git(repo, "mv", "app/old_helpers.py", "app/helpers.py")
+    write(repo, "app/helpers.py", rename_body + b"def helper_new():\n    return -1\n")
+    write(repo, "app/added.py", b"VALUE = 1\n")
+    write(repo, "docs/legacy.txt", "caf\xe9 menu\nligne deux \xe0 jour\n".encode("latin-1"))
+    write(repo, "assets/logo.bin", bytes(reversed(range(256))))
+    (repo / "app/gone.py").unlink()
+    git(repo, "add", "-A")
+    git(repo, "commit", "-q", "-m", "Add feature")
+    head = git(repo, "rev-parse", "HEAD")
+
+    # base 브랜치에만 있는 이후 커밋은 base...head(merge base 기준) diff에 나오지 않아야 합니다.
+    git(repo, "checkout", "-q", "main")
+    write(repo, "app/main_only.py", b"ONLY_ON_MAIN = True\n")
+    git(repo, "add", "-A")
+    git(repo, "commit", "-q", "-m", "main moves on")
+    return repo, base, head
+
+
+def test_extracts_files_from_merge_base(fixture_repo):
+    repo, _, head = fixture_repo
+    extractor = LocalGitExtractor(str(repo), "main", head)
+
+    pr_text = extractor.extract_pr_data()
+
+    assert extractor.head_sha == head
+    assert pr_text.startswith("PR Title: Add feature\n")
+    assert sorted(extractor.changed_files) == [
+        "app/added.py", "app/gone.py", "app/helpers.py", "app/service.py", "assets/logo.bin", "docs/legacy.txt",
+    ]
+    # git diff의 position은 GitHub PR diff와 다를 수 있으므로 인라인 코멘트용 patch는 내보내지 않습니다.
+    assert extractor.patches == {}
+
+
+def test_statuses_renames_and_binary_files(fixture_repo):
+    repo, base, head = fixture_repo
+    files = sections(LocalGitExtractor(str(repo), base, head).extract_pr_data())
+
+    assert "Status: added\nChanges: +1 -0" in files["app/added.py"]
+    assert "Status: removed\nChanges: +0 -1" in files["app/gone.py"]
+    assert "Status: renamed\nChanges: +2 -0" in files["app/helpers.py"]
+    assert "+def helper_new():" in files["app/helpers.py"]
+    assert "Status: modified" in files["assets/logo.bin"]
+    assert "Patch:" not in files["assets/logo.bin"]
+
+
+def test_patch_lines_survive_form_feed_and_non_utf8(fixture_repo):
+    repo, base, head = fixture_repo
+    files = sections(LocalGitExtractor(str(repo), base, head).extract_pr_data())
+
+    service = files["app/service.py"].split("Patch:\n", 1)[1]
+    assert "Changes: +2 -0" in files["app/service.py"]
+    assert "+    # \x0cform feed\n" in service
+    assert service.splitlines()[0] == "@@ -1,5 +1,7 @@"
+
+    legacy = files["docs/legacy.txt"]
+    assert "Changes: +1 -1" in legacy
+    # UTF-8이 아닌 바이트는 대체 문자로 바뀌지만 줄 구조는 유지됩니다.
+    assert "+ligne deux � jour" in legacy
+    assert " caf� menu" in legacy
+
+
+def test_renames_can_be_disabled(fixture_repo):
+    repo, base, head = fixture_repo
+    extractor = LocalGitExtractor(str(repo), base, head, find_renames=False)
+
+    files = sections(extractor.extract_pr_data())
+
+    assert "Status: removed" in files["app/old_helpers.py"]
+    assert "Status: added" in files["app/helpers.py"]
+
+
+def test_changed_files_between_and_force_push(fixture_repo):
+    repo, base, head = fixture_repo
+    extractor = LocalGitExtractor(str(repo), base, head)
+
+    assert extractor.get_changed_files_between(base, head) == {
+        "app/added.py", "app/gone.py", "app/helpers.py", "app/old_helpers.py", "app/service.py",
+        "assets/logo.bin", "docs/legacy.txt",
+    }
+    main_head = git(repo, "rev-parse", "main")
+    assert extractor.get_changed_files_between(head, main_head) is None
@@ -0,0 +1,145 @@
+import socket
+import time
+
+import pytest
+import requests
+
+from benchmark.stubs import StubOllama
+from codellama_reviewer import CodeLlamaReviewer
+from ollama_pool import OllamaEndpointPool
+
+MODEL = "qwen2.5-coder:32b-instruct"
+
+
+def stub(**kwargs) -> StubOllama:
+    kwargs.setdefault("models", [MODEL])
+    return StubOllama(latency=0, output_tokens=2, tokens_per_second=1000, **kwargs).start()
+
+
+def closed_port_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+def generate(endpoint) -> str:
+    response = requests.post(f"{endpoint.url}/api/generate",
+                             json={"model": MODEL, "prompt": "p", "stream": False}, timeout=5)
+    response.raise_for_status()
+    return endpoint.url
+
+
+@pytest.fixture
+def stubs():
+    servers = []
+
+    def start(**kwargs):
+        servers.append(stub(**kwargs))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def generate_count(server: StubOllama) -> int:
+    return server.reset_counts().get("POST /api/generate", 0)
+
+
+def test_routes_only_to_endpoints_with_the_model(stubs):
+    first, second, other = stubs(), stubs(), stubs(models=["llama3:8b"])
+    pool = OllamaEndpointPool([first.url, second.url, other.url], health_check_interval=0)
+
+    assert pool.check_health() == 3
+    for _ in range(6):
+        pool.request(generate, MODEL)
+
+    # 진행 중 요청이 같으면 누적 요청 수가 적은 엔드포인트를 고르므로 번갈아 보냅니다.
+    assert (generate_count(first), generate_count(second), generate_count(other)) == (3, 3, 0)
+    pool.close()
+
+
+def test_consecutive_failures_eject_the_endpoint(stubs):
+    healthy, failing = stubs(), stubs(fail_status=500)
+    pool = OllamaEndpointPool([failing.url, healthy.url], health_check_interval=0, max_failures=2,
+                              eject_seconds=60)
+
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            with pool.acquire(MODEL, pinned_url=failing.url) as endpoint:
+                generate(endpoint)
+
+    assert not pool.is_available(failing.url)
+    assert pool.stats()[failing.url]["ejected"]
+    assert pool.stats()[failing.url]["failures"] == 2
+    for _ in range(3):
+        assert pool.request(generate, MODEL) == healthy.url
+    assert generate_count(healthy) == 3
+    pool.close()
+
+
+def test_failed_request_is_retried_once_on_another_endpoint(stubs):
+    healthy, failing = stubs(), stubs(fail_status=503)
+    pool = OllamaEndpointPool([failing.url, healthy.url], health_check_interval=0, max_failures=5)
+
+    # 첫 요청은 failing으로 갑니다 (동률이면 목록 순서).
+    assert pool.request(generate, MODEL) == healthy.url
+
+    stats = pool.stats()
+    assert stats[failing.url]["failures"] == 1
+    assert stats[healthy.url]["requests"] == 1
+    assert generate_count(failing) == 1 and generate_count(healthy) == 1
+    pool.close()
+
+
+def test_no_failover_when_every_endpoint_fails_or_request_is_pinned(stubs):
+    first, second = stubs(fail_status=500), stubs(fail_status=500)
+    pool = OllamaEndpointPool([first.url, second.url], health_check_interval=0, max_failures=5)
+
+    with pytest.raises(requests.HTTPError):
+        pool.request(generate, MODEL)
+    # 한 번만 다른 엔드포인트로 옮겨 시도합니다.
+    assert generate_count(first) + generate_count(second) == 2
+
+    healthy = stubs()
+    pinned_pool = OllamaEndpointPool([first.url, healthy.url], health_check_interval=0)
+    with pytest.raises(requests.HTTPError):
+        pinned_pool.request(generate, MODEL, pinned_url=first.url)
+    assert generate_count(healthy) == 0
+    pool.close()
+    pinned_pool.close()
+
+
+def test_health_checks_run_concurrently_on_their_own_session(stubs):
+    slow, fast = stubs(tags_delay=1.0), stubs()
+    down = closed_port_url()
+    pool = OllamaEndpointPool([slow.url, down, fast.url], health_check_interval=0, health_check_timeout=0.5)
+
+    started_at = time.perf_counter()
+    healthy = pool.check_health()
+    elapsed = time.perf_counter() - started_at
+
+    assert healthy == 1
+    assert pool.is_available(fast.url)
+    assert not pool.is_available(slow.url) and not pool.is_available(down)
+    # 순차 확인이었다면 느린 서버의 timeout 뒤에 나머지를 확인합니다.
+    assert elapsed < 0.9
+    # 상태 확인은 생성 요청 세션(pool_block=True)과 다른 비차단 풀을 사용합니다.
+    adapter = pool.session.get_adapter(fast.url)
+    assert adapter._pool_block is False
+    pool.close()
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_reviewer_fails_over_before_any_output(stubs, stream):
+    failing, healthy = stubs(fail_status=500), stubs(response_text="NO ISSUE")
+    chunks = []
+    reviewer = CodeLlamaReviewer(f"{failing.url},{healthy.url}", stream=stream, on_chunk=chunks.append,
+                                 health_check_interval=0, connect=False)
+    try:
+        assert reviewer._generate("prompt", MODEL).strip() == "NO ISSUE"
+        assert reviewer.endpoint_pool.stats()[failing.url]["failures"] == 1
+        if stream:
+            assert "".join(chunks).strip() == "NO ISSUE"
+    finally:
+        reviewer.close()
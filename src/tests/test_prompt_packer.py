@@ -0,0 +1,70 @@
+from prompt_packer import PromptPacker, TokenCounter
+
+HEADER = "PR Title: t\n\nChanged Files:\n"
+
+
+def section(name: str, hunks: int, width: int = 60) -> dict:
+    text = f"\n=== File: {name} ===\nStatus: modified\n\nPatch:\n"
+    text += "".join(f"@@ -{i * 10},1 +{i * 10},1 @@\n+{'x' * width}\n" for i in range(1, hunks + 1))
+    return {'file': name, 'text': text}
+
+
+def make_packer(context_window: int) -> PromptPacker:
+    # 3자 = 1토큰 추정으로 고정해 예산을 계산하기 쉽게 합니다.
+    return PromptPacker(TokenCounter(chars_per_token=3.0), fixed_prompt="", context_window=context_window,
+                        reserved_output_tokens=0, reserved_convention_tokens=0)
+
+
+def test_pack_combines_small_files_into_one_prompt():
+    sections = [section("a.py", 1), section("b.py", 1), section("c.py", 1)]
+
+    prompts = make_packer(2000).pack(HEADER, sections)
+
+    assert len(prompts) == 1
+    assert prompts[0]['file'] == "a.py, b.py, c.py"
+    assert prompts[0]['files'] == ["a.py", "b.py", "c.py"]
+    # 묶인 프롬프트는 헤더 한 번과 원래 순서의 파일 섹션들입니다.
+    assert prompts[0]['text'] == HEADER + "".join(item['text'] for item in sections)
+
+
+def test_pack_respects_budget_and_keeps_every_section():
+    packer = make_packer(100)
+    sections = [section(name, 1) for name in ("a.py", "b.py", "c.py", "d.py")]
+
+    prompts = packer.pack(HEADER, sections)
+
+    budget = packer.budget(HEADER)
+    assert len(prompts) > 1
+    for prompt in prompts:
+        assert packer.token_counter.count(prompt['text'][len(HEADER):]) <= budget
+    packed_files = [name for prompt in prompts for name in prompt['file'].split(", ")]
+    assert sorted(packed_files) == ["a.py", "b.py", "c.py", "d.py"]
+
+
+def test_oversized_file_is_split_at_hunk_boundaries():
+    packer = make_packer(150)
+    big = section("big.py", 6)
+
+    units = packer.split(HEADER, [big, section("small.py", 1, width=5)])
+
+    assert [unit['file'] for unit in units[:-1]] == ["big.py"] * (len(units) - 1)
+    assert len(units) > 2
+    assert units[-1]['file'] == "small.py"
+    for unit in units[:-1]:
+        body = unit['text'][len(HEADER):]
+        # 나뉜 조각마다 파일 머리말을 다시 붙이고, hunk 중간에서 자르지 않습니다.
+        assert body.startswith("\n=== File: big.py ===")
+        assert body.count("@@ -") == body.count("\n+")
+    rejoined = "".join(unit['text'][len(HEADER):].split("Patch:\n", 1)[1] for unit in units[:-1])
+    assert rejoined == big['text'].split("Patch:\n", 1)[1]
+
+
+def test_pack_rejects_header_larger_than_context():
+    packer = make_packer(10)
+
+    try:
+        packer.pack(HEADER * 20, [section("a.py", 1)])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("예산이 0 이하이면 ValueError가 발생해야 합니다")
@@ -0,0 +1,35 @@
+from review_formatter import REVIEW_ERROR_MESSAGE, ReviewFormatter
+
+
+def test_parse_file_sections_round_trips_unified_report():
+    formatter = ReviewFormatter()
+    body = ReviewFormatter.format_file_sections([
+        ("src/A.java", "### 🟧 Medium\n- 이름을 바꾸세요."),
+        ("src/B.java", "NO ISSUE"),
+        ("src/C.swift", f"{REVIEW_ERROR_MESSAGE} 다시 시도해주세요."),
+    ])
+    report = formatter.create_unified_report(body) + "\n<!-- code-review-head-sha: abc -->"
+
+    sections = ReviewFormatter.parse_file_sections(report)
+
+    assert sections == {
+        "src/A.java": "### 🟧 Medium\n- 이름을 바꾸세요.",
+        "src/C.swift": f"{REVIEW_ERROR_MESSAGE} 다시 시도해주세요.",
+    }
+    assert ReviewFormatter.is_error_section(sections["src/C.swift"])
+    assert not ReviewFormatter.is_error_section(sections["src/A.java"])
+
+
+def test_parse_file_sections_without_sections():
+    assert ReviewFormatter.parse_file_sections("") == {}
+    assert ReviewFormatter.parse_file_sections(ReviewFormatter().create_unified_report("NO ISSUE")) == {}
+
+
+def test_merge_file_reviews_prefers_new_results_in_file_order():
+    merged = ReviewFormatter().merge_file_reviews(
+        ["a.py", "b.py", "c.py"],
+        {"b.py": "new b"},
+        {"a.py": "old a", "b.py": "old b", "c.py": "old c"},
+    )
+
+    assert ReviewFormatter.parse_file_sections(merged) == {"a.py": "old a", "b.py": "new b", "c.py": "old c"}
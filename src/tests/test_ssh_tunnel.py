@@ -0,0 +1,70 @@
+import os
+import sys
+from urllib.parse import urlparse
+
+import pytest
+import requests
+
+from benchmark.stubs import StubOllama
+from ssh_tunnel import SSHTunnel, is_port_open
+
+LOOPBACK_SSH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmark", "loopback_ssh.py")
+
+
+@pytest.fixture
+def ollama():
+    server = StubOllama(latency=0, output_tokens=2, tokens_per_second=1000).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def tunnel(ollama):
+    # sshd 없이 `ssh -N -L`과 같은 인자를 받는 로컬 포워더로 터널 경로를 실행합니다.
+    tunnel = SSHTunnel("example.invalid", "tester", remote_host="127.0.0.1",
+                       remote_port=urlparse(ollama.url).port, ready_timeout=10,
+                       ssh_command=[sys.executable, LOOPBACK_SSH, "--handshake", "0.2"])
+    yield tunnel
+    tunnel.stop()
+
+
+def assert_reaped(pid: int) -> None:
+    with pytest.raises(ProcessLookupError):
+        os.kill(pid, 0)
+
+
+def test_start_waits_until_forward_is_ready(tunnel):
+    url = tunnel.start()
+
+    assert tunnel.is_alive()
+    assert is_port_open(tunnel.local_port)
+    assert requests.get(f"{url}/api/tags", timeout=5).json()["models"]
+
+
+def test_ensure_reconnects_on_same_port_after_process_dies(tunnel):
+    url = tunnel.start()
+    local_port, first = tunnel.local_port, tunnel.process
+    first.kill()
+    first.wait()
+    assert not tunnel.is_alive()
+
+    tunnel.ensure()
+
+    assert tunnel.reconnects == 1
+    assert tunnel.local_port == local_port
+    assert tunnel.process is not first and tunnel.is_alive()
+    assert requests.get(f"{url}/api/tags", timeout=5).status_code == 200
+
+    tunnel.ensure()  # 살아 있으면 다시 연결하지 않습니다.
+    assert tunnel.reconnects == 1
+
+
+def test_stop_leaves_no_child_process(tunnel):
+    tunnel.start()
+    pid = tunnel.process.pid
+
+    tunnel.stop()
+
+    assert tunnel.process is None
+    assert_reaped(pid)
+    assert not is_port_open(tunnel.local_port)